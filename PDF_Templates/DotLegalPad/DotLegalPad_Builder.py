@@ -0,0 +1,250 @@
+import sys
+import argparse
+from pathlib import Path
+
+import fitz
+import DotLegalPad_Config as config
+
+# ======================================================================
+# --- DotLegalPad テンプレート生成ライブラリ ---
+# 用紙サイズ (A4/A5) × 種類 (通常 / Index Key のフォーム付き) の
+# テンプレートをまとめて生成する。
+#
+# 背景 (縦線・横罫線・ドット方眼) は用紙サイズごとに1度だけ描画し、
+# Form XObject として各テンプレートに貼り付ける。
+# この XObject には TEMPLATE_MARKER_KEY を付けているため、
+# Normalisierer / Ersteller は同じ背景を1つにまとめて出力できる。
+#
+# 使い方:
+#   python DotLegalPad_Builder.py                    (全ての組み合わせを生成)
+#   python DotLegalPad_Builder.py --sizes A4 --variants form -o PDF
+# ======================================================================
+
+# 用紙サイズごとの (幅, 高さ, DPI)。QUADERNO の画面解像度に合わせている
+PAGE_SIZES = {
+    "A4": (1650, 2200, 200),
+    "A5": (1404, 1872, 226),
+}
+
+# テンプレートの種類 ("form" は Index Key のコンボボックス付き)
+VARIANTS = ("plain", "form")
+
+# 背景の XObject に付けるマーカー (値は "DotLegalPad-<用紙サイズ>")
+# Synapsen_Normalisierer/pdf_utils.py と Synapsen_Ersteller/pdf_builder.py の
+# TEMPLATE_MARKER_KEY と一致させること
+TEMPLATE_MARKER_KEY = "SynapsenTemplate"
+
+# Index Key のコンボボックス (config.ini [Extraction] key_rect の基準)
+FORM_FIELD_NAME = "category_choice"
+FORM_ORIGIN = (26, 13)
+FORM_HEIGHT = 60
+FORM_FONT_SIZE = 28
+
+COLOR_RED = (1, 0.7, 0.7)
+
+
+def _producer_text():
+    return (f"Generated by Python {sys.version.split()[0]} "
+            f"with PyMuPDF {fitz.version[0]}")
+
+
+def draw_background(page, dpi, color=config.COLOR_LINE, dot_radius=config.DOT_READIUS,
+                    header_cm=config.HEADER_POSITION, footer_cm=config.FOOTER_POSITION,
+                    left_margin_cm=config.LEFT_MARGIN_LINE):
+    """
+    ページに縦線・1cm の横罫線・5mm のドット方眼を描画する。
+
+    罫線とドットはそれぞれ1つの図形 (Shape) にまとめて描画する。
+    各ドットは長さ0の線を丸い線端 (lineCap=1) で描いたもので、
+    半径 dot_radius の円に太さ1の輪郭線を付けた大きさで表示される。
+
+    Args:
+        page (fitz.Page): 描画先のページ。
+        dpi (int): QUADERNO の解像度 (cm の換算に使う)。
+        color (tuple): 罫線とドットの色 (R, G, B)。
+        dot_radius (float): ドットの半径。
+        header_cm (float): ページ上部の余白 [cm]。
+        footer_cm (float): ページ下部の余白 [cm]。
+        left_margin_cm (float): 左側の縦線までの余白 [cm]。
+    """
+    width, height = page.rect.width, page.rect.height
+    cm = dpi / 2.54
+    header = header_cm * cm
+    footer = footer_cm * cm
+    left_margin_line = left_margin_cm * cm
+
+    # 左側の縦線（リーガルパッド風）
+    page.draw_line(
+        fitz.Point(left_margin_line, 0),
+        fitz.Point(left_margin_line, height),
+        color=COLOR_RED,
+        width=1
+    )
+
+    # 1cm単位の横罫線 (ヘッダー・フッター内は描画しない)
+    shape = page.new_shape()
+    y = header
+    while y < height - footer:
+        shape.draw_line(fitz.Point(0, y), fitz.Point(width, y))
+        y += 1 * cm
+    shape.finish(color=color, width=0.5, closePath=False)
+    shape.commit()
+
+    # 5mm単位のドット (ヘッダー・フッター内は描画しない)
+    shape = page.new_shape()
+    x = 0
+    while x < width:
+        y = header
+        while y < height - footer:
+            shape.draw_line(fitz.Point(x, y), fitz.Point(x, y))
+            y += 0.5 * cm
+        x += 0.5 * cm
+    shape.finish(color=color, width=dot_radius * 2 + 1, lineCap=1, closePath=False)
+    shape.commit()
+
+
+def create_background(page_size):
+    """
+    背景だけを描画した1ページのPDF (fitz.Document) を返す。
+
+    Raises:
+        ValueError: 未対応の用紙サイズの場合。
+    """
+    if page_size not in PAGE_SIZES:
+        raise ValueError(f"未対応の用紙サイズです: {page_size}")
+    width, height, dpi = PAGE_SIZES[page_size]
+    background = fitz.open()
+    page = background.new_page(width=width, height=height)
+    draw_background(page, dpi)
+    return background
+
+
+def stamp_background(page, background, page_size):
+    """
+    背景のPDFを Form XObject としてページに貼り付け、マーカーを付ける。
+
+    Returns:
+        int: 背景の XObject の xref。
+    """
+    xref = page.show_pdf_page(page.rect, background, 0)
+    page.parent.xref_set_key(xref, TEMPLATE_MARKER_KEY, f"(DotLegalPad-{page_size})")
+    return xref
+
+
+def add_index_key_form(page, options=config.OPTIONS, font_path=config.FONT_PATH,
+                       font_name=config.FONT_NAME, form_width=config.FORM_WIDTH):
+    """
+    ページに Index Key を選ぶコンボボックス (category_choice) を追加する。
+
+    Raises:
+        FileNotFoundError: フォントファイルが見つからない場合。
+    """
+    if not Path(font_path).is_file():
+        raise FileNotFoundError(f"フォントファイルが見つかりません: {font_path}")
+    page.insert_font(fontfile=font_path, fontname=font_name)
+
+    x0, y0 = FORM_ORIGIN
+    widget = fitz.Widget()
+    widget.rect = fitz.Rect(x0, y0, x0 + form_width, y0 + FORM_HEIGHT)
+    widget.field_type = fitz.PDF_WIDGET_TYPE_COMBOBOX
+    widget.field_flags = fitz.PDF_CH_FIELD_IS_COMBO
+    widget.field_name = FORM_FIELD_NAME
+    widget.choice_values = options
+    widget.text_font = font_name
+    widget.text_fontsize = FORM_FONT_SIZE
+    widget.field_value = ""
+    page.add_widget(widget)
+
+
+def build_template(page_size, variant, background=None, **form_options):
+    """
+    1つのテンプレート (fitz.Document) を生成する。
+
+    フォームフィールドを持つPDFは QUADERNO でテンプレートに設定できず、
+    ``DPDocType:notebook`` に設定してもページを追加できないため、
+    "form" はドキュメントとして使用し、「サイドノート」をページ追加として扱う。
+
+    Args:
+        page_size (str): "A4" または "A5"。
+        variant (str): "plain" (ページ追加可能なノート) または "form" (Index Key 付き)。
+        background (fitz.Document, optional):
+            create_background で作成した背景 (省略時はここで作成する)。
+        **form_options: add_index_key_form に渡す設定 (options, font_path など)。
+    """
+    if variant not in VARIANTS:
+        raise ValueError(f"未対応のテンプレートの種類です: {variant}")
+    if background is None:
+        background = create_background(page_size)
+
+    width, height, _ = PAGE_SIZES[page_size]
+    doc = fitz.open()
+    metadata = {"producer": _producer_text()}
+    if variant == "plain":
+        # ページ追加可能なノートとして認識させる
+        metadata["keywords"] = "DPDocType:notebook"
+    doc.set_metadata(metadata)
+
+    page = doc.new_page(width=width, height=height)
+    stamp_background(page, background, page_size)
+    if variant == "form":
+        add_index_key_form(page, **form_options)
+    return doc
+
+
+def template_filename(page_size, variant, file_name=config.FILE_NAME):
+    """テンプレートのファイル名 (例: DotLegalPad_Template-A4_Form.pdf) を返す。"""
+    suffix = "_Form" if variant == "form" else ""
+    return f"{file_name}-{page_size}{suffix}.pdf"
+
+
+def generate_templates(out_dir, page_sizes=tuple(PAGE_SIZES), variants=VARIANTS, **form_options):
+    """
+    page_sizes × variants の全ての組み合わせのテンプレートを out_dir に生成する。
+
+    背景は用紙サイズごとに1度だけ描画する。
+
+    Returns:
+        list[Path]: 生成したPDFのパス。
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    generated = []
+    for page_size in page_sizes:
+        background = create_background(page_size)
+        for variant in variants:
+            doc = build_template(page_size, variant, background, **form_options)
+            path = out_dir / template_filename(page_size, variant)
+            doc.save(path, garbage=3, deflate=True)
+            doc.close()
+            generated.append(path)
+            print(f"テンプレート '{path}' を作成しました。")
+        background.close()
+    return generated
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="DotLegalPad テンプレートを用紙サイズ・種類の組み合わせごとに生成する"
+    )
+    parser.add_argument(
+        "--sizes", nargs="+", choices=sorted(PAGE_SIZES), default=sorted(PAGE_SIZES),
+        help="生成する用紙サイズ (既定: すべて)"
+    )
+    parser.add_argument(
+        "--variants", nargs="+", choices=VARIANTS, default=list(VARIANTS),
+        help="生成する種類 (plain: 通常, form: Index Key 付き。既定: すべて)"
+    )
+    parser.add_argument("-o", "--out-dir", default=".", help="出力先フォルダ (既定: カレントフォルダ)")
+    parser.add_argument("--font", default=config.FONT_PATH, help="フォームに埋め込むフォント (既定: DotLegalPad_Config.FONT_PATH)")
+    args = parser.parse_args(argv)
+
+    try:
+        generate_templates(args.out_dir, args.sizes, args.variants, font_path=args.font)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,6 @@
 # ======================================================================
 # --- PDFテンプレート 設定ファイル ---
-# このスクリプト (generate_template.py) と同じフォルダに置いてください。
+# このスクリプト (DotLegalPad_Builder.py など) と同じフォルダに置いてください。
 # ======================================================================
 
 # --- 1. 基本設定 (主にここを編集します) ---
@@ -0,0 +1,195 @@
+import os
+import sys
+import argparse
+from pathlib import Path
+
+import note_manager as Notes
+from pdf_builder import build_merged_pdf, PdfBuildError
+import perf_trace
+
+
+# 終了コード
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_USAGE = 2  # argparse の引数エラーと同じ値
+
+
+def _progress(message):
+    """進捗メッセージを標準エラー出力に表示する (標準出力は結果の表示に使う)。"""
+    print(message, file=sys.stderr)
+
+
+def _load_notes(source, key_rect):
+    """
+    --source に指定されたCSVファイルまたはフォルダから、ノート情報のリストを読み込む。
+    """
+    source_path = Path(source)
+    if source_path.is_dir():
+        return Notes.scan_folder(source_path, key_rect, progress=_progress)
+    return Notes.load_notes_from_csv(source_path)
+
+
+def _parse_month(value):
+    """'YYYY-MM' 形式の文字列を (年, 月) のタプルに変換する。"""
+    try:
+        year_str, month_str = value.split("-")
+        year, month = int(year_str), int(month_str)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{value}' は YYYY-MM 形式ではありません。")
+    if not 1 <= month <= 12:
+        raise argparse.ArgumentTypeError(f"'{value}' の月が不正です。")
+    return year, month
+
+
+def scan(args, config_data):
+    """フォルダ内のPDFを読み込み、CSVに保存する (GUIの「フォルダから新規読み込み」→「CSVに保存」)。"""
+    if not Path(args.folder).is_dir():
+        print(f"エラー: フォルダが見つかりません: {args.folder}", file=sys.stderr)
+        return EXIT_USAGE
+    notes_info = Notes.scan_folder(args.folder, config_data['key_rect'], progress=_progress)
+    Notes.save_notes_to_csv(notes_info, args.output)
+    print(f"読み込み完了！ {len(notes_info)}件のファイルを {args.output} に保存しました。")
+    return EXIT_OK
+
+
+def sync(args, config_data):
+    """CSVとフォルダを同期し、CSVを更新する (GUIの「フォルダと同期」)。"""
+    if not Path(args.folder).is_dir():
+        print(f"エラー: フォルダが見つかりません: {args.folder}", file=sys.stderr)
+        return EXIT_USAGE
+    notes_info = Notes.load_notes_from_csv(args.csv)
+    added_paths, deleted_paths = Notes.diff_with_folder(notes_info, args.folder)
+    if args.keep_missing:
+        deleted_paths = set()
+    for path in sorted(deleted_paths):
+        _progress(f"削除: {Path(path).name}")
+
+    notes_info = Notes.apply_folder_sync(
+        notes_info, added_paths, deleted_paths,
+        config_data['key_rect'], progress=_progress
+        )
+    output = args.output or args.csv
+    Notes.save_notes_to_csv(notes_info, output)
+    print(f"同期完了！ {len(added_paths)}件追加, {len(deleted_paths)}件削除 ({output})")
+    return EXIT_OK
+
+
+def build(args, config_data):
+    """指定した月のノートから統合PDFを生成する (GUIの「統合PDFを生成」)。"""
+    year, month = args.month
+    notes_info = Notes.filter_notes_by_month(
+        _load_notes(args.source, config_data['key_rect']), year, month
+        )
+    if not notes_info:
+        print(f"エラー: {year}年{month}月のノートが見つかりませんでした。", file=sys.stderr)
+        return EXIT_ERROR
+
+    output = args.output or f"統合ノート_{year}_{month:02d}.pdf"
+    pdf_title = f"{config_data['latex_title_prefix']} ({year}年 {month}月)"
+    try:
+        updated_notes_info = build_merged_pdf(
+            notes_info, config_data, pdf_title, output,
+            progress=_progress,
+            on_warning=lambda message: print(f"警告: {message}", file=sys.stderr)
+            )
+    except PdfBuildError as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+    exit_code = EXIT_OK
+    auto_append = config_data['auto_append_csv'] and not args.no_append
+    if auto_append:
+        try:
+            Notes.append_to_master_csv(updated_notes_info, config_data['default_csv_path'])
+            print(f"目次情報を {config_data['default_csv_path']} に追記しました。")
+        except Exception as e:
+            print(f"エラー: マスターCSVへの追記に失敗しました: {e}", file=sys.stderr)
+            exit_code = EXIT_ERROR
+
+    if config_data['create_individual_csv'] or not auto_append:
+        csv_filepath = Notes.save_merged_index_csv(updated_notes_info, output)
+        print(f"専用目次CSVを保存しました: {csv_filepath}")
+
+    print(f"統合PDFを生成しました: {output} ({len(updated_notes_info)}件のノート)")
+    return exit_code
+
+
+def append_master(args, config_data):
+    """統合PDFの目次CSVを、マスターCSV (config.ini の default_csv_path) に追記する。"""
+    master_csv_path = args.master or config_data['default_csv_path']
+    if not master_csv_path:
+        print(
+            "エラー: config.ini [Paths][default_csv_path] が未設定です。--master で指定してください。",
+            file=sys.stderr
+            )
+        return EXIT_USAGE
+    notes_info = Notes.load_merged_index_csv(args.csv)
+    Notes.append_to_master_csv(notes_info, master_csv_path)
+    print(f"{len(notes_info)}件の目次情報を {master_csv_path} に追記しました。")
+    return EXIT_OK
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Synapsen Ersteller (コマンドライン版)"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scan_parser = subparsers.add_parser("scan", help="フォルダ内のPDFを読み込み、CSVに保存する")
+    scan_parser.add_argument("folder", help="Normalisierer で処理済みのフォルダ")
+    scan_parser.add_argument("-o", "--output", required=True, help="保存するCSVファイル")
+    scan_parser.set_defaults(func=scan)
+
+    sync_parser = subparsers.add_parser("sync", help="CSVとフォルダを同期する")
+    sync_parser.add_argument("csv", help="同期するCSVファイル")
+    sync_parser.add_argument("folder", help="同期するフォルダ")
+    sync_parser.add_argument("-o", "--output", help="保存先のCSVファイル (省略時は上書き)")
+    sync_parser.add_argument(
+        "--keep-missing", action="store_true",
+        help="フォルダから見つからないファイルをリストから削除しない"
+    )
+    sync_parser.set_defaults(func=sync)
+
+    build_parser = subparsers.add_parser("build", help="指定した月の統合PDFを生成する")
+    build_parser.add_argument(
+        "--month", type=_parse_month, required=True, help="対象の年月 (YYYY-MM)"
+    )
+    build_parser.add_argument(
+        "--source", required=True, help="ノート情報のCSVファイル、または処理済みのフォルダ"
+    )
+    build_parser.add_argument(
+        "-o", "--output", help="統合PDFの保存先 (省略時は 統合ノート_YYYY_MM.pdf)"
+    )
+    build_parser.add_argument(
+        "--no-append", action="store_true",
+        help="config.ini の auto_append_to_default_csv を無視し、マスターCSVに追記しない"
+    )
+    build_parser.set_defaults(func=build)
+
+    append_parser = subparsers.add_parser(
+        "append-master", help="統合PDFの目次CSVをマスターCSVに追記する"
+    )
+    append_parser.add_argument("csv", help="統合PDFの目次CSV")
+    append_parser.add_argument(
+        "--master", help="追記先のマスターCSV (省略時は config.ini の default_csv_path)"
+    )
+    append_parser.set_defaults(func=append_master)
+
+    args = parser.parse_args(argv)
+
+    if getattr(sys, 'frozen', False):
+        base_path = os.path.dirname(sys.executable)
+    else:
+        base_path = os.path.dirname(os.path.abspath(__file__))
+    config_data = Notes.load_config(base_path)
+    perf_trace.configure("ersteller_cli", **config_data['diagnostics'])
+
+    try:
+        return args.func(args, config_data)
+    except Exception as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+
+if __name__ == "__main__":
+    sys.exit(main())
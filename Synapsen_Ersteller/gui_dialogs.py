@@ -114,7 +114,7 @@ class DataEditorWindow(ctk.CTkToplevel):
         self.note_data["key"] = self.key_entry.get().strip()
         self.note_data["memo"] = self.memo_textbox.get("1.0", "end-1c").strip()
         self.note_data["tags"] = self.temp_tags
-        self.parent.update_note_list()
+        self.parent.update_note_row(self.note_data)
         self.destroy()
 
     def update_tags_display(self):
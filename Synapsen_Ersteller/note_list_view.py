@@ -0,0 +1,176 @@
+import sys
+import customtkinter as ctk
+
+# ======================================================================
+# --- ノート一覧 (仮想リスト) ---
+# 表示範囲に入る行数分だけウィジェットを作成し、スクロールに合わせて
+# 各行に表示するノートを差し替える。ノートが何件あってもウィジェットの数は変わらない。
+# ======================================================================
+
+ROW_HEIGHT = 32  # 1行の高さ [px]
+
+
+class NoteListView(ctk.CTkFrame):
+    """
+    ノート情報のリストを表示する、行を使い回すリスト。
+
+    各行の表示内容は format_row で作成し、前回と同じ内容の行は更新しない。
+    1件のノートを編集した場合は refresh_note でその行だけを更新できる。
+    """
+    def __init__(self, master, format_row, on_click, label_text="",
+                 empty_text="", row_height=ROW_HEIGHT, **kwargs):
+        """
+        Args:
+            master: 親ウィジェット。
+            format_row (callable):
+                ノート情報から (アイコン, アイコンの色, 表示テキスト, テキストの色) を返す関数。
+            on_click (callable): 行がクリックされた際に、ノート情報を渡して呼び出す関数。
+            label_text (str): リストの見出し。
+            empty_text (str): ノートが1件もない場合に表示するテキスト。
+            row_height (int): 1行の高さ [px]。
+        """
+        super().__init__(master, **kwargs)
+        self.format_row = format_row
+        self.on_click = on_click
+        self.empty_text = empty_text
+        self.row_height = row_height
+
+        self.notes = []
+        self.first = 0        # 先頭の行に表示しているノートの位置
+        self._index = {}      # id(ノート情報) -> 位置
+        self._rows = []       # [(row_frame, icon_label, text_label)]
+        self._rendered = []   # 各行に表示中の内容 (変化がなければ更新しない)
+        self._placed = []     # 各行を配置しているか
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        self.header_label = ctk.CTkLabel(self, text=label_text)
+        self.header_label.grid(row=0, column=0, columnspan=2, padx=5, pady=(5, 0), sticky="ew")
+
+        self.body = ctk.CTkFrame(self, fg_color="transparent")
+        self.body.grid(row=1, column=0, padx=(5, 0), pady=5, sticky="nsew")
+        self.body.bind("<Configure>", lambda e: self._render())
+        self._bind_scroll(self.body)
+
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.grid(row=1, column=1, padx=(0, 5), pady=5, sticky="ns")
+
+        self.empty_label = ctk.CTkLabel(self.body, text="")
+
+    # --- 公開メソッド ---
+
+    def set_notes(self, notes):
+        """表示するノート情報のリストを差し替える (スクロール位置は可能な限り保つ)。"""
+        self.notes = notes
+        self._index = {id(note): position for position, note in enumerate(notes)}
+        self._render()
+
+    def refresh_note(self, note):
+        """
+        1件のノート情報の表示を更新する (表示範囲外の場合は何もしない)。
+
+        Returns:
+            bool: ノートがリストに含まれていた場合は True。
+        """
+        position = self._index.get(id(note))
+        if position is None:
+            return False
+        slot = position - self.first
+        if 0 <= slot < len(self._rows):
+            self._render_slot(slot, note, force=True)
+        return True
+
+    # --- 描画 ---
+
+    def _visible_count(self):
+        """表示範囲に入る行数を返す (部分的に見える行を含む)。"""
+        height = self.body.winfo_height()
+        return max(1, -(-height // self.row_height))
+
+    def _render(self):
+        visible = self._visible_count()
+        total = len(self.notes)
+        # 最後までスクロールした際に、最後の行が欠けずに表示されるようにする
+        full_rows = max(1, self.body.winfo_height() // self.row_height)
+        self.first = max(0, min(self.first, total - full_rows))
+
+        # 表示範囲に必要な行数までウィジェットを作成する (一度作った行は使い回す)
+        while len(self._rows) < min(visible, total):
+            self._rows.append(self._create_row(len(self._rows)))
+            self._rendered.append(None)
+            self._placed.append(False)
+
+        for slot, (row_frame, _, _) in enumerate(self._rows):
+            position = self.first + slot
+            if slot < visible and position < total:
+                self._render_slot(slot, self.notes[position])
+                if not self._placed[slot]:
+                    row_frame.place(x=0, y=slot * self.row_height, relwidth=1, height=self.row_height)
+                    self._placed[slot] = True
+            elif self._placed[slot]:
+                row_frame.place_forget()
+                self._placed[slot] = False
+
+        if total == 0 and self.empty_text:
+            self.empty_label.configure(text=self.empty_text)
+            self.empty_label.place(relx=0.5, y=0, anchor="n")
+        else:
+            self.empty_label.place_forget()
+
+        if total:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _render_slot(self, slot, note, force=False):
+        content = self.format_row(note)
+        if not force and self._rendered[slot] == content:
+            return
+        _, icon_label, text_label = self._rows[slot]
+        icon, icon_color, text, text_color = content
+        icon_label.configure(text=icon, text_color=icon_color)
+        text_label.configure(text=text, text_color=text_color)
+        self._rendered[slot] = content
+
+    def _create_row(self, slot):
+        row_frame = ctk.CTkFrame(self.body, fg_color="transparent", height=self.row_height)
+        icon_label = ctk.CTkLabel(row_frame, text="", font=("", 14), width=20)
+        icon_label.pack(side="left", padx=(0, 5))
+        text_label = ctk.CTkLabel(row_frame, text="", anchor="w")
+        text_label.pack(side="left", fill="x", expand=True)
+
+        command = lambda e, s=slot: self._on_row_click(s)
+        for widget in (row_frame, icon_label, text_label):
+            widget.bind("<Button-1>", command)
+            self._bind_scroll(widget)
+        return row_frame, icon_label, text_label
+
+    def _on_row_click(self, slot):
+        position = self.first + slot
+        if position < len(self.notes):
+            self.on_click(self.notes[position])
+
+    # --- スクロール ---
+
+    def _bind_scroll(self, widget):
+        if sys.platform.startswith("linux"):
+            widget.bind("<Button-4>", lambda e: self._scroll_to(self.first - 3))
+            widget.bind("<Button-5>", lambda e: self._scroll_to(self.first + 3))
+        else:
+            widget.bind("<MouseWheel>", self._on_mouse_wheel)
+
+    def _on_mouse_wheel(self, event):
+        self._scroll_to(self.first + (-3 if event.delta > 0 else 3))
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self._scroll_to(round(float(value) * len(self.notes)))
+        elif action == "scroll":
+            step = self._visible_count() - 1 if unit == "pages" else 1
+            self._scroll_to(self.first + int(value) * max(1, step))
+
+    def _scroll_to(self, first):
+        if first != self.first:
+            self.first = first
+            self._render()
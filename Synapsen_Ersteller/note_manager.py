@@ -0,0 +1,415 @@
+import os
+import sys
+import csv
+import configparser
+from pathlib import Path
+
+import PDFMargeHelper as Helper
+import perf_trace
+# pdf_processor (PyMuPDF・pypdf) は起動を速くするため、使用時に読み込む
+
+
+# CSV の列定義
+NOTE_CSV_HEADER = [
+    "date", "time", "title", "pages", "tags",
+    "key", "memo", "commonplace_key", "filepath"
+]
+MERGED_CSV_HEADER = [
+    "date", "time", "title", "pages", "tags",
+    "key", "memo", "commonplace_key",
+    "merged_pdf_filename", "merged_start_page"
+]
+
+SIDE_NOTE_SUFFIX = "_Note"
+
+
+# ==============================================================================
+# 設定の読み込み
+# ==============================================================================
+def get_config_path(base_path):
+    """
+    実行環境(.exe or .py)に応じて、config.ini のパスを返す。
+
+    Args:
+        base_path (str): 実行ファイル (.exe) またはスクリプト (.py) のあるフォルダ。
+    """
+    if getattr(sys, 'frozen', False):
+        # .exe実行の場合（config.ini は .exe と同じフォルダ）
+        return os.path.join(base_path, 'config.ini')
+    # スクリプト実行の場合（config.ini は .py の1つ上のフォルダ）
+    return os.path.join(
+        os.path.abspath(os.path.join(base_path, '..')), 'config.ini'
+        )
+
+
+def _write_default_config(config_path):
+    """config.ini が存在しない場合に、デフォルト設定で作成する。"""
+    config = configparser.ConfigParser(interpolation=None)
+    config['Paths'] = {
+        'tags_data_path': 'tags.txt',
+        'font_path': r'C:\windows\fonts\msgothic.ttc'
+        }
+    config['LaTeX'] = {
+        'paper_size': "A4",
+        'font': 'MS UI Gothic',
+        'author': 'Your Name',
+        'title_prefix': '月刊 統合ノート'
+        }
+    config['CommonplaceKeys'] = {
+        'options': 'タスク,アイデア,思考・考察,コミュニケーション,学習・情報収集,日常・その他'
+        }
+    config['Extraction'] = {
+        'key_rect': '26, 13, 400, 73'
+        }
+    config['KeyIcons'] = {
+        'タスク': '♥',
+        'アイデア': '♥',
+        '思考・考察': '♥',
+        'コミュニケーション': '♥',
+        '学習・情報収集': '♥',
+        '日常・その他': '♥'
+        }
+    config['KeyColors'] = {
+        'タスク': 'FE0000',
+        'アイデア': 'FFFF02',
+        '思考・考察': '8802FF',
+        'コミュニケーション': '02FF01',
+        '学習・情報収集': '02FFFF',
+        '日常・その他': 'F2F2F2'
+        }
+    with open(config_path, 'w', encoding='utf-8') as f:
+        config.write(f)
+
+
+def _resolve_path(config_dir, path_str):
+    """
+    config.ini に書かれたパスを、環境変数を展開した上で
+    config.ini の場所 (config_dir) を基準に絶対パスへ変換する。
+    """
+    expanded_path = os.path.expandvars(path_str)  # 環境変数を展開
+    if os.path.isabs(expanded_path):
+        return expanded_path
+    return os.path.join(config_dir, expanded_path)
+
+
+def load_config(base_path):
+    """
+    config.ini を読み込み、Ersteller が使用する設定値の辞書を返す。
+
+    config.ini が存在しない場合は、デフォルト設定で作成する。
+    GUI (Synapsen_Ersteller_main.py) と CLI (Synapsen_Ersteller_cli.py) の
+    両方から使用される。
+
+    Args:
+        base_path (str): 実行ファイル (.exe) またはスクリプト (.py) のあるフォルダ。
+
+    Returns:
+        dict: 読み込まれた設定値の辞書。
+               (キー:
+                'font_path', 'tags_data_path', 'default_csv_path',
+                'auto_append_csv', 'create_individual_csv',
+                'paper_size', 'paper_width', 'paper_height',
+                'latex_font', 'latex_author', 'latex_title_prefix',
+                'commonplace_key_options', 'key_rect',
+                'key_icons', 'key_colors', 'diagnostics')
+    """
+    config_path = get_config_path(base_path)
+    print(f"[DEBUG] Loading config from: {config_path}")
+
+    # config.ini があるフォルダのパスを基準として定義
+    config_dir = os.path.dirname(config_path)
+
+    if not os.path.exists(config_path):
+        _write_default_config(config_path)
+
+    config = configparser.ConfigParser(interpolation=None)
+    config.read(config_path, encoding='utf-8')
+
+    config_data = {}
+
+    # 1. [Paths] の解決
+    config_data['font_path'] = _resolve_path(
+        config_dir, config.get('Paths', 'font_path', fallback='')
+        )
+    config_data['tags_data_path'] = _resolve_path(
+        config_dir, config.get('Paths', 'tags_data_path', fallback='tags.txt')
+        )
+
+    # default_csv_path (追記先のマスターCSVパス)
+    default_csv_path_str = config.get('Paths', 'default_csv_path', fallback='')
+    if not os.path.expandvars(default_csv_path_str):
+        config_data['default_csv_path'] = None
+        print("DEBUG: config.ini [Paths][default_csv_path] が未設定です。")
+    else:
+        config_data['default_csv_path'] = _resolve_path(
+            config_dir, default_csv_path_str
+            )
+
+    # 2. Automation設定の読み込み
+    auto_append_csv = config.getboolean(
+        'Automation', 'auto_append_to_default_csv', fallback=False
+        )
+    if auto_append_csv and not config_data['default_csv_path']:
+        print("警告: auto_append_to_default_csv が True ですが、default_csv_path が未設定のため無効化されます。")
+        auto_append_csv = False
+    config_data['auto_append_csv'] = auto_append_csv
+    config_data['create_individual_csv'] = config.getboolean(
+        'Automation', 'create_individual_csv', fallback=False
+        )
+
+    # 3. 用紙サイズ
+    paper_size = config.get('LaTeX', 'paper_size', fallback='A4').upper()
+    if paper_size == 'A5':
+        config_data['paper_width'] = Helper.A5_WIDTH
+        config_data['paper_height'] = Helper.A5_HEIGHT
+    else:
+        paper_size = 'A4'  # 不正な値はA4に
+        config_data['paper_width'] = Helper.A4_WIDTH
+        config_data['paper_height'] = Helper.A4_HEIGHT
+    config_data['paper_size'] = paper_size
+    print(f"[DEBUG] Ersteller paper size set to {paper_size}")
+
+    # 4. LaTeX・Index Key 関連
+    config_data['latex_font'] = config.get('LaTeX', 'font', fallback='Yu Gothic')
+    config_data['latex_author'] = config.get('LaTeX', 'author', fallback='Your Name')
+    config_data['latex_title_prefix'] = config.get(
+        'LaTeX', 'title_prefix', fallback='月刊 統合ノート'
+        )
+    config_data['commonplace_key_options'] = [
+        opt.strip() for opt in config.get('CommonplaceKeys', 'options', fallback='').split(',')
+        ]
+    rect_str = config.get('Extraction', 'key_rect', fallback='0,0,0,0').split(',')
+    config_data['key_rect'] = tuple(map(float, rect_str))
+    config_data['key_icons'] = {k.lower(): v for k, v in config.items('KeyIcons')} if config.has_section('KeyIcons') else {}
+    config_data['key_colors'] = {k.lower(): v for k, v in config.items('KeyColors')} if config.has_section('KeyColors') else {}
+
+    # 5. 処理時間の計測
+    config_data['diagnostics'] = perf_trace.load_diagnostics_config(config, config_dir)
+
+    return config_data
+
+
+def load_predefined_tags(tags_data_path):
+    """
+    事前定義タグのテキストファイルを読み込み、タグのリストを返す。
+    ('#' で始まる行と空行は無視する)
+    """
+    try:
+        tag_file = Path(tags_data_path)
+        if tag_file.is_file():
+            with open(tag_file, "r", encoding="utf-8") as f:
+                tags = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+            print(f"{len(tags)}件の事前定義タグを読み込みました。")
+            return tags
+    except Exception as e:
+        print(f"tags.txtの読み込み中にエラーが発生しました: {e}")
+    return []
+
+
+# ==============================================================================
+# フォルダの読み込み・同期
+# ==============================================================================
+def sort_notes(notes_info):
+    """ノート情報のリストを (日付, 時刻) 順に並べ替える。"""
+    notes_info.sort(key=lambda note: (note['date'], note['time']))
+
+
+def inherit_side_note_keys(notes_info):
+    """
+    サイドノート (タイトルが "_Note" で終わるノート) に、
+    親ノートの Index Key を継承させる。
+
+    Returns:
+        int: Index Key を継承したサイドノートの数。
+    """
+    # 1. 親ノートの「タイトル」と「Index Key」の対応辞書を作成する
+    #    (get_note_info が返す 'title' をキーにする)
+    parent_key_map = {}
+    for info in notes_info:
+        title = info.get("title", "")
+        key = info.get("commonplace_key", "")
+
+        # "_Note" で終わっておらず、かつ Index Key が設定されているノートを親とみなす
+        if not title.endswith(SIDE_NOTE_SUFFIX) and key:
+            parent_key_map[title] = key
+
+    # 2. もう一度全ノートをスキャンし、サイドノートにKeyを継承させる
+    keys_inherited_count = 0
+    for info in notes_info:
+        title = info.get("title", "")
+
+        # title が "_Note" で終わり、かつ Index Key が空の場合
+        if title.endswith(SIDE_NOTE_SUFFIX) and not info.get("commonplace_key"):
+
+            # 親のタイトル名を取得 (例: "Example_Note" -> "Example")
+            parent_title = title[:-len(SIDE_NOTE_SUFFIX)]
+
+            # 親がマップに存在すれば、そのKeyを継承する
+            if parent_title in parent_key_map:
+                info["commonplace_key"] = parent_key_map[parent_title]
+                keys_inherited_count += 1
+
+    return keys_inherited_count
+
+
+def scan_folder(folder_path, key_rect, progress=None):
+    """
+    フォルダ内のPDFを読み込み、ノート情報のリストを返す。
+
+    サイドノートへの Index Key の継承と、日付順の並べ替えも行う。
+
+    Args:
+        folder_path (str or Path): 読み込むフォルダ。
+        key_rect (tuple): Index Key を読み取る座標 (x0, y0, x1, y1)。
+        progress (callable, optional): 進捗メッセージ (str) を受け取る関数。
+
+    Returns:
+        list[dict]: ノート情報のリスト。
+    """
+    import pdf_processor as Process
+
+    pdf_files = sorted(Path(folder_path).glob("*.pdf"))
+    notes_info = []
+    with perf_trace.span("ersteller.scan_folder", files=len(pdf_files)):
+        for i, pdf_file in enumerate(pdf_files):
+            if progress:
+                progress(f"読み込み中 ({i+1}/{len(pdf_files)}): {pdf_file.name}")
+            if info := Process.get_note_info(pdf_file, key_rect):
+                notes_info.append(info)
+
+    keys_inherited_count = inherit_side_note_keys(notes_info)
+    if keys_inherited_count > 0:
+        print(f"DEBUG: {keys_inherited_count}件のサイドノートにIndex Keyを継承しました。")
+
+    sort_notes(notes_info)
+    return notes_info
+
+
+def diff_with_folder(notes_info, folder_path):
+    """
+    ノート情報のリストとフォルダ内のPDFを比較する。
+
+    Returns:
+        tuple[set[str], set[str]]:
+            (フォルダにのみ存在するパス, リストにのみ存在するパス)
+    """
+    app_paths = {note.get('filepath') for note in notes_info}
+    disk_paths = {
+        str(pdf_file) for pdf_file in Path(folder_path).glob("*.pdf")
+        }
+    return disk_paths - app_paths, app_paths - disk_paths
+
+
+def apply_folder_sync(notes_info, added_paths, deleted_paths, key_rect, progress=None):
+    """
+    diff_with_folder の結果をノート情報のリストに反映した、新しいリストを返す。
+
+    Args:
+        notes_info (list[dict]): 現在のノート情報のリスト。
+        added_paths (set[str]): 追加するPDFのパス。
+        deleted_paths (set[str]): リストから削除するPDFのパス (空なら削除しない)。
+        key_rect (tuple): Index Key を読み取る座標。
+        progress (callable, optional): 進捗メッセージ (str) を受け取る関数。
+
+    Returns:
+        list[dict]: 同期後のノート情報のリスト (日付順)。
+    """
+    import pdf_processor as Process
+
+    synced_notes = [
+        note for note in notes_info if note.get('filepath') not in deleted_paths
+        ]
+    added_list = sorted(added_paths)
+    for i, path in enumerate(added_list):
+        if progress:
+            progress(f"追加中 ({i+1}/{len(added_list)}): {Path(path).name}")
+        info = Process.get_note_info(Path(path), key_rect)
+        if info:
+            synced_notes.append(info)
+    sort_notes(synced_notes)
+    return synced_notes
+
+
+def filter_notes_by_month(notes_info, year, month):
+    """日付 (YYYYMMDD) が指定した年月のノートだけを返す。"""
+    prefix = f"{year:04d}{month:02d}"
+    return [note for note in notes_info if str(note.get('date', '')).startswith(prefix)]
+
+
+# ==============================================================================
+# CSV の読み書き
+# ==============================================================================
+def _write_notes_csv(notes_info, csv_filepath, header, mode="w", write_header=True):
+    """ノート情報をタグを ';' 区切りにして CSV に書き込む。"""
+    with open(csv_filepath, mode, newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=header, extrasaction='ignore')
+        if write_header:
+            writer.writeheader()
+        for note in notes_info:
+            note_to_write = note.copy()
+            note_to_write["tags"] = ";".join(sorted(note_to_write.get("tags", [])))
+            writer.writerow(note_to_write)
+
+
+def save_notes_to_csv(notes_info, csv_filepath):
+    """編集中のノート情報を CSV に保存する (「CSVに保存」と同じ形式)。"""
+    _write_notes_csv(notes_info, csv_filepath, NOTE_CSV_HEADER)
+
+
+def load_notes_from_csv(csv_filepath):
+    """
+    save_notes_to_csv で保存した CSV を読み込み、ノート情報のリストを返す。
+
+    Raises:
+        Exception: CSVファイルの読み込みに失敗した場合。
+    """
+    notes_info = []
+    with open(csv_filepath, "r", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            row["tags"] = row.get("tags", "").split(";") if row.get("tags") else []
+            row["pages"] = int(row.get("pages", 0))
+            row["is_warning"] = row.get("date") in ["日付不明", "読み込み失敗"]
+            notes_info.append(row)
+    return notes_info
+
+
+def append_to_master_csv(notes_to_append, master_csv_path):
+    """
+    マスターCSV（config.iniのdefault_csv_path）に、
+    ヘッダーを考慮しながらノート情報を追記する。
+    """
+    master_csv_path = Path(master_csv_path)
+
+    # ファイルが存在し、中身が空でないかを確認
+    file_exists_and_has_content = master_csv_path.is_file() and master_csv_path.stat().st_size > 0
+
+    # ファイルが新規 or 空の場合のみヘッダーを書き込む
+    _write_notes_csv(
+        notes_to_append, master_csv_path, MERGED_CSV_HEADER,
+        mode="a", write_header=not file_exists_and_has_content
+        )
+
+
+def load_merged_index_csv(csv_filepath):
+    """
+    統合PDFの目次CSV (save_merged_index_csv の出力) を読み込み、
+    マスターCSVへ追記できる形のノート情報のリストを返す。
+    """
+    with open(csv_filepath, "r", encoding="utf-8-sig") as f:
+        rows = list(csv.DictReader(f))
+    for row in rows:
+        row["tags"] = row.get("tags", "").split(";") if row.get("tags") else []
+    return rows
+
+
+def save_merged_index_csv(notes_with_merged_info, merged_pdf_path):
+    """
+    統合PDFと同じ名前 (拡張子 .csv) で、統合PDF専用の目次CSVを保存する。
+
+    Returns:
+        Path: 保存した CSV のパス。
+    """
+    csv_filepath = Path(merged_pdf_path).with_suffix('.csv')
+    _write_notes_csv(notes_with_merged_info, csv_filepath, MERGED_CSV_HEADER)
+    return csv_filepath
@@ -0,0 +1,387 @@
+import shutil
+import hashlib
+import tempfile
+import subprocess
+from pathlib import Path
+from pypdf import PdfReader, PdfWriter, Transformation
+from pypdf.generic import IndirectObject, NameObject
+
+import latex_generator as Generator
+import perf_trace
+
+
+class PdfBuildError(Exception):
+    """統合PDFの生成に失敗したことを表す例外 (メッセージはそのままユーザーに表示する)。"""
+
+
+LATEX_PASSES = 3
+
+# DotLegalPad テンプレートの背景 XObject に付いているマーカー
+# (PDF_Templates/DotLegalPad/DotLegalPad_Builder.py の TEMPLATE_MARKER_KEY)
+TEMPLATE_MARKER_KEY = "/SynapsenTemplate"
+
+
+# ==============================================================================
+# 内部ヘルパー
+# ==============================================================================
+def _copy_bookmarks_recursive(outline_items, writer, reader, parent=None):
+    """
+    pypdfの目次(outline)の階層構造を再帰的にたどり、writerにコピーする関数
+    """
+    i = 0
+    while i < len(outline_items):
+        item = outline_items[i]
+
+        # 現在のアイテムをブックマークとして追加
+        # get_destination_page_numberでページ番号を安全に取得
+        page_num = reader.get_destination_page_number(item)
+        if page_num is not None:
+            new_parent = writer.add_outline_item(
+                item.title, page_num, parent=parent
+                )
+
+            # 次の要素がリスト（＝子要素のリスト）かチェック
+            if i + 1 < len(outline_items) and isinstance(outline_items[i+1], list):
+                # 子要素のリストに対して再帰的にこの関数を呼び出す
+                _copy_bookmarks_recursive(
+                    outline_items[i+1], writer, reader, parent=new_parent
+                    )
+                i += 1  # 子要素リストをスキップするためインデックスを1つ進める
+        i += 1
+
+
+def _find_title_in_outline(outline_items, target_title):
+    """目次(outline)から、タイトルが一致するアイテムを再帰的に探す。"""
+    for item in outline_items:
+        if isinstance(item, list):
+            result = _find_title_in_outline(item, target_title)
+            if result:
+                return result
+        elif hasattr(item, 'title') and item.title.strip() == target_title.strip():
+            return item
+    return None
+
+
+def _print_outline(items, indent=0):
+    """デバッグ用に目次(outline)のタイトルを階層表示する。"""
+    for item in items:
+        if isinstance(item, list):
+            _print_outline(item, indent + 1)
+        elif hasattr(item, 'title'):
+            print('  ' * indent + f"- '{item.title}'")
+
+
+def share_template_backgrounds(writer):
+    """
+    DotLegalPad テンプレートの背景 (TEMPLATE_MARKER_KEY を持つ Form XObject) のうち、
+    内容が同じものを1つのオブジェクトにまとめる。
+
+    ノートごとに別のPDFから読み込んだページは、同じ背景をそれぞれ別の
+    オブジェクトとして持つため、そのまま書き出すと統合PDFに背景がノートの数だけ重複する。
+
+    Args:
+        writer (PdfWriter): ページを追加済みの PdfWriter。
+
+    Returns:
+        int: 参照を置き換えた (重複していた) 背景の数。
+    """
+    shared = {}
+    visited = set()
+    replaced = 0
+
+    def visit(resources):
+        nonlocal replaced
+        xobjects = resources.get_object().get("/XObject") if resources else None
+        if not xobjects:
+            return
+        xobjects = xobjects.get_object()
+        for name in list(xobjects.keys()):
+            ref = xobjects.raw_get(name)
+            if not isinstance(ref, IndirectObject):
+                continue
+            xobject = ref.get_object()
+            marker = xobject.get(TEMPLATE_MARKER_KEY)
+            if marker is not None:
+                key = (
+                    str(marker), str(xobject.get("/BBox")),
+                    hashlib.sha1(xobject.get_data()).hexdigest()
+                )
+                first = shared.setdefault(key, ref)
+                if first.idnum != ref.idnum:
+                    xobjects[NameObject(name)] = first
+                    replaced += 1
+            elif ref.idnum not in visited and xobject.get("/Subtype") == "/Form":
+                # show_pdf_page で貼り付けた背景は、ラッパーの XObject の中にある
+                visited.add(ref.idnum)
+                visit(xobject.get("/Resources"))
+
+    for page in writer.pages:
+        visit(page.get("/Resources"))
+    if replaced:
+        # 参照されなくなった重複を書き出さないよう削除する
+        writer.compress_identical_objects(remove_identicals=False, remove_orphans=True)
+    return replaced
+
+
+def _compile_latex(latex_source, temp_dir, progress=None):
+    """
+    LaTeXソースを LuaLaTeX で LATEX_PASSES 回コンパイルし、設計図PDFのパスを返す。
+
+    Raises:
+        PdfBuildError: コンパイルに失敗した場合。
+    """
+    tex_filepath = Path(temp_dir) / "mokuji.tex"
+    with open(tex_filepath, "w", encoding="utf-8") as f:
+        f.write(latex_source)
+
+    for i in range(LATEX_PASSES):
+        if progress:
+            progress(f"PDF生成中... (1/3) ページ構成を計算中 (LuaLaTeX {i+1}/{LATEX_PASSES})")
+        try:
+            with perf_trace.span("ersteller.lualatex_pass", pass_no=i + 1):
+                process = subprocess.run(
+                    [
+                        "lualatex",
+                        "--shell-escape",
+                        "-interaction=nonstopmode",
+                        "mokuji.tex"
+                    ],
+                    cwd=temp_dir,
+                    capture_output=True, text=True, encoding='utf-8',
+                    errors='ignore'
+                )
+        except FileNotFoundError:
+            raise PdfBuildError("lualatex が見つかりません。TeX Live がインストールされているか確認してください。")
+        if "Output written on" not in process.stdout:
+            print(f"--- LaTeX Compilation Error (Pass {i+1}) ---")
+            print(process.stdout)
+            print(process.stderr)
+            raise PdfBuildError(
+                f"PDFのコンパイルに失敗しました。(Pass {i+1})\n詳細はターミナルを確認してください。"
+            )
+
+    draft_pdf_path = Path(temp_dir) / "mokuji.pdf"
+    if not draft_pdf_path.is_file():
+        raise PdfBuildError("LaTeXによる設計図PDFの生成に失敗しました。")
+    return draft_pdf_path
+
+
+def _find_note_content_start_page(draft_reader, first_note):
+    """
+    設計図PDFの目次（しおり）から、最初のノートの開始ページ (0始まり) を返す。
+
+    Raises:
+        PdfBuildError: 最初のノートのしおりが見つからない場合。
+    """
+    d = first_note['date']
+    date_formatted = f"{d[0:4]}/{d[4:6]}/{d[6:8]}" if d.isdigit() and len(d) == 8 else d
+    title_in_outline = first_note["title"].replace('_', ' ')
+
+    expected_outline_title = f"{date_formatted} – {title_in_outline}"
+
+    destination = _find_title_in_outline(draft_reader.outline, expected_outline_title)
+
+    # 本文の開始ページを取得
+    if destination:
+        return draft_reader.get_destination_page_number(destination)
+
+    print("--- PDF Outline Search Debug ---")
+    print(f"Searching for: '{expected_outline_title}'")
+    print("Available outline items:")
+    _print_outline(draft_reader.outline)
+    raise PdfBuildError(
+        f"設計図PDFの目次（しおり）から最初のノートの開始ページを見つけられませんでした。\n\n"
+        f"検索したタイトル:\n'{expected_outline_title}'\n\n"
+        "CSVやファイル名に特殊文字が含まれていないか確認してください。"
+    )
+
+
+def _find_index_start_page(draft_reader):
+    """
+    設計図PDFの末尾から索引の見出しを探し、索引の開始ページ (0始まり) を返す。
+
+    Raises:
+        PdfBuildError: 索引ページが見つからない場合。
+    """
+    # 「Index Key 索引」を検索し、見つからなければフォールバックとして「タグ索引」を探す
+    for heading in ("Index Key 索引", "タグ索引"):
+        for i in range(len(draft_reader.pages) - 1, -1, -1):
+            page_text = draft_reader.pages[i].extract_text()
+            if page_text and heading in page_text:
+                return i
+    raise PdfBuildError("設計図PDFから索引ページを特定できませんでした。")
+
+
+def assemble_merged_pages(draft_reader, notes_info, note_content_start_page, index_start_page,
+                          paper_width, paper_height, merged_pdf_filename):
+    """
+    設計図PDFの本文ページに各ノートのページを合成し、統合PDFのページを組み立てる。
+
+    Args:
+        draft_reader (PdfReader): LuaLaTeX で生成した設計図PDF。
+        notes_info (list[dict]): 統合するノート情報のリスト (日付順)。
+        note_content_start_page (int): 本文の開始ページ (0始まり)。
+        index_start_page (int): 索引の開始ページ (0始まり)。
+        paper_width (float): 用紙の幅 [pt]。
+        paper_height (float): 用紙の高さ [pt]。
+        merged_pdf_filename (str): 統合PDFのファイル名 (目次CSVに記録する)。
+
+    Returns:
+        tuple[PdfWriter, list[dict]]:
+            (組み立てたページを持つ PdfWriter, 'merged_start_page' と
+             'merged_pdf_filename' を追記したノート情報のリスト)
+    """
+    final_writer = PdfWriter()
+
+    for i in range(note_content_start_page):
+        final_writer.add_page(draft_reader.pages[i])
+
+    updated_notes_info = []
+    note_page_cursor = note_content_start_page
+    for note in notes_info:
+        note['merged_start_page'] = note_page_cursor + 1
+        note['merged_pdf_filename'] = merged_pdf_filename
+        updated_notes_info.append(note)
+
+        if not Path(note.get("filepath", "")).is_file():
+            continue
+
+        original_reader = PdfReader(note["filepath"])
+        for i in range(len(original_reader.pages)):
+            if note_page_cursor >= index_start_page:
+                print(f"ページ数計算エラー:note_page_cursor({note_page_cursor})"
+                      f"が上限({index_start_page})を超えました。")
+                continue
+
+            template_page = draft_reader.pages[note_page_cursor]
+            content_page = original_reader.pages[i]
+
+            original_width = float(content_page.mediabox.width)
+            original_height = float(content_page.mediabox.height)
+            if original_width == 0 or original_height == 0:
+                continue
+
+            scale_w = paper_width / original_width
+            scale_h = paper_height / original_height
+            scale = min(scale_w, scale_h)
+            tx = (paper_width - original_width * scale) / 2
+            ty = (paper_height - original_height * scale) / 2
+            transform = Transformation().scale(
+                sx=scale, sy=scale
+                ).translate(
+                    tx=tx, ty=ty
+                    )
+            template_page.merge_transformed_page(
+                content_page, transform
+                )
+
+            final_writer.add_page(template_page)
+            note_page_cursor += 1
+
+    for i in range(index_start_page, len(draft_reader.pages)):
+        final_writer.add_page(draft_reader.pages[i])
+
+    # ノートごとに重複しているテンプレートの背景を1つにまとめる
+    perf_trace.count("ersteller.shared_template_backgrounds",
+                     share_template_backgrounds(final_writer))
+
+    return final_writer, updated_notes_info
+
+
+# ==============================================================================
+# 統合PDFの生成
+# ==============================================================================
+def build_merged_pdf(notes_info, config_data, pdf_title, save_filepath, progress=None, on_warning=None):
+    """
+    ノート群を1つの統合PDFにまとめる。
+
+    LuaLaTeX で目次・索引付きの「設計図PDF」を生成し、
+    その本文ページに各ノートのページを合成する。
+    GUI (generate_pdf) と CLI (build) の両方から使用される。
+
+    Args:
+        notes_info (list[dict]): 統合するノート情報のリスト (日付順)。
+        config_data (dict): note_manager.load_config が返す設定値の辞書。
+        pdf_title (str): 統合PDFのタイトル。
+        save_filepath (str or Path): 統合PDFの保存先。
+        progress (callable, optional): 進捗メッセージ (str) を受け取る関数。
+        on_warning (callable, optional):
+            処理は続行できる警告メッセージ (str) を受け取る関数。
+
+    Returns:
+        list[dict]: 'merged_start_page' と 'merged_pdf_filename' を
+                    追記したノート情報のリスト。
+
+    Raises:
+        PdfBuildError: 統合PDFの生成に失敗した場合。
+    """
+    if not notes_info:
+        raise PdfBuildError("PDF生成対象のデータがありません。")
+
+    paper_width = config_data['paper_width']
+    paper_height = config_data['paper_height']
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        # LaTeX生成に必要な設定情報を辞書にまとめる
+        latex_config = {
+            'latex_font': config_data['latex_font'],
+            'latex_author': config_data['latex_author'],
+            'key_icons': config_data['key_icons'],
+            'key_colors': config_data['key_colors']
+        }
+        with perf_trace.span("ersteller.create_latex_source", notes=len(notes_info)):
+            latex_source = Generator.create_latex_source(
+                notes_info, latex_config, pdf_title, config_data['paper_size']
+            )
+        with perf_trace.span("ersteller.compile_latex"):
+            draft_pdf_path = _compile_latex(latex_source, temp_dir, progress)
+
+        if progress:
+            progress("PDF生成中... (2/3) ノートを結合中")
+
+        with perf_trace.span("ersteller.find_draft_pages"):
+            draft_reader = PdfReader(draft_pdf_path)
+
+            note_content_start_page = _find_note_content_start_page(
+                draft_reader, notes_info[0]
+                )
+            index_start_page = _find_index_start_page(draft_reader)
+
+        note_total_pages = sum(note['pages'] for note in notes_info if Path(note.get("filepath", "")).is_file())
+        if index_start_page - note_content_start_page != note_total_pages and on_warning:
+            on_warning(
+                f"計算されたページ数に矛盾があります。これは通常問題ありませんが、念のためご確認ください。\n\n"
+                f"本文の開始ページ: {note_content_start_page + 1}\n"
+                f"索引の開始ページ: {index_start_page + 1}\n"
+                f"確保されたページ数: {index_start_page - note_content_start_page}\n"
+                f"ノートの合計ページ数: {note_total_pages}\n\n"
+                "処理を続行します。"
+            )
+
+        with perf_trace.span("ersteller.assemble_merged_pages", notes=len(notes_info)):
+            final_writer, updated_notes_info = assemble_merged_pages(
+                draft_reader, notes_info,
+                note_content_start_page, index_start_page,
+                paper_width, paper_height, Path(save_filepath).name
+                )
+
+        if progress:
+            progress("PDF生成中... (3/3) 最終ファイル書き込み")
+
+        with perf_trace.span("ersteller.copy_bookmarks"):
+            if draft_reader.outline:
+                _copy_bookmarks_recursive(
+                    draft_reader.outline,
+                    final_writer,
+                    draft_reader
+                    )
+
+        with perf_trace.span("ersteller.write_merged_pdf"):
+            with open(save_filepath, "wb") as f:
+                final_writer.write(f)
+
+        return updated_notes_info
+
+    finally:
+        shutil.rmtree(temp_dir)
@@ -3,10 +3,13 @@ from pathlib import Path
 from pypdf import PdfReader
 import fitz  # PyMuPDF
 
+import perf_trace
+
 
 # ==============================================================================
 # PDF情報取得関数
 # ==============================================================================
+@perf_trace.timed("ersteller.get_note_info")
 def get_note_info(pdf_path: Path, key_rect: tuple):
     """
     単一のPDFファイルを解析し、ファイル名や内容から情報を抽出する。
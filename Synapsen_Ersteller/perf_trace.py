@@ -0,0 +1,421 @@
+import os
+import sys
+import json
+import time
+import importlib
+import atexit
+import logging
+import threading
+import functools
+import contextlib
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+# ======================================================================
+# --- 処理時間の計測 (Normalisierer / Ersteller / Nexus 共通) ---
+# 各ツールは単独の実行ファイルとして配布するため、同じ内容のファイルを
+# それぞれのフォルダに置いている。変更する場合は3つとも揃えること。
+#
+# config.ini の [Diagnostics] で有効にすると、span() で囲んだ処理の所要時間を
+# JSONL 形式のログ (ローテーションあり) に書き出す。
+# 無効の場合、span() / count() はほぼ何もしない。
+# ======================================================================
+
+DEFAULT_MAX_BYTES = 1024 * 1024  # ログ1ファイルあたりの上限 [バイト]
+DEFAULT_BACKUP_COUNT = 3         # 残す古いログの数
+RECENT_SPAN_COUNT = 50           # オーバーレイ表示用に保持する直近の計測数
+
+ENV_FLAG = "SYNAPSEN_PERF"  # "1" の場合、config.ini の設定に関わらず有効にする
+IMPORT_TIME_FLAG = "SYNAPSEN_IMPORT_TIME"  # "1" の場合、起動時にモジュールの読み込み時間を表示する
+
+# 起動時間の基準 (各ツールの main で最初に import されるため、ほぼプロセスの開始時刻)
+_started_at = time.perf_counter()
+
+_state = {
+    "enabled": False,
+    "app_name": "",
+    "profile": False,
+    "trace_memory": False,
+    "log_dir": None,
+}
+_logger = logging.getLogger("synapsen.perf")
+_logger.propagate = False
+_lock = threading.Lock()
+_counters = {}
+_recent = deque(maxlen=RECENT_SPAN_COUNT)
+_listeners = []
+_local = threading.local()
+_import_times = []  # (モジュール名, 所要時間 [ms], スレッド名)
+
+
+def load_diagnostics_config(parser, config_dir):
+    """
+    configparser から [Diagnostics] セクションを読み込み、configure() の引数の辞書を返す。
+
+    Args:
+        parser (configparser.ConfigParser): 読み込み済みの config.ini。
+        config_dir (str or Path): config.ini のあるフォルダ (相対パスの基準)。
+    """
+    log_dir = os.path.expandvars(parser.get('Diagnostics', 'log_dir', fallback='logs'))
+    if not os.path.isabs(log_dir):
+        log_dir = os.path.join(str(config_dir), log_dir)
+    return {
+        'enabled': parser.getboolean('Diagnostics', 'enabled', fallback=False),
+        'log_dir': log_dir,
+        'max_bytes': parser.getint('Diagnostics', 'max_bytes', fallback=DEFAULT_MAX_BYTES),
+        'backup_count': parser.getint('Diagnostics', 'backup_count', fallback=DEFAULT_BACKUP_COUNT),
+        'profile': parser.getboolean('Diagnostics', 'profile', fallback=False),
+        'trace_memory': parser.getboolean('Diagnostics', 'trace_memory', fallback=False),
+    }
+
+
+def configure(app_name, enabled=False, log_dir="logs", max_bytes=DEFAULT_MAX_BYTES,
+              backup_count=DEFAULT_BACKUP_COUNT, profile=False, trace_memory=False):
+    """
+    計測を設定する。アプリの起動時に1度だけ呼び出す。
+
+    Args:
+        app_name (str): ログファイル名 ("<app_name>_perf.jsonl") とレコードに使う名前。
+        enabled (bool): 計測を有効にするか (環境変数 SYNAPSEN_PERF=1 でも有効になる)。
+        log_dir (str): ログの保存先フォルダ。
+        max_bytes (int): ログ1ファイルあたりの上限 [バイト]。
+        backup_count (int): 残す古いログの数。
+        profile (bool): 最も外側の span ごとに cProfile の結果 (.prof) を保存するか。
+        trace_memory (bool): span ごとに tracemalloc でメモリの最大使用量を記録するか。
+    """
+    enabled = enabled or os.environ.get(ENV_FLAG) == "1"
+    _state.update({
+        "enabled": enabled,
+        "app_name": app_name,
+        "profile": profile,
+        "trace_memory": trace_memory,
+        "log_dir": log_dir,
+    })
+    for handler in list(_logger.handlers):
+        _logger.removeHandler(handler)
+        handler.close()
+    if not enabled:
+        return
+
+    try:
+        os.makedirs(log_dir, exist_ok=True)
+        handler = RotatingFileHandler(
+            os.path.join(log_dir, f"{app_name}_perf.jsonl"),
+            maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        _logger.addHandler(handler)
+        _logger.setLevel(logging.INFO)
+    except OSError as e:
+        # ログを書けなくても計測 (オーバーレイ表示) は続ける
+        print(f"警告: 計測ログを作成できませんでした: {e}", file=sys.stderr)
+
+    if trace_memory:
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+    print(f"[DEBUG] 処理時間の計測を有効にしました (ログ: {log_dir})", file=sys.stderr)
+
+
+def is_enabled():
+    return _state["enabled"]
+
+
+def _emit(record):
+    """計測結果をログとオーバーレイ用の履歴に記録する。"""
+    with _lock:
+        _recent.append(record)
+        listeners = list(_listeners)
+    if _logger.handlers:
+        _logger.info(json.dumps(record, ensure_ascii=False, default=str))
+    for listener in listeners:
+        try:
+            listener(record)
+        except Exception as e:
+            print(f"計測リスナーのエラー: {e}")
+
+
+@contextlib.contextmanager
+def span(name, **fields):
+    """
+    with ブロックの所要時間を計測する。
+
+    ブロック内で返される辞書に値を入れると、レコードに追加される。
+
+    Example:
+        with perf_trace.span("nexus.perform_search", query=query_text) as rec:
+            ...
+            rec["hits"] = len(result)
+    """
+    if not _state["enabled"]:
+        yield {}
+        return
+
+    extra = dict(fields)
+    depth = getattr(_local, "depth", 0)
+    _local.depth = depth + 1
+
+    profiler = None
+    if _state["profile"] and depth == 0:
+        import cProfile
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # 別スレッドでプロファイル中の場合は取得しない
+            profiler = None
+
+    memory_tracer = None
+    if _state["trace_memory"]:
+        import tracemalloc
+        if tracemalloc.is_tracing():
+            # 入れ子の span では、内側の span で最大値がリセットされる
+            tracemalloc.reset_peak()
+            memory_tracer = tracemalloc
+
+    error = None
+    start = time.perf_counter_ns()
+    try:
+        yield extra
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        elapsed_ms = (time.perf_counter_ns() - start) / 1_000_000
+        _local.depth = depth
+
+        record = {
+            "ts": time.time(),
+            "app": _state["app_name"],
+            "span": name,
+            "ms": round(elapsed_ms, 3),
+            "depth": depth,
+            "thread": threading.current_thread().name,
+            **extra,
+        }
+        if error:
+            record["error"] = error
+        if memory_tracer:
+            record["peak_kb"] = round(memory_tracer.get_traced_memory()[1] / 1024, 1)
+        if profiler:
+            profiler.disable()
+            record["profile"] = _dump_profile(profiler, name)
+        _emit(record)
+
+
+def _dump_profile(profiler, name):
+    """cProfile の結果をログフォルダに保存し、そのパスを返す。"""
+    try:
+        path = os.path.join(
+            _state["log_dir"], f"{name}_{time.strftime('%Y%m%d_%H%M%S')}.prof"
+        )
+        profiler.dump_stats(path)
+        return path
+    except OSError as e:
+        print(f"警告: プロファイルを保存できませんでした: {e}")
+        return None
+
+
+def timed(name=None):
+    """関数全体を span() で計測するデコレーター。name を省略すると関数名を使う。"""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state["enabled"]:
+                return func(*args, **kwargs)
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, n=1):
+    """カウンターを n 増やす (有効時のみ)。値は終了時に1レコードとしてログに書き出す。"""
+    if not _state["enabled"]:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def counters():
+    """現在のカウンターの値の辞書を返す。"""
+    with _lock:
+        return dict(_counters)
+
+
+def recent_spans():
+    """直近の計測結果 (新しい順) のリストを返す。"""
+    with _lock:
+        return list(reversed(_recent))
+
+
+def add_listener(callback):
+    """計測結果 (辞書) が記録されるたびに呼ばれる関数を登録する。"""
+    with _lock:
+        _listeners.append(callback)
+
+
+def remove_listener(callback):
+    with _lock:
+        if callback in _listeners:
+            _listeners.remove(callback)
+
+
+# ==============================================================================
+# 起動時間: 重いモジュールの遅延読み込み
+# ==============================================================================
+def import_module(name):
+    """
+    モジュールを読み込んで返す。初回の読み込み時間を記録する。
+
+    pandas / PyMuPDF / pypdf のように読み込みに時間のかかるモジュールを、
+    ウィンドウの表示後に初めて使う箇所で読み込むために使う。
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    start = time.perf_counter_ns()
+    module = importlib.import_module(name)
+    elapsed_ms = (time.perf_counter_ns() - start) / 1_000_000
+    thread_name = threading.current_thread().name
+    with _lock:
+        _import_times.append((name, elapsed_ms, thread_name))
+    if _state["enabled"]:
+        _emit({
+            "ts": time.time(),
+            "app": _state["app_name"],
+            "span": f"import.{name}",
+            "ms": round(elapsed_ms, 3),
+            "depth": 0,
+            "thread": thread_name,
+        })
+    return module
+
+
+def warm_imports(names):
+    """
+    names のモジュールをバックグラウンドのスレッドで順に読み込む。
+
+    ウィンドウの表示を待たせずに、初めて使うまでに読み込みを済ませておくために使う。
+    読み込み中のモジュールをメインスレッドで使う場合は、読み込みの完了を待つ。
+    """
+    def worker():
+        for name in names:
+            try:
+                import_module(name)
+            except Exception as e:
+                # 実際に使う箇所で改めてエラーになるため、ここでは表示のみ
+                print(f"警告: {name} の事前読み込みに失敗しました: {e}", file=sys.stderr)
+
+    thread = threading.Thread(target=worker, name="import-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def report_startup(window):
+    """
+    ウィンドウが表示できる状態になった時点で、起動時間を記録する。
+
+    環境変数 SYNAPSEN_IMPORT_TIME=1 の場合は、起動までの時間と
+    import_module で読み込んだモジュールごとの時間を標準エラー出力に表示する。
+    """
+    def on_ready():
+        ready_ms = (time.perf_counter() - _started_at) * 1000
+        if _state["enabled"]:
+            _emit({
+                "ts": time.time(),
+                "app": _state["app_name"],
+                "span": "startup.window_ready",
+                "ms": round(ready_ms, 3),
+                "depth": 0,
+                "thread": threading.current_thread().name,
+            })
+        if os.environ.get(IMPORT_TIME_FLAG) == "1":
+            # バックグラウンドの読み込みが終わってから表示する
+            window.after(2000, lambda: print_import_times(ready_ms))
+
+    window.after_idle(on_ready)
+
+
+def print_import_times(ready_ms=None):
+    """import_module で読み込んだモジュールの所要時間を、時間の長い順に表示する。"""
+    if ready_ms is not None:
+        print(f"[起動] ウィンドウ表示まで: {ready_ms:8.1f} ms", file=sys.stderr)
+    with _lock:
+        entries = sorted(_import_times, key=lambda e: e[1], reverse=True)
+    for name, ms, thread_name in entries:
+        print(f"[起動] import {name:<20} {ms:8.1f} ms ({thread_name})", file=sys.stderr)
+    print("[起動] 全モジュールの内訳は python -X importtime で確認できます。", file=sys.stderr)
+
+
+@atexit.register
+def _flush_counters():
+    if _state["enabled"] and _counters and _logger.handlers:
+        _logger.info(json.dumps({
+            "ts": time.time(),
+            "app": _state["app_name"],
+            "counters": counters(),
+        }, ensure_ascii=False))
+
+
+# ==============================================================================
+# GUI: 計測結果のオーバーレイ表示
+# ==============================================================================
+class TimingOverlay:
+    """
+    ウィンドウの右下に直近の計測結果を重ねて表示するラベル。
+
+    attach_overlay() で作成し、キー (既定: F12) で表示・非表示を切り替える。
+    計測が無効の場合は、有効にする方法を表示する。
+    """
+
+    MAX_LINES = 12
+
+    def __init__(self, window):
+        import customtkinter as ctk
+
+        self.window = window
+        self.visible = False
+        self.label = ctk.CTkLabel(
+            window, text="", justify="left", anchor="w",
+            font=("Consolas", 11), fg_color=("gray85", "gray20"), corner_radius=6
+        )
+        add_listener(self._on_record)
+
+    def toggle(self, event=None):
+        self.visible = not self.visible
+        if self.visible:
+            self.refresh()
+            self.label.place(relx=1.0, rely=1.0, x=-10, y=-10, anchor="se")
+            self.label.lift()
+        else:
+            self.label.place_forget()
+
+    def refresh(self):
+        if not is_enabled():
+            text = f"計測は無効です\nconfig.ini [Diagnostics] enabled = true\nまたは {ENV_FLAG}=1 で有効になります"
+        else:
+            lines = [
+                f"{'  ' * r.get('depth', 0)}{r['span']:<34} {r['ms']:9.1f} ms"
+                for r in recent_spans()[:self.MAX_LINES]
+            ]
+            text = "\n".join(lines) or "(計測結果はまだありません)"
+        self.label.configure(text=text)
+
+    def _on_record(self, record):
+        # 計測は別スレッドから記録されることもあるため、メインスレッドで更新する
+        if self.visible:
+            try:
+                self.window.after(0, self.refresh)
+            except RuntimeError:
+                pass
+
+
+def attach_overlay(window, key="<F12>"):
+    """ウィンドウに TimingOverlay を追加し、key で表示を切り替えられるようにする。"""
+    overlay = TimingOverlay(window)
+    window.bind(key, overlay.toggle)
+    return overlay
@@ -0,0 +1,126 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+
+from nexus_query import NexusQuery
+from note_table import strip_derived_columns
+import perf_trace
+
+
+# 終了コード
+EXIT_OK = 0
+EXIT_ERROR = 1
+
+
+def _write_result(df, args):
+    """検索結果を --format で指定された形式で標準出力に書き出す。"""
+    if args.columns:
+        df = df[[col for col in args.columns if col in df.columns]]
+    else:
+        # 読み込み時に追加した列 (date_int など) は出力しない
+        df = strip_derived_columns(df)
+    if args.format == "json":
+        sys.stdout.write(df.to_json(orient="records", force_ascii=False, indent=2))
+        sys.stdout.write("\n")
+    else:
+        df.to_csv(sys.stdout, index=False, lineterminator="\n")
+
+
+def _base_path():
+    if getattr(sys, 'frozen', False):
+        return Path(sys.executable).parent
+    return Path(__file__).parent
+
+
+def _load(args):
+    """--csv が指定されていればそのCSVを、なければ config.ini のマスターCSVを読み込む。"""
+    if args.csv:
+        return NexusQuery.from_csv(args.csv)
+    return NexusQuery.from_config(_base_path())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Synapsen Nexus (コマンドライン版): マスターCSVの検索"
+    )
+    parser.add_argument(
+        "--csv", help="検索する目次CSV (省略時は config.ini の default_csv_path)"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    query_parser = subparsers.add_parser(
+        "query", help="検索バーと同じ構文でノートを検索する"
+    )
+    query_parser.add_argument("query", help='検索クエリ (例: "tag:Program AND -ToDo")')
+    query_parser.add_argument(
+        "--ikey", action="append", metavar="INDEX_KEY",
+        help="IndexKey で絞り込む (複数指定可。GUIのフィルターと同じ)"
+    )
+    query_parser.add_argument(
+        "--rank", action="store_true",
+        help="関連度の高い順に並べる (省略時はCSVの行順。GUIの検索結果は関連度順)"
+    )
+    query_parser.add_argument(
+        "--limit", type=int, metavar="N", help="出力するノートの最大数"
+    )
+
+    backlinks_parser = subparsers.add_parser(
+        "backlinks", help="指定した key のノートを引用しているノートを表示する"
+    )
+    backlinks_parser.add_argument("key", help="引用先ノートの key")
+
+    tags_parser = subparsers.add_parser(
+        "tags", help="タグごとのノートの数を表示する (クエリを指定した場合は検索結果のノートのみ)"
+    )
+    tags_parser.add_argument("query", nargs="?", default="", help="検索クエリ (省略時は全ノート)")
+    tags_parser.add_argument(
+        "--ikey", action="append", metavar="INDEX_KEY", help="IndexKey で絞り込む (複数指定可)"
+    )
+
+    for sub in (query_parser, backlinks_parser, tags_parser):
+        sub.add_argument(
+            "--format", choices=["csv", "json"], default="csv", help="出力形式 (既定: csv)"
+        )
+        sub.add_argument(
+            "--columns", nargs="+", metavar="COLUMN", help="出力する列 (省略時はすべて)"
+        )
+        sub.add_argument(
+            "--time", action="store_true", help="読み込み・検索の所要時間を標準エラー出力に表示する"
+        )
+    args = parser.parse_args(argv)
+
+    # コマンドライン版では環境変数 SYNAPSEN_PERF=1 の場合のみ計測する
+    # (ログは GUI と同じく config.ini と同じフォルダの logs に保存する)
+    config_dir = _base_path() if getattr(sys, 'frozen', False) else _base_path().parent
+    perf_trace.configure("nexus_cli", log_dir=str(config_dir / "logs"))
+
+    try:
+        start = time.perf_counter()
+        nexus = _load(args)
+        loaded = time.perf_counter()
+
+        if args.command == "query":
+            result = nexus.query(args.query, args.ikey, rank=args.rank, limit=args.limit)
+        elif args.command == "tags":
+            result = nexus.tag_counts(args.query, args.ikey)
+        else:
+            result = nexus.backlinks(args.key)
+        finished = time.perf_counter()
+    except Exception as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+    _write_result(result, args)
+
+    if args.time:
+        print(
+            f"読み込み: {(loaded - start) * 1000:.1f} ms ({len(nexus.df)}件), "
+            f"検索: {(finished - loaded) * 1000:.1f} ms ({len(result)}件)",
+            file=sys.stderr
+        )
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
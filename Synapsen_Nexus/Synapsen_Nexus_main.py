@@ -1,17 +1,33 @@
+import perf_trace  # 起動時間の計測のため、最初にインポートする
 import customtkinter as ctk
+import tkinter as tk
 from tkinter import filedialog, messagebox
-import pandas as pd
 from pathlib import Path
 import re
 import sys
 
 # 分割したモジュールをインポート
+# (pandas を使う search_parser は、起動を速くするため使用時に読み込む)
 from utils import (
-    load_app_config, load_csv_data_file, open_pdf_viewer,
-    build_memo_display, build_references_display, find_backlinks_df
+    open_pdf_viewer, MemoView, ReferenceList, resolve_note_pages
 )
-from search_parser import parse_or_expression
-from preview_window import NotePreviewWindow
+from note_data import load_app_config, load_csv_data_file, find_backlinks_df
+from preview_window import NotePreviewWindow, PagePreviewFrame
+from pdf_locator import get_location_index
+from page_renderer import PageRenderer
+from thumbnail_cache import ThumbnailCache
+from facet_panel import FacetPanel, facet_query_term
+
+# ウィンドウを表示してから、デフォルトCSVの読み込みを始めるまでの待ち時間 [ms]
+STARTUP_DELAY_MS = 100
+# ウィンドウの表示後、バックグラウンドで読み込んでおくモジュール
+WARM_IMPORTS = ["pandas", "search_parser", "fitz"]
+# スクロールが止まってから、サムネイルの先読みを始めるまでの待ち時間 [ms]
+THUMBNAIL_SCROLL_DELAY_MS = 150
+# 表示範囲の前後で、サムネイルを先読みしておく行数
+THUMBNAIL_PREFETCH_MARGIN = 20
+# 検索結果を一度に表示する件数 (残りは「さらに表示」で追加する)
+RESULTS_PAGE_SIZE = 200
 
 
 class Synapsen_Nexus(ctk.CTk):
@@ -40,7 +56,23 @@ class Synapsen_Nexus(ctk.CTk):
         self.commonplace_keys_options = []  # IndexKeyの全オプション
         self.predefined_tags = []  # オートコンプリート用のタグリスト
         self.loaded_csv_path = None  # 現在開いているCSVのパス
+        self.cache_dir = None  # PDFの索引などの保存先
+        self.pdf_index = None  # pdf_root_folder 以下のPDFの索引
+        self.merged_pdf_index = None  # CSVのフォルダ以下の統合PDFの索引
+        self.page_renderer = PageRenderer()  # ページのプレビューの描画 (キャッシュ付き)
+        self.thumbnail_cache = None  # 検索結果のサムネイル (無効の場合は None)
+        self._searcher = None  # search_parser.IncrementalSearch (初回の検索時に作成)
+        self._result_items = {}  # DataFrameのインデックス -> (行のフレーム, キー, ノートのデータ)
+        self._result_order = []  # 表示中の行のインデックス (表示順)
+        self._results_source = None  # 表示中の行を作成した DataFrame
+        self._result_rows = []  # 検索結果の (キー, ノートのデータ) のリスト (表示順)
+        self._ranked = None  # ranking.RankedResults (関連度順の検索結果)
+        self._shown_count = RESULTS_PAGE_SIZE  # 検索結果を表示している件数
+        self._thumbnail_labels = {}  # キー -> サムネイルを表示するラベル
+        self._thumbnail_photos = {}  # キー -> 表示中の PhotoImage (参照を保持する)
+        self._thumbnail_job = None
         self.filter_checkboxes = {}  # IndexKeyフィルターのチェックボックス変数
+        self.filter_checkbox_widgets = {}  # IndexKeyフィルターのチェックボックス (件数を表示する)
         self.filter_panel_expanded = False  # フィルターパネルが開いているか
 
         # --- オートコンプリート関連 ---
@@ -48,8 +80,14 @@ class Synapsen_Nexus(ctk.CTk):
         self.current_suggestions = []
 
         self.create_widgets()
+        self.protocol("WM_DELETE_WINDOW", self.on_closing)
+        self.perf_overlay = perf_trace.attach_overlay(self)  # F12で処理時間を表示
         self.load_config()
 
+        # 重いモジュールは、ウィンドウの表示を待たせずにバックグラウンドで読み込む
+        perf_trace.warm_imports(WARM_IMPORTS)
+        perf_trace.report_startup(self)
+
     def get_icon_path(self):
         """
         実行環境(.exe or .py)に応じて、
@@ -86,6 +124,7 @@ class Synapsen_Nexus(ctk.CTk):
 
             # utilsから設定を辞書として読み込む
             config_data = load_app_config(base_path)
+            perf_trace.configure("nexus", **config_data['diagnostics'])
 
             # 読み込んだ設定をクラス属性にセット
             self.pdf_root_folder = config_data.get('pdf_root_folder', Path(''))
@@ -95,14 +134,27 @@ class Synapsen_Nexus(ctk.CTk):
                 'commonplace_keys_options', []
                 )
             self.predefined_tags = config_data.get('predefined_tags', [])
+            self.cache_dir = config_data.get('cache_dir')
+            if config_data.get('thumbnails'):
+                self.thumbnail_cache = ThumbnailCache(
+                    self.page_renderer, self.cache_dir, **config_data['thumbnails']
+                )
+
+            # PDFの場所の索引は、バックグラウンドで作成・更新する
+            if self.pdf_root_folder and Path(self.pdf_root_folder).is_dir():
+                self.pdf_index = get_location_index(self.pdf_root_folder, self.cache_dir)
 
             # フィルターチェックボックスをUIに反映
             self.populate_key_filters()
 
             # デフォルトCSVが設定されていれば自動で読み込む
+            # (ウィンドウを先に表示するため、少し待ってから読み込む)
             default_csv_path = config_data.get('default_csv_path')
             if default_csv_path and default_csv_path.is_file():
-                self.load_csv_from_path(default_csv_path)
+                self.results_list.configure(label_text="読み込み中...")
+                self.after(
+                    STARTUP_DELAY_MS, lambda: self.load_csv_from_path(default_csv_path)
+                )
                 # print(f"[DEBUG] CSV: {default_csv_path}")
             else:
                 if default_csv_path:
@@ -135,7 +187,7 @@ class Synapsen_Nexus(ctk.CTk):
 
         self.search_entry = ctk.CTkEntry(
             search_container,
-            placeholder_text="検索 (AND, OR, - , ( ) を使用可, プレフィックスを使用する事で検索対象を絞る(例: date:YYYYMM / date:YYYYMMDD))"
+            placeholder_text="検索 (AND, OR, - , ( ) を使用可, プレフィックスを使用する事で検索対象を絞る(例: tag:Program/* / date:YYYYMM / date:2024-01..2024-03 / date:last30d), 先頭に ~ であいまい検索 (例: ~Pyhton), \"フレーズ\", re:正規表現, memo~/正規表現/"
         )
         self.search_entry.pack(fill="x")
 
@@ -188,6 +240,18 @@ class Synapsen_Nexus(ctk.CTk):
             self.left_panel, label_text="ノート一覧"
             )
         self.results_list.grid(row=2, column=0, padx=0, pady=0, sticky="nsew")
+        # スクロールした際に、表示範囲のサムネイルを先読みする
+        self.results_list._parent_canvas.configure(
+            yscrollcommand=self._on_results_scroll
+            )
+        # 表示しきれなかった検索結果を追加するボタン (検索結果の末尾に配置する)
+        self.more_results_button = ctk.CTkButton(
+            self.results_list, text="さらに表示", command=self.show_more_results
+            )
+
+        # 検索結果の絞り込み候補 (タグ・月ごとの件数)
+        self.facet_panel = FacetPanel(self.left_panel, on_select=self.apply_facet)
+        self.facet_panel.grid(row=3, column=0, padx=0, pady=(5, 0), sticky="ew")
 
         # --- 右パネル (詳細表示) ---
         self.details_frame = ctk.CTkFrame(self)
@@ -197,6 +261,7 @@ class Synapsen_Nexus(ctk.CTk):
 
         self.details_frame.grid_rowconfigure(5, weight=2)  # <--- メモ欄 (重み2)
         self.details_frame.grid_rowconfigure(7, weight=1)  # <--- 引用元欄 (重み1)
+        self.details_frame.grid_rowconfigure(9, weight=3)  # <--- ページのプレビュー (重み3)
         self.details_frame.grid_columnconfigure(1, weight=1)
 
         ctk.CTkLabel(
@@ -235,9 +300,11 @@ class Synapsen_Nexus(ctk.CTk):
             self.details_frame, text="メモ:", anchor="w"
             ).grid(row=4, column=0, padx=10, pady=5, sticky="nw")
 
-        # メモ表示用 (utils.build_memo_display で中身が構築される)
-        self.memo_display_frame = ctk.CTkScrollableFrame(self.details_frame)
-        self.memo_display_frame.grid(
+        # メモ表示用 (ノートを切り替えても、同じテキスト欄を使い回す)
+        self.memo_view = MemoView(
+            self.details_frame, self.open_preview_window  # リンククリック時のコールバック
+            )
+        self.memo_view.grid(
             row=5, column=1, padx=10, pady=5, sticky="nsew"
             )
 
@@ -246,13 +313,26 @@ class Synapsen_Nexus(ctk.CTk):
             self.details_frame, text="引用元:", anchor="w"
             ).grid(row=6, column=0, padx=10, pady=5, sticky="nw")
 
-        self.references_display_frame = ctk.CTkScrollableFrame(
-            self.details_frame, label_text="このノートを引用しているノート"
+        self.reference_list = ReferenceList(
+            self.details_frame, self.open_preview_window,  # リンククリック時のコールバック
+            label_text="このノートを引用しているノート"
             )
-        self.references_display_frame.grid(
+        self.reference_list.grid(
             row=7, column=1, padx=10, pady=5, sticky="nsew"
             )
 
+        # ページのプレビュー欄
+        ctk.CTkLabel(
+            self.details_frame, text="ページ:", anchor="w"
+            ).grid(row=8, column=0, padx=10, pady=5, sticky="nw")
+
+        self.page_preview = PagePreviewFrame(
+            self.details_frame, self.page_renderer, page_width=450
+            )
+        self.page_preview.grid(
+            row=9, column=0, columnspan=2, padx=10, pady=5, sticky="nsew"
+            )
+
         # フィルターパネルの初期表示を同期
         self.sync_filter_panel_view()
 
@@ -434,6 +514,9 @@ class Synapsen_Nexus(ctk.CTk):
             # utilsの関数でDataFrameを読み込む
             self.df = load_csv_data_file(filepath)
             self.loaded_csv_path = filepath
+            self.merged_pdf_index = get_location_index(
+                Path(filepath).parent, self.cache_dir
+            )
 
             # UIをリセット・更新
             self.perform_search()
@@ -449,6 +532,7 @@ class Synapsen_Nexus(ctk.CTk):
         for widget in self.key_filter_frame.winfo_children():
             widget.destroy()
         self.filter_checkboxes.clear()
+        self.filter_checkbox_widgets.clear()
 
         for key in self.commonplace_keys_options:
             var = ctk.StringVar(value='0')
@@ -474,37 +558,100 @@ class Synapsen_Nexus(ctk.CTk):
             cb.pack(side="left", expand=True, fill="x")
 
             self.filter_checkboxes[key] = var
+            self.filter_checkbox_widgets[key] = cb
 
     def perform_search(self):
         """
         現在のフィルター状態と検索クエリに基づき、DataFrameをフィルタリングし、
-        結果リストを更新する。search_parser.parse_or_expression を使用する。
+        結果リストを更新する。search_parser.search_notes を使用する。
         """
         if self.df is None:
-            self.update_results_list(pd.DataFrame())
+            self.clear_results_list()
+            self.update_facets(None, None)
             return
 
-        filtered_df = self.df.copy()
+        if self._searcher is None:
+            from search_parser import IncrementalSearch
+            self._searcher = IncrementalSearch()
 
-        # 1. IndexKey フィルターを適用
         selected_keys = [key for key, var in self.filter_checkboxes.items() if var.get() == '1']
-        if selected_keys:
-            filtered_df = filtered_df[filtered_df['commonplace_key'].isin(selected_keys)]
+        query_text = self.search_entry.get()
+        perf_trace.count("nexus.perform_search")
 
-        # 2. 検索クエリを適用
-        query_text = self.search_entry.get().strip()
-        if query_text:
+        with perf_trace.span("nexus.perform_search", query=query_text) as rec:
             try:
-                # search_parserの関数を呼び出し
-                final_mask = parse_or_expression(filtered_df, query_text)
-                filtered_df = filtered_df[final_mask]
+                # 前回のクエリを絞り込んだ場合は、前回の結果だけを評価する
+                filtered_df = self._searcher.search(self.df, query_text, selected_keys)
+                matches = self._searcher.last_matches
+                rec["refined"] = self._searcher.last_was_refinement
             except Exception as e:
                 print(f"検索クエリの解析エラー: {e}")
                 # エラー時は空の結果を表示
-                filtered_df = filtered_df.iloc[0:0]
+                filtered_df = matches = self.df.iloc[0:0]
+            rec["hits"] = len(filtered_df)
+
+            # 関連度の高い順に、最初のページの分だけを表示する
+            from ranking import rank_results
+            self._ranked = rank_results(filtered_df, query_text)
+            self._shown_count = RESULTS_PAGE_SIZE
+            self.update_results_list(self._ranked.top(self._shown_count))
+            self.update_facets(matches, filtered_df)
+            self.update_collapsed_filter_view()
+
+    def show_more_results(self):
+        """「さらに表示」がクリックされた際に、次のページの検索結果を追加する。"""
+        if self._ranked is None:
+            return
+        self._shown_count += RESULTS_PAGE_SIZE
+        self.update_results_list(self._ranked.top(self._shown_count))
 
-        self.update_results_list(filtered_df)
-        self.update_collapsed_filter_view()
+    def update_facets(self, matches, filtered_df):
+        """
+        絞り込み候補の件数を更新する。
+
+        IndexKey ごとの件数は IndexKey フィルターを適用する前の結果 (matches) から、
+        タグ・月ごとの件数は表示中の結果 (filtered_df) から数える。
+        CSVが読み込まれていない場合 (filtered_df が None) は表示を空にする。
+        """
+        if filtered_df is None:
+            self.facet_panel.clear()
+            self._update_key_counts(None)
+            return
+
+        from note_table import count_facets
+        with perf_trace.span("nexus.update_facets", rows=len(filtered_df)):
+            if matches is filtered_df:
+                facets = count_facets(filtered_df)
+            else:
+                facets = count_facets(filtered_df, ('tags', 'month'))
+                facets.update(count_facets(matches, ('commonplace_key',)))
+            self.facet_panel.show_counts(facets)
+            self._update_key_counts(facets['commonplace_key'])
+
+    def _update_key_counts(self, key_counts):
+        """IndexKeyフィルターのチェックボックスに件数を表示する (None の場合は件数を消す)。"""
+        for key, checkbox in self.filter_checkbox_widgets.items():
+            text = key if key_counts is None else f"{key} ({key_counts.get(key, 0)})"
+            if checkbox.cget("text") != text:
+                checkbox.configure(text=text)
+
+    def apply_facet(self, field, value):
+        """絞り込み候補がクリックされた際に、その条件を検索クエリに AND で追加して検索する。"""
+        from search_parser import split_respecting_parens
+
+        term = facet_query_term(field, value)
+        query = self.search_entry.get().strip()
+        if not query:
+            new_query = term
+        elif len(split_respecting_parens(query, ' OR ')) > 1:
+            new_query = f"({query}) AND {term}"
+        else:
+            new_query = f"{query} AND {term}"
+
+        self.search_entry.delete(0, "end")
+        self.search_entry.insert(0, new_query)
+        self.hide_autocomplete()
+        self.perform_search()
 
     # --- UI更新・表示メソッド ---
 
@@ -512,43 +659,217 @@ class Synapsen_Nexus(ctk.CTk):
         """
         フィルタリングされたDataFrameに基づき、検索結果リストUIを更新する。
 
+        前回の表示との差分 (増えた行・減った行) だけを作成・削除し、
+        残った行のウィジェットはそのまま使う。
+
         Args:
             df_to_show (pd.DataFrame): リストに表示するデータ。
         """
-        for widget in self.results_list.winfo_children():
-            widget.destroy()
-
-        self.results_list.configure(label_text=f"検索結果 ({len(df_to_show)}件)")
-
-        for index, row in df_to_show.iterrows():
-            item_frame = ctk.CTkFrame(
-                self.results_list, fg_color="transparent"
-                )
-            item_frame.pack(fill="x", padx=5, pady=2)
+        from note_table import with_text_columns
+        with perf_trace.span("nexus.update_results_list", rows=len(df_to_show)) as rec:
+            # 表示する行の分だけ、索引からタイトル・メモを取り出す
+            df_to_show = with_text_columns(df_to_show)
+            rec["added"], rec["removed"] = self._apply_results_diff(df_to_show)
+
+    def clear_results_list(self):
+        """検索結果リストを空にする (CSVの読み込み前に使用)。"""
+        for item_frame, _, _ in self._result_items.values():
+            item_frame.destroy()
+        self.more_results_button.pack_forget()
+        self._result_items = {}
+        self._result_order = []
+        self._results_source = None
+        self._ranked = None
+        self._reset_thumbnails()
+        self.results_list.configure(label_text="検索結果 (0件)")
+
+    def _apply_results_diff(self, df_to_show):
+        """検索結果リストを df_to_show の内容にする。(追加した行数, 削除した行数) を返す。"""
+        if self._results_source is not self.df:
+            # CSVが読み込み直された場合は、すべての行を作り直す
+            ranked = self._ranked
+            self.clear_results_list()
+            self._ranked = ranked
+            self._results_source = self.df
+
+        new_order = list(df_to_show.index)
+        new_set = set(new_order)
+
+        # 1. 検索結果から外れた行を削除する
+        removed = [index for index in self._result_order if index not in new_set]
+        for index in removed:
+            item_frame, row_key, _ = self._result_items.pop(index)
+            item_frame.destroy()
+            self._thumbnail_labels.pop(row_key, None)
+            self._thumbnail_photos.pop(row_key, None)
+
+        # 2. 残った行の並び順が変わった場合は、並べ直す
+        kept = [index for index in self._result_order if index in new_set]
+        if kept != [index for index in new_order if index in self._result_items]:
+            for index in kept:
+                self._result_items[index][0].pack_forget()
+            kept = []
+
+        # 3. 新しい行を作成し、前の行の直後に配置する
+        added = 0
+        previous_frame = None
+        first_kept_frame = self._result_items[kept[0]][0] if kept else None
+        for index in new_order:
+            item = self._result_items.get(index)
+            if item is None or not item[0].winfo_manager():
+                if item is None:
+                    item = self._create_result_row(index, df_to_show.loc[index])
+                    self._result_items[index] = item
+                    added += 1
+                if previous_frame is not None:
+                    item[0].pack(fill="x", padx=5, pady=2, after=previous_frame)
+                elif first_kept_frame is not None:
+                    item[0].pack(fill="x", padx=5, pady=2, before=first_kept_frame)
+                else:
+                    item[0].pack(fill="x", padx=5, pady=2)
+            previous_frame = item[0]
+
+        self._result_order = new_order
+        self._result_rows = [self._result_items[index][1:] for index in new_order]
+
+        # 表示しきれなかった検索結果がある場合は、末尾に「さらに表示」を配置する
+        total = len(self._ranked) if self._ranked is not None else len(new_order)
+        self.more_results_button.pack_forget()
+        if len(new_order) < total:
+            self.more_results_button.pack(pady=5)
+            label_text = f"検索結果 ({total}件中 {len(new_order)}件を表示)"
+        else:
+            label_text = f"検索結果 ({total}件)"
+        self.results_list.configure(label_text=label_text)
+        self._schedule_thumbnail_prefetch()
+        return added, len(removed)
+
+    def _create_result_row(self, index, row):
+        """検索結果の1行を作成して (行のフレーム, キー, ノートのデータ) を返す (配置はしない)。"""
+        item_frame = ctk.CTkFrame(
+            self.results_list, fg_color="transparent"
+            )
 
-            cp_key = str(row.get("commonplace_key", "")).lower()
-            icon = self.key_icons.get(cp_key, '•')
-            color = self.key_colors.get(cp_key, 'gray')
+        cp_key = str(row.get("commonplace_key", "")).lower()
+        icon = self.key_icons.get(cp_key, '•')
+        color = self.key_colors.get(cp_key, 'gray')
+
+        icon_label = ctk.CTkLabel(item_frame, text=icon, text_color=color, font=("", 16), width=20)
+        icon_label.pack(side="left")
+
+        row_key = str(row.get('key', ''))
+        if self.thumbnail_cache:
+            thumb_label = self._create_thumbnail_label(item_frame, row_key)
+            thumb_label.bind("<Button-1>", lambda e, idx=index: self.show_details(idx))
+            thumb_label.bind("<Double-Button-1>", lambda e, r=row: self.open_pdf(r))
+
+        display_text = f"[{row.get('date')}] {row.get('title', 'N/A')}"
+        text_label = ctk.CTkLabel(item_frame, text=display_text, anchor="w")
+        text_label.pack(side="left", fill="x", expand=True)
+
+        # --- イベントバインド ---
+        # シングルクリックで詳細表示
+        command = lambda e, idx=index: self.show_details(idx)
+        item_frame.bind("<Button-1>", command)
+        icon_label.bind("<Button-1>", command)
+        text_label.bind("<Button-1>", command)
+
+        # ダブルクリックでPDFを開く
+        pdf_command = lambda e, r=row: self.open_pdf(r)
+        item_frame.bind("<Double-Button-1>", pdf_command)
+        icon_label.bind("<Double-Button-1>", pdf_command)
+        text_label.bind("<Double-Button-1>", pdf_command)
+        return item_frame, row_key, row
+
+    # --- サムネイル関連メソッド ---
+
+    def _create_thumbnail_label(self, item_frame, row_key):
+        """検索結果の行にサムネイルのラベルを追加する (メモリにあればすぐに表示する)。"""
+        width = self.thumbnail_cache.width
+        # 画像を表示するまでは、A4 縦の大きさの空白を確保する
+        placeholder = tk.Frame(
+            item_frame, width=width, height=round(width * 297 / 210),
+            bg=self.results_list._parent_canvas.cget("bg")
+            )
+        placeholder.pack(side="left", padx=(0, 5))
+        placeholder.pack_propagate(False)
+        label = tk.Label(placeholder, borderwidth=0, highlightthickness=0, bg=placeholder.cget("bg"))
+        label.pack(fill="both", expand=True)
+        self._thumbnail_labels[row_key] = label
+
+        png = self.thumbnail_cache.peek(row_key)
+        if png:
+            self._show_thumbnail(row_key, png)
+        return label
+
+    def _reset_thumbnails(self):
+        """検索結果の行と一緒に、サムネイルの表示と先読みの予約を破棄する。"""
+        self._result_rows = []
+        self._thumbnail_labels = {}
+        self._thumbnail_photos = {}
+        if self._thumbnail_job:
+            self.after_cancel(self._thumbnail_job)
+            self._thumbnail_job = None
+
+    def _on_results_scroll(self, first, last):
+        """検索結果のスクロールバーを更新し、サムネイルの先読みを予約する。"""
+        self.results_list._scrollbar.set(first, last)
+        self._schedule_thumbnail_prefetch()
+
+    def _schedule_thumbnail_prefetch(self):
+        if not self.thumbnail_cache or not self._result_rows:
+            return
+        if self._thumbnail_job:
+            self.after_cancel(self._thumbnail_job)
+        self._thumbnail_job = self.after(
+            THUMBNAIL_SCROLL_DELAY_MS, self._prefetch_visible_thumbnails
+            )
 
-            icon_label = ctk.CTkLabel(item_frame, text=icon, text_color=color, font=("", 16), width=20)
-            icon_label.pack(side="left")
+    def _prefetch_visible_thumbnails(self):
+        """表示範囲 (と前後 THUMBNAIL_PREFETCH_MARGIN 行) のサムネイルを先読みする。"""
+        self._thumbnail_job = None
+        total = len(self._result_rows)
+        top, bottom = self.results_list._parent_canvas.yview()
+        first_visible = int(top * total)
+        last_visible = min(total, int(bottom * total) + 1)
+
+        # 表示範囲 → 下 → 上 の順に読み込む
+        order = list(range(first_visible, last_visible))
+        order += range(last_visible, min(total, last_visible + THUMBNAIL_PREFETCH_MARGIN))
+        order += range(first_visible - 1, max(-1, first_visible - 1 - THUMBNAIL_PREFETCH_MARGIN), -1)
+        items = [
+            self._result_rows[i] for i in order
+            if self._result_rows[i][0] not in self._thumbnail_photos
+        ]
+        if items:
+            self.thumbnail_cache.prefetch(items, self._resolve_note_location, self._on_thumbnail_ready)
+
+    def _resolve_note_location(self, row_data):
+        """
+        ノートのページがあるPDFを返す (サムネイルのスレッドから呼ばれる)。
 
-            display_text = f"[{row.get('date')}] {row.get('title', 'N/A')}"
-            text_label = ctk.CTkLabel(item_frame, text=display_text, anchor="w")
-            text_label.pack(side="left", fill="x", expand=True)
+        検索結果の行ごとに呼ばれるため、PDFが索引に無くても索引の更新は開始しない。
+        """
+        return resolve_note_pages(
+            row_data,
+            self.loaded_csv_path,
+            self.pdf_root_folder,
+            pdf_index=self.pdf_index,
+            merged_pdf_index=self.merged_pdf_index,
+            refresh=False
+        )
 
-            # --- イベントバインド ---
-            # シングルクリックで詳細表示
-            command = lambda e, idx=index: self.show_details(idx)
-            item_frame.bind("<Button-1>", command)
-            icon_label.bind("<Button-1>", command)
-            text_label.bind("<Button-1>", command)
+    def _on_thumbnail_ready(self, row_key, png):
+        """サムネイルのスレッドから呼ばれ、メインスレッドで表示する。"""
+        self.after(0, lambda: self._show_thumbnail(row_key, png))
 
-            # ダブルクリックでPDFを開く
-            pdf_command = lambda e, r=row: self.open_pdf(r)
-            item_frame.bind("<Double-Button-1>", pdf_command)
-            icon_label.bind("<Double-Button-1>", pdf_command)
-            text_label.bind("<Double-Button-1>", pdf_command)
+    def _show_thumbnail(self, row_key, png):
+        label = self._thumbnail_labels.get(row_key)
+        if label is None or not label.winfo_exists():
+            return  # 検索結果が更新された
+        photo = tk.PhotoImage(data=png)
+        label.configure(image=photo)
+        self._thumbnail_photos[row_key] = photo
 
     def clear_details(self):
         """詳細表示ペインの内容をすべてクリアする。"""
@@ -557,16 +878,9 @@ class Synapsen_Nexus(ctk.CTk):
         self.cpkey_label.configure(text="")
         self.tags_label.configure(text="")
 
-        # memo_display_frame内のすべてのウィジェット（ラベル）を削除
-        for widget in self.memo_display_frame.winfo_children():
-            widget.destroy()
-
-        # references_display_frame内もクリア
-        for widget in self.references_display_frame.winfo_children():
-            widget.destroy()
-        self.references_display_frame.configure(
-            label_text="このノートを引用しているノート"
-            )
+        self.memo_view.clear()
+        self.reference_list.clear()
+        self.page_preview.clear()
 
     def open_preview_window(self, key):
         """
@@ -585,7 +899,8 @@ class Synapsen_Nexus(ctk.CTk):
             messagebox.showwarning("ノート不明", f"ID '{key}' に一致するノートが見つかりませんでした。")
             return
 
-        note_data = target_note_row.iloc[0]
+        from note_table import get_note
+        note_data = get_note(self.df, target_note_row.index[0])
 
         # プレビューウィンドウのインスタンスを作成
         preview_win = NotePreviewWindow(self, note_data)
@@ -594,7 +909,7 @@ class Synapsen_Nexus(ctk.CTk):
     def show_details(self, index):
         """
         選択されたノートの詳細を右ペインに表示する。
-        utils.build_memo_display を使用してメモ欄を構築する。
+        メモ欄・引用元欄は utils.MemoView / utils.ReferenceList を使い回して表示する。
 
         Args:
             index (int): 表示するノートのDataFrameインデックス。
@@ -602,7 +917,13 @@ class Synapsen_Nexus(ctk.CTk):
         if self.df is None or index not in self.df.index:
             return
 
-        row = self.df.loc[index]
+        from note_table import get_note
+        perf_trace.count("nexus.show_details")
+        with perf_trace.span("nexus.show_details", key=str(self.df.at[index, 'key'])) as rec:
+            rec["backlinks"] = self._fill_details(get_note(self.df, index))
+
+    def _fill_details(self, row):
+        """show_details の本体。表示した引用元ノートの件数を返す。"""
         self.title_label.configure(text=row.get('title', ''))
         self.key_label.configure(text=row.get('key', ''))
         self.cpkey_label.configure(text=row.get('commonplace_key', ''))
@@ -610,17 +931,8 @@ class Synapsen_Nexus(ctk.CTk):
             text=str(row.get('tags', '')).replace(';', ', ')
             )
 
-        # utilsの関数でメモ欄を構築
-        memo_text = str(row.get('memo', ''))
-        frame_width = 450  # 詳細ペインのメモ欄の幅
-
-        build_memo_display(
-            self.memo_display_frame,
-            memo_text,
-            self.df,
-            self.open_preview_window,  # リンククリック時のコールバック
-            frame_width
-        )
+        # メモ欄の表示
+        self.memo_view.show_memo(str(row.get('memo', '')), self.df)
 
         # 引用元の検索と表示
         current_key = row.get('key', '')
@@ -628,15 +940,15 @@ class Synapsen_Nexus(ctk.CTk):
         # utilsの新関数を使って引用元DFを取得
         backlinks_df = find_backlinks_df(self.df, current_key)
 
-        # utilsの新関数を使って引用元UIを構築
-        build_references_display(
-            self.references_display_frame,
-            backlinks_df,
-            self.open_preview_window,  # リンククリック時のコールバック
-            self.key_icons,
-            self.key_colors
+        # 引用元欄の表示
+        self.reference_list.show_references(
+            backlinks_df, self.key_icons, self.key_colors
         )
 
+        # ノートのページをアプリ内で描画する
+        self.page_preview.show_note(row, self)
+        return len(backlinks_df)
+
     # --- PDF関連メソッド ---
 
     def jump_to_key(self, key):
@@ -667,8 +979,8 @@ class Synapsen_Nexus(ctk.CTk):
             messagebox.showwarning("ノート不明", f"ID '{key}' に一致するノートが見つかりませんでした。")
             return
 
-        note_data = target_note_row.iloc[0]
-        self.open_pdf(note_data)
+        from note_table import get_note
+        self.open_pdf(get_note(self.df, target_note_row.index[0]))
 
     def open_pdf(self, row_data):
         """
@@ -682,10 +994,20 @@ class Synapsen_Nexus(ctk.CTk):
         open_pdf_viewer(
             row_data,
             self.loaded_csv_path,
-            self.pdf_root_folder
+            self.pdf_root_folder,
+            pdf_index=self.pdf_index,
+            merged_pdf_index=self.merged_pdf_index
         )
 
 
+    def on_closing(self):
+        """ウィンドウを閉じる前に、サムネイルの先読みを止め、開いているPDFを閉じる。"""
+        if self.thumbnail_cache:
+            self.thumbnail_cache.shutdown()
+        self.page_renderer.close()
+        self.destroy()
+
+
 if __name__ == "__main__":
     app = Synapsen_Nexus()
     if app.icon_path:  # <-- クラス内で取得したパスを利用
@@ -0,0 +1,106 @@
+import customtkinter as ctk
+
+# ======================================================================
+# --- 絞り込み候補 (ファセット) ---
+# 検索結果のノートを、最上位のタグ・月ごとに数えて表示する。
+# 候補をクリックすると、その条件を検索クエリに AND で追加して絞り込む。
+# ======================================================================
+
+# 表示する候補の数の上限 (絞り込み候補ごと)
+MAX_FACET_ITEMS = 50
+
+# (絞り込み候補, 見出し)。IndexKey の件数は IndexKey フィルターのチェックボックスに表示する
+FACET_SECTIONS = [
+    ("tags", "タグ"),
+    ("month", "月"),
+]
+
+
+def format_facet_value(field, value):
+    """絞り込み候補の値を表示用の文字列にする (月は YYYYMM -> YYYY-MM)。"""
+    if field == "month":
+        return f"{value // 100}-{value % 100:02d}"
+    return str(value)
+
+
+def facet_query_term(field, value):
+    """
+    絞り込み候補に対応する検索語を返す。
+
+    (例: ('tags', 'Program') -> 'tag:Program/*', ('month', 202410) -> 'date:2024-10')
+    """
+    if field == "month":
+        return f"date:{format_facet_value(field, value)}"
+    return f"tag:{value}/*"
+
+
+class FacetPanel(ctk.CTkFrame):
+    """
+    絞り込み候補と件数を、横にスクロールできるボタンの列で表示する。
+
+    ボタンは使い回し、前回と同じ内容の候補は更新しない。
+    """
+    def __init__(self, master, on_select, **kwargs):
+        """
+        Args:
+            master: 親ウィジェット。
+            on_select (callable): 候補がクリックされた際に、(絞り込み候補, 値) を渡して呼び出す関数。
+        """
+        super().__init__(master, **kwargs)
+        self.on_select = on_select
+        self.grid_columnconfigure(1, weight=1)
+
+        self._rows = {}     # 絞り込み候補 -> 候補のボタンを並べるフレーム
+        self._buttons = {}  # 絞り込み候補 -> [ボタン]
+        self._items = {}    # 絞り込み候補 -> 表示中の [(値, 件数)]
+        for row, (field, title) in enumerate(FACET_SECTIONS):
+            ctk.CTkLabel(self, text=title, width=40).grid(
+                row=row, column=0, padx=(5, 0), pady=2, sticky="w"
+            )
+            frame = ctk.CTkScrollableFrame(
+                self, orientation="horizontal", height=30, fg_color="transparent"
+            )
+            frame.grid(row=row, column=1, padx=5, pady=2, sticky="ew")
+            self._rows[field] = frame
+            self._buttons[field] = []
+            self._items[field] = []
+
+    def show_counts(self, facets):
+        """
+        絞り込み候補の件数を表示する。
+
+        Args:
+            facets (dict[str, dict]): note_table.count_facets の結果。
+        """
+        for field, _ in FACET_SECTIONS:
+            items = list(facets.get(field, {}).items())[:MAX_FACET_ITEMS]
+            if items == self._items[field]:
+                continue
+            buttons = self._buttons[field]
+            for position, (value, count) in enumerate(items):
+                if position == len(buttons):
+                    buttons.append(self._create_button(field, position))
+                button = buttons[position]
+                button.configure(text=f"{format_facet_value(field, value)} ({count})")
+                if position >= len(self._items[field]):
+                    button.pack(side="left", padx=2)
+            for button in buttons[len(items):len(self._items[field])]:
+                button.pack_forget()
+            self._items[field] = items
+
+    def clear(self):
+        """表示を空にする。"""
+        self.show_counts({})
+
+    def _create_button(self, field, position):
+        return ctk.CTkButton(
+            self._rows[field], text="", width=0, height=24,
+            fg_color="transparent", border_width=1,
+            text_color=ctk.ThemeManager.theme["CTkLabel"]["text_color"],
+            command=lambda: self._on_click(field, position)
+        )
+
+    def _on_click(self, field, position):
+        items = self._items[field]
+        if position < len(items):
+            self.on_select(field, items[position][0])
@@ -0,0 +1,167 @@
+import re
+import unicodedata
+
+import numpy as np
+
+# ======================================================================
+# --- あいまい検索 (~term) ---
+# タイトル・タグの表記ゆれや入力ミスを許して検索する。
+#
+# - 比較の前に文字を正規化する (全角・半角の統一 (NFKC)、大文字小文字、カタカナ -> ひらがな)。
+# - 検索語の長さに応じて、編集距離 (挿入・削除・置換・隣り合う文字の入れ替え) が
+#   max_distance 以下の部分文字列を含む値を一致とする。
+# - 値の種類ごとの 2-gram (隣り合う2文字) の索引 (NgramIndex) で候補を絞り込み、
+#   候補の値だけを編集距離で確かめる。
+# ======================================================================
+
+# (検索語の最小の長さ, 許す編集距離)。長い順に判定する
+FUZZY_DISTANCE_STEPS = [(8, 2), (5, 1)]
+
+# カタカナ -> ひらがな (ァ..ヶ -> ぁ..ゖ)
+_KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(ord('ァ'), ord('ヶ') + 1)}
+
+
+def normalize_text(text):
+    """
+    あいまい検索用に文字列を正規化する。
+
+    全角英数字・半角カナは NFKC で統一し、小文字にして、カタカナはひらがなにする。
+    (例: 'ＰＹＴＨＯＮ' -> 'python', 'ﾊﾟｲｿﾝ' -> 'ぱいそん')
+    """
+    return unicodedata.normalize('NFKC', text).casefold().translate(_KATAKANA_TO_HIRAGANA)
+
+
+def max_distance(pattern):
+    """正規化した検索語 pattern に対して許す編集距離を返す (短い検索語は 0)。"""
+    for min_length, distance in FUZZY_DISTANCE_STEPS:
+        if len(pattern) >= min_length:
+            return distance
+    return 0
+
+
+def within_distance(pattern, text, distance):
+    """
+    text が pattern との編集距離が distance 以下の部分文字列を含むかを返す。
+
+    隣り合う2文字の入れ替えも1回の編集と数える (制限付き Damerau-Levenshtein 距離)。
+    """
+    if pattern in text:
+        return True
+    m = len(pattern)
+    if m <= distance:
+        return True
+    if distance == 0:
+        return False
+    # previous[i]: pattern[:i] と、直前の文字で終わる text の部分文字列との最小の距離
+    before_previous, previous = None, list(range(m + 1))
+    last_char = None
+    for char in text:
+        current = [0] * (m + 1)  # 部分文字列はどこから始めてもよい
+        for i in range(1, m + 1):
+            pattern_char = pattern[i - 1]
+            value = min(previous[i] + 1, current[i - 1] + 1,
+                        previous[i - 1] + (pattern_char != char))
+            if i > 1 and pattern_char == last_char and pattern[i - 2] == char:
+                value = min(value, before_previous[i - 2] + 1)
+            current[i] = value
+        if current[m] <= distance:
+            return True
+        before_previous, previous, last_char = previous, current, char
+    return False
+
+
+def _bigram_codes(codes):
+    """文字コードの配列から、隣り合う2文字の組を1つの整数にした配列を返す。"""
+    codes = codes.astype(np.uint64)
+    return (codes[:-1] << np.uint64(21)) | codes[1:]
+
+
+class NgramIndex:
+    """
+    文字列のリストに対する、あいまい検索用の 2-gram の索引。
+
+    正規化した値を区切り文字 (\\x00) でつないだ文字列と、2-gram ごとの値の番号の一覧
+    (ポスティングリスト) を保持する。編集距離が k 以下で一致する部分文字列は、
+    検索語の 2-gram のうち少なくとも (検索語の長さ - 1 - 3k) 個を含むため、
+    その数に満たない値は編集距離を計算せずに除く。
+
+    Attributes:
+        values (list[str]): 正規化した値 (値の番号の順)。
+    """
+    SEPARATOR = '\x00'
+
+    def __init__(self, values):
+        self.values = [normalize_text(str(value)) for value in values]
+        lengths = np.fromiter((len(value) + 1 for value in self.values),
+                              dtype=np.int64, count=len(self.values))
+        self.offsets = np.zeros(len(self.values) + 1, dtype=np.int64)  # 各値の開始位置
+        np.cumsum(lengths, out=self.offsets[1:])
+        self.buffer = self.SEPARATOR.join(self.values) + self.SEPARATOR
+
+        # 2-gram ごとの値の番号の一覧 (同じ値の同じ 2-gram は1回だけ)
+        codes = np.frombuffer(self.buffer.encode('utf-32-le'), dtype=np.uint32)
+        positions = np.flatnonzero((codes[:-1] != 0) & (codes[1:] != 0))
+        grams = _bigram_codes(codes)[positions]
+        value_ids = (np.searchsorted(self.offsets, positions, side='right') - 1).astype(np.int32)
+        order = np.lexsort((value_ids, grams))
+        grams, value_ids = grams[order], value_ids[order]
+        if len(grams):
+            first = np.ones(len(grams), dtype=bool)
+            first[1:] = (grams[1:] != grams[:-1]) | (value_ids[1:] != value_ids[:-1])
+            grams, value_ids = grams[first], value_ids[first]
+        self.grams, starts = np.unique(grams, return_index=True)
+        self.gram_offsets = np.append(starts, len(grams)).astype(np.int64)
+        self.posting_ids = value_ids
+
+    def __len__(self):
+        return len(self.values)
+
+    def search(self, term):
+        """
+        term にあいまい一致する値の番号の配列を返す。
+
+        Args:
+            term (str): 検索語 (正規化していないもの)。
+
+        Returns:
+            np.ndarray: 一致した値の番号 (昇順)。
+        """
+        pattern = normalize_text(term)
+        if not pattern:
+            return np.zeros(0, dtype=np.int64)
+        distance = max_distance(pattern)
+        if distance == 0 or self.SEPARATOR in pattern:
+            return self._find_exact(pattern)
+
+        candidates = self._candidates(pattern, (len(pattern) - 1) - 3 * distance)
+        return np.array(
+            [value_id for value_id in candidates
+             if within_distance(pattern, self.values[value_id], distance)],
+            dtype=np.int64
+        )
+
+    def _find_exact(self, pattern):
+        """pattern をそのまま含む値の番号を返す。"""
+        starts = [match.start() for match in re.finditer(re.escape(pattern), self.buffer)]
+        if not starts:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.searchsorted(self.offsets, starts, side='right') - 1)
+
+    def _candidates(self, pattern, min_shared):
+        """検索語の 2-gram を min_shared 個以上含む値の番号を返す。"""
+        codes = np.frombuffer(pattern.encode('utf-32-le'), dtype=np.uint32)
+        query_grams, counts = np.unique(_bigram_codes(codes), return_counts=True)
+        positions = np.searchsorted(self.grams, query_grams)
+        found = (positions < len(self.grams))
+        found[found] = self.grams[positions[found]] == query_grams[found]
+
+        postings, weights = [], []
+        for position, count in zip(positions[found], counts[found]):
+            ids = self.posting_ids[self.gram_offsets[position]:self.gram_offsets[position + 1]]
+            postings.append(ids)
+            weights.append(np.full(len(ids), count, dtype=np.int64))
+        if not postings:
+            return np.zeros(0, dtype=np.int64)
+        shared = np.bincount(np.concatenate(postings), weights=np.concatenate(weights),
+                             minlength=len(self.values))
+        return np.flatnonzero(shared >= max(1, min_shared))
@@ -0,0 +1,103 @@
+from pathlib import Path
+
+from note_data import load_app_config, load_csv_data_file, find_backlinks_df
+from search_parser import search_notes
+from note_table import count_tags, with_text_columns
+from ranking import rank_results
+import perf_trace
+
+
+class NexusQuery:
+    """
+    GUIを使わずにマスターCSVを検索するためのライブラリAPI。
+
+    CSVは生成時に1度だけ読み込み、以降の query / backlinks は
+    読み込み済みのDataFrameに対して、GUIの検索バー・引用元欄と
+    同じ関数 (search_parser.search_notes, note_data.find_backlinks_df) で評価する。
+
+    Example:
+        >>> nexus = NexusQuery.from_csv("統合ノート.csv")
+        >>> nexus.query("tag:Program AND -ToDo")
+        >>> nexus.backlinks("20241025103000")
+        >>> nexus.tag_counts("date:2024")
+
+    Attributes:
+        df (pd.DataFrame): 読み込んだノートデータ。
+        csv_path (Path): 読み込んだCSVのパス。
+    """
+
+    def __init__(self, df, csv_path=None):
+        self.df = df
+        self.csv_path = Path(csv_path) if csv_path else None
+
+    @classmethod
+    def from_csv(cls, csv_path):
+        """
+        指定された目次CSVを読み込む。
+
+        Raises:
+            Exception: CSVファイルの読み込みに失敗した場合。
+        """
+        return cls(load_csv_data_file(csv_path), csv_path)
+
+    @classmethod
+    def from_config(cls, base_path):
+        """
+        config.ini の default_csv_path で指定されたマスターCSVを読み込む。
+
+        Args:
+            base_path (Path): アプリケーションの基準パス (load_app_config と同じ)。
+
+        Raises:
+            FileNotFoundError: config.ini またはマスターCSVが見つからない場合。
+        """
+        config_data = load_app_config(Path(base_path))
+        csv_path = config_data.get('default_csv_path')
+        if not csv_path or not csv_path.is_file():
+            raise FileNotFoundError(f"マスターCSVが見つかりません: {csv_path}")
+        return cls.from_csv(csv_path)
+
+    def query(self, query_text, selected_keys=None, rank=False, limit=None):
+        """
+        検索クエリに一致するノートのDataFrameを返す。
+
+        Args:
+            query_text (str): 検索クエリ (GUIの検索バーと同じ構文)。
+            selected_keys (list[str], optional): 絞り込む IndexKey のリスト。
+            rank (bool): True の場合は関連度の高い順 (GUIの検索結果と同じ順) に並べる。
+            limit (int, optional): 返すノートの最大数 (先頭から)。
+
+        Returns:
+            pd.DataFrame: 一致したノート (rank=False の場合はCSVの行順。メモ・タイトルの列を含む)。
+        """
+        with perf_trace.span("nexus.query", query=query_text) as rec:
+            result = search_notes(self.df, query_text, selected_keys)
+            rec["hits"] = len(result)
+            if rank:
+                ranked = rank_results(result, query_text)
+                result = ranked.top(len(ranked) if limit is None else limit)
+            elif limit is not None:
+                result = result.iloc[:max(0, limit)]
+            result = with_text_columns(result)
+        return result
+
+    def backlinks(self, key):
+        """
+        指定された key のノートを [[key]] で引用しているノートのDataFrameを返す。
+
+        Returns:
+            pd.DataFrame: 引用元ノート (日付の新しい順)。
+        """
+        return find_backlinks_df(self.df, key)
+
+    def tag_counts(self, query_text="", selected_keys=None):
+        """
+        検索クエリに一致するノート (クエリが空の場合は全ノート) の、タグごとのノートの数を返す。
+
+        Returns:
+            pd.DataFrame: tag, count の2列 (ノートの数が多い順)。
+        """
+        import pandas as pd
+
+        counts = count_tags(search_notes(self.df, query_text, selected_keys))
+        return pd.DataFrame({"tag": list(counts), "count": list(counts.values())})
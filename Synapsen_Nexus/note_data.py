@@ -0,0 +1,252 @@
+import os
+import sys
+import re
+import configparser
+from pathlib import Path
+
+import perf_trace
+
+# 検索結果のサムネイルのデフォルト値
+DEFAULT_THUMBNAIL_WIDTH = 48           # [px] サムネイルの幅
+DEFAULT_THUMBNAIL_MEMORY_CACHE = 500   # メモリに保持するサムネイルの数
+DEFAULT_THUMBNAIL_DISK_CACHE_MB = 100  # [MB] ディスクに保存するサムネイルの合計容量
+DEFAULT_THUMBNAIL_WORKERS = 2          # サムネイルを作成するスレッドの数
+
+
+def load_app_config(base_path):
+    """
+    config.ini ファイルを読み込み、設定値の辞書を返す。
+
+    Args:
+        base_path (Path): アプリケーションの基準パス (main.pyまたは実行ファイルの位置)。
+
+    Returns:
+        dict: 読み込まれた設定値の辞書。
+               (キー:
+                'pdf_root_folder',
+                'key_icons',
+                'key_colors',
+
+                'commonplace_keys_options',
+                'predefined_tags',
+                'default_csv_path',
+                'cache_dir',
+                'thumbnails',
+                'diagnostics')
+
+    Raises:
+        FileNotFoundError: config.ini が見つからない場合。
+        Exception: その他の設定読み込みエラー。
+    """
+    # .exe実行かスクリプト実行かで config.ini の場所を切り替える
+    if getattr(sys, 'frozen', False):
+        # .exe実行の場合（config.ini は .exe と同じフォルダ）
+        config_path = base_path / 'config.ini'
+    else:
+        # スクリプト実行の場合（config.ini は .py の1つ上のフォルダ）
+        config_path = base_path.parent / 'config.ini'
+
+    config_path = config_path.resolve()  # 絶対パスに正規化
+    print(f"[DEBUG] Loading config from: {config_path}")
+
+    if not config_path.is_file():
+        raise FileNotFoundError(f"config.iniが見つかりません: {config_path}")
+
+    try:
+        parser = configparser.ConfigParser(interpolation=None)
+        parser.read(config_path, encoding='utf-8')
+
+        config_data = {}
+
+        # [Paths]
+        pdf_root_path_str = parser.get('Paths', 'pdf_root_folder', fallback='')
+        if pdf_root_path_str:
+            # 環境変数を展開（%LOCALAPPDATA% など）
+            pdf_root_path = Path(os.path.expandvars(pdf_root_path_str))
+            if not pdf_root_path.is_absolute():
+                # config.iniからの相対パスは、config.ini自身からの相対とみなす
+                pdf_root_path = config_path.parent / pdf_root_path
+            config_data['pdf_root_folder'] = pdf_root_path.resolve()
+        else:
+            config_data['pdf_root_folder'] = None
+
+        # [KeyIcons]
+        if parser.has_section('KeyIcons'):
+            config_data['key_icons'] = {
+                k.lower(): v for k, v in parser.items('KeyIcons')
+            }
+        else:
+            config_data['key_icons'] = {}
+
+        # [KeyColors]
+        if parser.has_section('KeyColors'):
+            config_data['key_colors'] = {
+                k.lower(): v for k, v in parser.items('KeyColors')
+            }
+        else:
+            config_data['key_colors'] = {}
+
+        # [CommonplaceKeys]
+        if parser.has_section('CommonplaceKeys'):
+            keys_str = parser.get('CommonplaceKeys', 'options', fallback='')
+            config_data['commonplace_keys_options'] = [
+                key.strip() for key in keys_str.split(',') if key.strip()
+            ]
+        else:
+            config_data['commonplace_keys_options'] = []
+
+        # タグリストの読み込み ([Paths] 'tags_data_path')
+        config_data['predefined_tags'] = []
+        tags_path_from_config = parser.get(
+            'Paths', 'tags_data_path', fallback=''
+            )
+        if tags_path_from_config:
+            # 環境変数を展開
+            tags_data_path = Path(os.path.expandvars(tags_path_from_config))
+            if not tags_data_path.is_absolute():
+                # config.iniからの相対パスは、config.ini自身からの相対とみなす
+                tags_data_path = config_path.parent / tags_data_path
+
+            try:
+                if tags_data_path.is_file():
+                    with open(tags_data_path, "r", encoding="utf-8") as f:
+                        config_data['predefined_tags'] = \
+                            sorted([line.strip() for line in f if line.strip() and not line.startswith('#')])
+            except Exception as e:
+                print(f"tags.txtの読み込み中にエラー: {e}")
+
+        # デフォルトCSVパスの読み込み ([Paths] 'default_csv_path')
+        default_csv_path_str = parser.get(
+            'Paths', 'default_csv_path', fallback=''
+            )
+        if default_csv_path_str:
+            # 環境変数を展開
+            csv_path = Path(os.path.expandvars(default_csv_path_str))
+            if not csv_path.is_absolute():
+                # config.iniからの相対パスは、config.ini自身からの相対とみなす
+                csv_path = config_path.parent / csv_path
+            config_data['default_csv_path'] = csv_path.resolve()
+        else:
+            config_data['default_csv_path'] = None
+
+        # キャッシュの保存先 ([Paths] 'cache_folder')
+        cache_dir = Path(os.path.expandvars(
+            parser.get('Paths', 'cache_folder', fallback='cache') or 'cache'
+        ))
+        if not cache_dir.is_absolute():
+            # config.iniからの相対パスは、config.ini自身からの相対とみなす
+            cache_dir = config_path.parent / cache_dir
+        config_data['cache_dir'] = cache_dir.resolve()
+
+        # [Thumbnails] 検索結果のサムネイル (無効の場合は None)
+        if parser.getboolean('Thumbnails', 'enabled', fallback=True):
+            config_data['thumbnails'] = {
+                'width': parser.getint(
+                    'Thumbnails', 'width', fallback=DEFAULT_THUMBNAIL_WIDTH
+                ),
+                'memory_cache_size': parser.getint(
+                    'Thumbnails', 'memory_cache_size', fallback=DEFAULT_THUMBNAIL_MEMORY_CACHE
+                ),
+                'disk_cache_mb': parser.getint(
+                    'Thumbnails', 'disk_cache_mb', fallback=DEFAULT_THUMBNAIL_DISK_CACHE_MB
+                ),
+                'workers': max(1, parser.getint(
+                    'Thumbnails', 'workers', fallback=DEFAULT_THUMBNAIL_WORKERS
+                )),
+            }
+        else:
+            config_data['thumbnails'] = None
+
+        # [Diagnostics] 処理時間の計測
+        config_data['diagnostics'] = perf_trace.load_diagnostics_config(
+            parser, config_path.parent
+        )
+
+        return config_data
+
+    except Exception as e:
+        # エラーをラップして再度発生させ、呼び出し元 (main.py) で処理する
+        raise Exception(f"config.iniの読み込みに失敗しました: {e}")
+
+
+def load_csv_data_file(filepath):
+    """
+    指定されたパスから目次CSVファイルを読み込み、DataFrameを返す。
+    必須列は文字列型(str)に変換した上で、note_table.compact_note_table で
+    値の種類が少ない列をカテゴリ型・ページ番号を整数型にし、検索用の索引を作成する。
+    メモ・タイトルの列は索引に移すため、表示の際は note_table.with_text_columns /
+    note_table.get_note で取り出す。
+
+    Args:
+        filepath (str or Path): 読み込むCSVファイルのパス。
+
+    Returns:
+        pd.DataFrame: 読み込まれたデータ。
+
+    Raises:
+        Exception: CSVファイルの読み込みまたは処理に失敗した場合。
+    """
+    try:
+        # pandas は起動を速くするため、使用時に読み込む
+        import pandas as pd
+        from note_table import compact_note_table
+
+        with perf_trace.span("nexus.load_csv_data_file") as rec:
+            df = pd.read_csv(filepath, encoding='utf-8-sig').fillna('')
+            df.columns = df.columns.str.strip()
+
+            # 検索対象となる主要な列を文字列型(str)として明示的に変換
+            # これにより、数値キーなどが検索できなくなる問題を回避する
+            for col in ['tags', 'key', 'memo', 'title', 'commonplace_key', 'date']:
+                if col in df.columns:
+                    df[col] = df[col].astype(str)
+                else:
+                    # 必須列がない場合は空の列を追加
+                    df[col] = ''
+            df = compact_note_table(df)
+            rec["rows"] = len(df)
+
+        return df
+    except Exception as e:
+        # エラーをラップして呼び出し元 (main.py) で処理する
+        raise Exception(f"CSVファイルの読み込みに失敗しました:\n{filepath}\n\n{e}")
+
+
+def find_backlinks_df(df, current_key):
+    """
+    DataFrame全体を検索し、指定されたkeyにリンクしている
+    ノート（引用元）のDataFrameを返す。
+
+    Args:
+        df (pd.DataFrame): 検索対象のDataFrame。
+        current_key (str): 検索対象のノートのキー。
+
+    Returns:
+        pd.DataFrame: 引用元ノートを含むDataFrame (メモ・タイトルの列を含む)。
+    """
+    import pandas as pd
+    from note_table import get_note_index, has_column, text_column, with_text_columns
+
+    if df is None or not has_column(df, 'memo') or not current_key:
+        return pd.DataFrame()
+
+    # [[key]] または [[key:title...]] にマッチする正規表現
+    # ( \[\[ で [[ をエスケープ, r'[:\]]' で : または ] が続くものにマッチ )
+    pattern = r'\[\[' + re.escape(current_key) + r'[:\]]'
+
+    try:
+        index = get_note_index(df)
+        backlink_mask = index.matches(df, 'memo', pattern.upper()) if index else None
+        if backlink_mask is None:
+            backlink_mask = text_column(df, 'memo').str.contains(
+                pattern, case=False, na=False, regex=True
+            )
+        # 自分自身へのリンクは除外
+        if 'key' in df.columns:
+            self_mask = df['key'] == current_key
+            backlink_mask = backlink_mask & ~self_mask
+
+        return with_text_columns(df[backlink_mask]).sort_values(by='date', ascending=False)
+    except Exception as e:
+        print(f"Backlink search error: {e}")
+        return pd.DataFrame()
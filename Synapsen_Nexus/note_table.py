@@ -0,0 +1,742 @@
+import re
+import sys
+import bisect
+import fnmatch
+
+import numpy as np
+import pandas as pd
+
+from fuzzy_match import NgramIndex
+
+# ======================================================================
+# --- ノートデータの型付け・索引 ---
+# 目次CSVを読み込んだ DataFrame を、少ないメモリで速く検索できる形にする。
+#
+# - 値の種類が少ない列 (Index Key・日付・タグ・統合PDF名) はカテゴリ型にする。
+#   文字列の検索は値の種類ごとに1回で済み、isin は整数の比較になる。
+# - 日付は整数 (YYYYMMDD) と日付型の列も追加し、日付順に並べた索引で範囲を検索する。
+# - ページ番号は整数型 (空欄は <NA>) にする。
+# - タグはノートごとの「タグ番号」の配列と、タグごとのノートの一覧 (ポスティングリスト) に、
+#   メモとタイトルは1つの連続した文字列に並べた索引 (NoteIndex) を作成し、df.attrs に保持する。
+# - メモとタイトルは索引の連続した文字列だけに保持し、DataFrame の列からは除く
+#   (同じ文字列を2重に持たないため)。表示・出力には with_text_columns / get_note で
+#   必要な行の分だけ取り出す。
+# - タイトルとタグは、あいまい検索 (~term) 用の 2-gram の索引 (fuzzy_match.NgramIndex) も作成する。
+# - 検索結果の絞り込み候補 (IndexKey・最上位のタグ・月ごとの件数) も、この索引から求める。
+# - 検索語の評価順を決めるための、値・タグ・日付ごとの件数 (統計) も保持する。
+# ======================================================================
+
+# カテゴリ型にする列
+CATEGORY_COLUMNS = ['commonplace_key', 'date', 'tags', 'merged_pdf_filename']
+# 整数型 (Int32) にする列
+INTEGER_COLUMNS = ['merged_start_page', 'pages']
+# 連続した文字列の索引に移す列 (大文字小文字を区別しない部分一致検索に使う。DataFrame からは除く)
+TEXT_INDEX_COLUMNS = ['memo', 'title']
+# 値ごとの件数 (検索語の一致件数の見積もり用) を保持するカテゴリ型の列
+STATS_COLUMNS = ['commonplace_key', 'date']
+# あいまい検索 (~term) の索引を作成する列
+FUZZY_INDEX_COLUMNS = ['title', 'tags']
+# 読み込み時に追加する列 (CLIの出力などでは除く)
+DERIVED_COLUMNS = ['date_int', 'date_value']
+# 件数を数える絞り込み候補 (IndexKey・最上位のタグ・月 (YYYYMM))
+FACET_FIELDS = ('commonplace_key', 'tags', 'month')
+
+TAG_SEPARATOR = ';'
+# タグの階層の区切り文字 (Program_Python は Program の下の階層)
+TAG_HIERARCHY_SEPARATOR = '_'
+NOTE_INDEX_ATTR = 'note_index'
+
+# メモ・タイトルを大文字に変換して元の値と比べる際に、一度に処理する文字数 (一時的なメモリを抑えるため)
+TEXT_CASE_CHUNK = 1 << 16
+
+# 検索対象の行が全体のこの割合より少ない場合は、索引を使わずに直接検索する
+# (索引の検索は常に全体が対象になるため。メモ・タイトルは行の値を1つずつ検索する)
+INDEX_MIN_FRACTION = 1 / 8
+
+
+def compact_note_table(df):
+    """
+    読み込んだ DataFrame の列の型を変換し、索引 (NoteIndex) を作成する。
+
+    文字列の列は事前に astype(str) されていること (load_csv_data_file で行う)。
+    df のインデックスは 0 からの連番であること (索引の行番号として使う)。
+
+    Returns:
+        pd.DataFrame:
+            変換後の DataFrame (df.attrs['note_index'] に索引を保持)。
+            TEXT_INDEX_COLUMNS の列は索引に移し、DataFrame からは除く。
+    """
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype(str).astype('category')
+    for col in INTEGER_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('Int32')
+
+    # 日付の列を整数と日付型にする (変換は日付の種類ごとに1回だけ行う)
+    if 'date' in df.columns:
+        dates = df['date']
+        date_ints, date_values = parse_dates(dates.cat.categories)
+        codes = dates.cat.codes.to_numpy()
+        df['date_int'] = date_ints[codes]
+        df['date_value'] = date_values[codes]
+
+    index = NoteIndex(df)
+    df = df.drop(columns=list(index.texts))
+    df.attrs[NOTE_INDEX_ATTR] = index
+    return df
+
+
+def parse_dates(values):
+    """
+    日付の文字列 (YYYYMMDD または YYYY-MM-DD など) を整数 (YYYYMMDD) と日付型に変換する。
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (整数 (int32, 無効な日付は 0), 日付 (無効な日付は NaT))。
+    """
+    digits = pd.Series(values, dtype=str).str.replace(r'\D', '', regex=True).str[:8]
+    date_values = pd.to_datetime(digits.where(digits.str.len() == 8), format='%Y%m%d', errors='coerce')
+    date_ints = pd.to_numeric(digits.where(date_values.notna()), errors='coerce').fillna(0)
+    return date_ints.to_numpy(dtype='int32'), date_values.to_numpy()
+
+
+def get_note_index(df):
+    """df の検索に使える索引 (NoteIndex) を返す。索引が無い場合は None を返す。"""
+    return df.attrs.get(NOTE_INDEX_ATTR)
+
+
+def has_column(df, column):
+    """df に column 列があるか (索引に移したメモ・タイトルの列を含む) を返す。"""
+    if column in df.columns:
+        return True
+    index = get_note_index(df)
+    return index is not None and column in index.texts
+
+
+def text_column(df, column):
+    """
+    df の column 列を返す。索引に移した列は、df の行の分だけ索引から取り出す。
+
+    Returns:
+        pd.Series: 列の値。
+    """
+    if column in df.columns:
+        return df[column]
+    buffer = get_note_index(df).texts[column]
+    return pd.Series(buffer.values(df.index.to_numpy()), index=df.index, dtype=str)
+
+
+def with_text_columns(df):
+    """
+    索引に移した列 (メモ・タイトル) を索引から取り出して加えた DataFrame を返す。
+
+    検索結果の表示・出力用。取り出すのは df の行の分だけなので、
+    表示するページ・出力する結果などに絞ってから呼ぶ。列はCSVの順に並べる。
+    """
+    index = get_note_index(df)
+    if index is None:
+        return df
+    missing = [col for col in index.texts if col not in df.columns]
+    if not missing:
+        return df
+    df = df.assign(**{col: text_column(df, col) for col in missing})
+    order = [col for col in index.columns if col in df.columns]
+    return df[order + [col for col in df.columns if col not in index.columns]]
+
+
+def get_note(df, label):
+    """行ラベル label のノートを、メモ・タイトルを含めた pd.Series で返す。"""
+    return with_text_columns(df.loc[[label]]).iloc[0]
+
+
+def parse_tag_pattern(value):
+    """
+    tag: の値を、タグ名の比較方法と小文字のタグ名にする。
+
+    '/' は階層の区切り文字 '_' と同じ意味として扱う。
+      'Program'    -> ('exact', 'program')    Program のタグのみ
+      'Program/*'  -> ('subtree', 'program')  Program と、その下の階層 (Program_Python など)
+      '*py*'       -> ('glob', '*py*')        ワイルドカード (* と ?) に一致するタグ
+
+    Returns:
+        tuple[str, str]: (比較方法, 小文字のタグ名)。
+    """
+    name = value.strip().lower().replace('/', TAG_HIERARCHY_SEPARATOR)
+    if name.endswith(TAG_HIERARCHY_SEPARATOR + '*') and len(name) > 2:
+        return 'subtree', name[:-2]
+    if '*' in name or '?' in name:
+        return 'glob', name
+    return 'exact', name
+
+
+def tag_matches(kind, name, tag):
+    """タグ tag が parse_tag_pattern の結果 (kind, name) に一致するかを返す。"""
+    tag = tag.lower()
+    if kind == 'exact':
+        return tag == name
+    if kind == 'subtree':
+        return tag == name or tag.startswith(name + TAG_HIERARCHY_SEPARATOR)
+    return fnmatch.fnmatchcase(tag, name)
+
+
+def count_tags(df):
+    """
+    df のノートについて、タグごとのノートの数を返す (索引があれば索引から求める)。
+
+    Returns:
+        dict[str, int]: タグ名 -> ノートの数 (ノートの数が多い順)。
+    """
+    index = get_note_index(df)
+    if index is not None:
+        return index.tag_counts(df)
+    tags = df['tags'].astype(str).str.split(TAG_SEPARATOR).explode()
+    return {tag: int(count) for tag, count in tags[tags != ''].value_counts().items()}
+
+
+def count_facets(df, fields=FACET_FIELDS):
+    """
+    df のノートについて、絞り込み候補ごとのノートの数を返す (索引があれば索引から求める)。
+
+    Args:
+        df (pd.DataFrame): 検索結果など。
+        fields (tuple[str]): 数える絞り込み候補 (FACET_FIELDS の一部)。
+
+    Returns:
+        dict[str, dict]: 絞り込み候補 -> {値: ノートの数}。
+            'commonplace_key' と 'tags' (最上位のタグ) は件数の多い順、
+            'month' (YYYYMM の整数) は新しい順。0件の値は含まない。
+    """
+    index = get_note_index(df)
+    if index is not None:
+        return index.facet_counts(df, fields)
+
+    facets = {}
+    if 'commonplace_key' in fields:
+        counts = df['commonplace_key'].astype(str).value_counts()
+        facets['commonplace_key'] = {key: int(count) for key, count in counts.items() if count}
+    if 'tags' in fields:
+        top_tags = df['tags'].astype(str).map(lambda tags: {
+            tag.split(TAG_HIERARCHY_SEPARATOR, 1)[0]
+            for tag in tags.split(TAG_SEPARATOR) if tag
+        }).explode().dropna()
+        facets['tags'] = {tag: int(count) for tag, count in top_tags.value_counts().items()}
+    if 'month' in fields:
+        months = pd.Series(parse_dates(df['date'])[0] // 100)
+        counts = months[months > 0].value_counts().sort_index(ascending=False)
+        facets['month'] = {int(month): int(count) for month, count in counts.items()}
+    return facets
+
+
+def strip_derived_columns(df):
+    """読み込み時に追加した列 (DERIVED_COLUMNS) を除いた DataFrame を返す。"""
+    return df.drop(columns=DERIVED_COLUMNS, errors='ignore')
+
+
+def _ignores_case(regex):
+    """
+    正規表現 regex が、全体で大文字小文字を区別しない (re.IGNORECASE で、re.ASCII でない) かを返す。
+    (?-i:...) や (?a:...) など、一部だけフラグを変える書き方を含む場合は False を返す。
+    """
+    return (
+        bool(regex.flags & re.IGNORECASE) and not regex.flags & re.ASCII
+        and not re.search(r'\(\?[a-zA-Z]*[-a]', regex.pattern)
+    )
+
+
+class TextBuffer:
+    """
+    列の文字列 (大文字に変換したもの) を区切り文字を挟んで1つの文字列に並べたもの。
+    列の値はこれだけに保持する (DataFrame の列からは除く)。
+
+    部分一致する位置を1回の正規表現の検索で求め、位置から行番号を求める。
+    pandas の str.contains(case=False, regex=False) と同じ結果になる。
+    元の値は、小文字だった位置のビット列 (1文字1ビット) を使って大文字の文字列から復元する。
+    大文字にすると文字数が変わる文字や、小文字に戻すと元の文字にならない文字 (ß, ſ など) を含む値は、
+    元の値をそのまま保持する。
+    """
+    SEPARATOR = '\x00'
+
+    def __init__(self, values):
+        self.originals = {}  # 大文字から復元できない値 (行番号 -> 元の値)
+        lengths = np.fromiter((len(value) + 1 for value in values), dtype=np.int64, count=len(values))
+        bounds = np.searchsorted(np.cumsum(lengths), np.arange(TEXT_CASE_CHUNK, lengths.sum(), TEXT_CASE_CHUNK))
+        blocks, lower = [], []
+        lower_map = {}  # 大文字の文字コード -> 小文字の文字コード
+        # 行のまとまりごとに大文字に変換し、元の値と比べて小文字だった位置を記録する
+        for start, end in zip([0, *(bounds + 1).tolist()], [*(bounds + 1).tolist(), len(values)]):
+            if start >= end:
+                continue
+            block = self.SEPARATOR.join(values[start:end]) + self.SEPARATOR
+            upper = block.upper()
+            if len(upper) != len(block):
+                # 大文字にすると文字数が変わる値 (ß -> SS など) は、元の値を保持する
+                texts = [value.upper() for value in values[start:end]]
+                for row, (value, text) in enumerate(zip(values[start:end], texts), start):
+                    if len(value) != len(text):
+                        self.originals[row] = value
+                        lengths[row] = len(text) + 1
+                upper = self.SEPARATOR.join(texts) + self.SEPARATOR
+                block = self.SEPARATOR.join(
+                    text if row in self.originals else value
+                    for row, (value, text) in enumerate(zip(values[start:end], texts), start)
+                ) + self.SEPARATOR
+            original_codes = np.frombuffer(block.encode('utf-32-le'), dtype=np.uint32)
+            upper_codes = np.frombuffer(upper.encode('utf-32-le'), dtype=np.uint32)
+            changed = original_codes != upper_codes
+            positions = np.flatnonzero(changed)
+            pairs = upper_codes[positions].astype(np.int64) << 21 | original_codes[positions]
+            for pair in np.unique(pairs).tolist():
+                code, lowered = pair >> 21, pair & 0x1FFFFF
+                if chr(code).lower() == chr(lowered):
+                    lower_map[code] = lowered
+                else:
+                    # 小文字に戻すと元の文字にならない文字 (ſ -> S など) を含む値は、元の値を保持する
+                    rows = np.searchsorted(np.cumsum(lengths[start:end]), positions[pairs == pair], side='right')
+                    for row in np.unique(rows + start).tolist():
+                        self.originals[row] = values[row]
+            blocks.append(upper)
+            lower.append(changed)
+        self.buffer = ''.join(blocks)
+        del blocks
+        self.offsets = np.zeros(len(values) + 1, dtype=np.int64)  # 各行の開始位置
+        np.cumsum(lengths, out=self.offsets[1:])
+        lower = np.concatenate(lower) if lower else np.zeros(0, dtype=bool)
+        self._cased = np.logical_or.reduceat(lower, self.offsets[:-1]) if len(values) else lower  # 小文字を含む行
+        self._lower_bits = np.packbits(lower)  # 小文字だった位置 (1文字1ビット)
+        self._upper_codes = np.array(sorted(lower_map), dtype=np.uint32)
+        self._lower_codes = np.array([lower_map[code] for code in sorted(lower_map)], dtype=np.uint32)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def upper_values(self, rows):
+        """行番号の配列 rows の値 (大文字に変換したもの) のリストを返す。"""
+        rows = np.asarray(rows, dtype=np.int64)
+        starts = self.offsets[rows].tolist()
+        ends = (self.offsets[rows + 1] - 1).tolist()
+        buffer = self.buffer
+        return [buffer[start:end] for start, end in zip(starts, ends)]
+
+    def values(self, rows):
+        """行番号の配列 rows の元の値のリストを返す。"""
+        rows = np.asarray(rows, dtype=np.int64)
+        texts = self.upper_values(rows)
+        cased = np.flatnonzero(self._cased[rows])
+        if len(cased):
+            # 小文字を含む行をまとめて、小文字だった位置の文字を小文字に戻す
+            starts = self.offsets[rows[cased]]
+            lengths = self.offsets[rows[cased] + 1] - 1 - starts
+            ends = np.cumsum(lengths)
+            positions = np.arange(ends[-1], dtype=np.int64)
+            positions += np.repeat(starts - (ends - lengths), lengths)
+            lower = (self._lower_bits[positions >> 3] >> (7 - (positions & 7)) & 1).astype(bool)
+            codes = np.frombuffer(
+                ''.join(texts[i] for i in cased.tolist()).encode('utf-32-le'), dtype=np.uint32
+            ).copy()
+            codes[lower] = self._lower_codes[np.searchsorted(self._upper_codes, codes[lower])]
+            restored = codes.tobytes().decode('utf-32-le')
+            for i, start, end in zip(cased.tolist(), (ends - lengths).tolist(), ends.tolist()):
+                texts[i] = restored[start:end]
+        return self._with_originals(rows, texts)
+
+    def _with_originals(self, rows, texts):
+        """texts のうち、元の値をそのまま保持している行を元の値に置き換える。"""
+        if self.originals:
+            for i, row in enumerate(rows.tolist()):
+                if row in self.originals:
+                    texts[i] = self.originals[row]
+        return texts
+
+    def search(self, regex):
+        """
+        コンパイルした正規表現 regex に一致する行が True の配列 (全行分) を返す。
+
+        regex は大文字に変換した文字列に対して検索するため、
+        英字は大文字で書くこと (区切り文字 (\\x00) をまたいで一致しないこと)。
+        """
+        mask = np.zeros(len(self), dtype=bool)
+        starts = [match.start() for match in regex.finditer(self.buffer)]
+        if starts:
+            mask[np.searchsorted(self.offsets, starts, side='right') - 1] = True
+        return mask
+
+    def search_rows(self, regex, rows, upper=False):
+        """
+        rows の行の値を1つずつ regex で検索し、一致した行が True の配列 (rows の順) を返す。
+
+        upper が True の場合は大文字に変換した値を検索する。
+        それ以外は元の値を検索するが、大文字小文字を区別しない正規表現は、大文字に変換した値を
+        検索しても結果が同じため、元の値に戻さずに検索する (元の値を保持している行を除く)。
+        """
+        search = regex.search
+        rows = np.asarray(rows, dtype=np.int64)
+        if upper:
+            values = self.upper_values(rows)
+        elif _ignores_case(regex):
+            values = self._with_originals(rows, self.upper_values(rows))
+        else:
+            values = self.values(rows)
+        return np.fromiter((search(value) is not None for value in values), dtype=bool, count=len(values))
+
+
+class NoteIndex:
+    """
+    ノートデータの検索用の索引。行番号は読み込んだ DataFrame のインデックスと一致する。
+
+    Attributes:
+        size (int): 行数。
+        tag_names (list[str]): タグ番号 -> タグ名。
+        tag_ids (np.ndarray): 全ノートのタグ番号を行の順に並べた配列 (int32)。
+        tag_offsets (np.ndarray): 各行のタグが tag_ids の何番目から始まるか (長さ size + 1)。
+        tag_totals (np.ndarray): タグ番号 -> そのタグを持つノートの数。
+        tag_posting_rows (np.ndarray):
+            タグごとのノートの行番号 (ポスティングリスト) をタグ番号の順に並べた配列 (int32)。
+        tag_posting_offsets (np.ndarray):
+            各タグのポスティングリストが tag_posting_rows の何番目から始まるか。
+        top_tag_names (list[str]): 最上位のタグ番号 -> 最上位のタグ名 (Program_Python なら Program)。
+        key_names (list[str]): IndexKey のカテゴリ番号 -> IndexKey。
+        month_values (np.ndarray): 月の番号 -> 月 (YYYYMM の整数。0 は日付が無効)。
+        backlink_counts (np.ndarray): 各行のノートを [[key]] で引用しているノートの数。
+        sorted_dates (np.ndarray): 日付 (YYYYMMDD) を昇順に並べた配列。
+        date_order (np.ndarray or None):
+            sorted_dates の各要素の行番号。行が既に日付順の場合は None。
+        texts (dict[str, TextBuffer]):
+            列名 -> 連続した文字列 (TEXT_INDEX_COLUMNS の列の値は、ここだけに保持する)。
+        columns (list[str]): 索引の作成時の列名 (with_text_columns で列を並べる順)。
+        fuzzy (dict[str, NgramIndex]):
+            列名 -> あいまい検索の索引 (タイトルは値の種類ごと、タグはタグ番号の順)。
+        category_totals (dict[str, tuple[list[str], np.ndarray]]):
+            列名 -> (大文字にしたカテゴリの値, 値ごとの行数)。STATS_COLUMNS のカテゴリ型の列のみ。
+    """
+
+    def __init__(self, df):
+        self.size = len(df)
+        self.columns = list(df.columns)
+        self._build_tags(df['tags'])
+        self._build_dates(df)
+        self._build_facets(df)
+        self.texts = {
+            col: TextBuffer(df[col].tolist()) for col in TEXT_INDEX_COLUMNS if col in df.columns
+        }
+        self._build_backlinks(df)
+        self._build_fuzzy(df)
+        self.category_totals = {
+            col: ([str(value).upper() for value in df[col].cat.categories],
+                  np.bincount(df[col].cat.codes.to_numpy(), minlength=len(df[col].cat.categories)))
+            for col in STATS_COLUMNS
+            if col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype)
+        }
+
+    def __deepcopy__(self, memo):
+        # pandas は DataFrame の操作のたびに attrs をコピーするため、索引は共有する
+        return self
+
+    def _build_tags(self, tags):
+        """タグの列 (カテゴリ型) から、タグ番号の配列を作成する。"""
+        tag_numbers = {}
+        self.tag_names = []
+
+        def intern_tags(value):
+            ids = []
+            for name in value.split(TAG_SEPARATOR):
+                if not name:
+                    continue
+                if name not in tag_numbers:
+                    tag_numbers[name] = len(self.tag_names)
+                    self.tag_names.append(sys.intern(name))
+                ids.append(tag_numbers[name])
+            return ids
+
+        # タグの組み合わせ (カテゴリ) ごとに1回だけ分割する
+        category_ids = [intern_tags(str(value)) for value in tags.cat.categories]
+        codes = tags.cat.codes.to_numpy()
+        lengths = np.array([len(ids) for ids in category_ids], dtype=np.int64)
+        self.tag_offsets = np.zeros(self.size + 1, dtype=np.int64)
+        if self.size:
+            np.cumsum(lengths[codes], out=self.tag_offsets[1:])
+        flat = [tag_id for code in codes for tag_id in category_ids[code]]
+        self.tag_ids = np.array(flat, dtype=np.int32)
+
+        # タグごとのノートの一覧 (ポスティングリスト)
+        self._tag_rows = np.repeat(np.arange(self.size, dtype=np.int32), np.diff(self.tag_offsets))
+        self.tag_totals = np.bincount(self.tag_ids, minlength=len(self.tag_names))
+        self.tag_posting_rows = self._tag_rows[np.argsort(self.tag_ids, kind='stable')]
+        self.tag_posting_offsets = np.zeros(len(self.tag_names) + 1, dtype=np.int64)
+        np.cumsum(self.tag_totals, out=self.tag_posting_offsets[1:])
+
+        # 小文字のタグ名の一覧 (完全一致・階層の検索用)
+        self._tag_lookup = {}
+        for tag_id, name in enumerate(self.tag_names):
+            self._tag_lookup.setdefault(name.lower(), []).append(tag_id)
+        self._sorted_tag_names = sorted(self._tag_lookup)
+
+    def _build_dates(self, df):
+        """日付順に並べた索引を作成する (目次CSVは通常日付順のため、並べ替えは省けることが多い)。"""
+        if 'date_int' in df.columns:
+            date_ints = df['date_int'].to_numpy()
+        else:
+            date_ints = parse_dates(df['date'])[0]
+        self._date_ints = date_ints
+        if np.all(date_ints[:-1] <= date_ints[1:]):
+            self.date_order = None
+            self.sorted_dates = date_ints
+        else:
+            self.date_order = np.argsort(date_ints, kind='stable')
+            self.sorted_dates = date_ints[self.date_order]
+
+    def _build_facets(self, df):
+        """絞り込み候補 (IndexKey・最上位のタグ・月) の件数を数えるための配列を作成する。"""
+        # IndexKey (カテゴリ番号)
+        keys = df['commonplace_key']
+        if not isinstance(keys.dtype, pd.CategoricalDtype):
+            keys = keys.astype(str).astype('category')
+        self.key_names = [str(name) for name in keys.cat.categories]
+        self._key_codes = keys.cat.codes.to_numpy()
+
+        # 月 (YYYYMM) ごとの番号
+        self.month_values, month_codes = np.unique(self._date_ints // 100, return_inverse=True)
+        self._month_codes = month_codes.reshape(-1)
+
+        # 最上位のタグ (大文字小文字を区別せずにまとめる)。1つのノートでは1回だけ数える
+        top_numbers = {}
+        self.top_tag_names = []
+        tag_tops = np.zeros(len(self.tag_names), dtype=np.int64)
+        for tag_id, name in enumerate(self.tag_names):
+            top = name.split(TAG_HIERARCHY_SEPARATOR, 1)[0]
+            if top.lower() not in top_numbers:
+                top_numbers[top.lower()] = len(self.top_tag_names)
+                self.top_tag_names.append(top)
+            tag_tops[tag_id] = top_numbers[top.lower()]
+        top_count = max(1, len(self.top_tag_names))
+        pairs = np.unique(self._tag_rows.astype(np.int64) * top_count + tag_tops[self.tag_ids])
+        self._top_rows = pairs // top_count
+        self._top_ids = pairs % top_count
+
+    def _build_backlinks(self, df):
+        """
+        各ノートを引用しているノートの数を数える (検索結果の並び順の人気度に使う)。
+
+        find_backlinks_df と同じく、[[key]] と [[key:タイトル]] を引用とみなし、
+        自分自身への引用と、同じノートからの重複した引用は数えない。
+        """
+        self.backlink_counts = np.zeros(self.size, dtype=np.int32)
+        memo = self.texts.get('memo')
+        if memo is None or 'key' not in df.columns:
+            return
+        # キーは通常は数字だけのため、その場合は大文字にした文字列を作らずにそのまま使う
+        rows_by_key = {
+            key if key.isdigit() else key.upper(): row
+            for row, key in enumerate(map(str, df['key'].tolist()))
+        }
+        starts, targets = [], []
+        for match in re.finditer(r'\[\[([^\]:\x00]+)[:\]]', memo.buffer):
+            target = rows_by_key.get(match.group(1))
+            if target is not None:
+                starts.append(match.start())
+                targets.append(target)
+        if not targets:
+            return
+        sources = np.searchsorted(memo.offsets, starts, side='right') - 1
+        targets = np.array(targets, dtype=np.int64)
+        pairs = np.unique(sources[sources != targets] * self.size + targets[sources != targets])
+        self.backlink_counts = np.bincount(pairs % self.size, minlength=self.size).astype(np.int32)
+
+    def _build_fuzzy(self, df):
+        """タイトル (値の種類ごと) とタグ名の、あいまい検索の索引を作成する。"""
+        self.fuzzy = {'tags': NgramIndex(self.tag_names)}
+        if 'title' in df.columns:
+            codes, titles = pd.factorize(df['title'])
+            self._title_codes = codes
+            _, self._title_rows = np.unique(codes, return_index=True)  # 値の番号 -> その値の最初の行
+            self.fuzzy['title'] = NgramIndex(titles)
+
+    def facet_counts(self, df, fields=FACET_FIELDS):
+        """
+        df の行について、絞り込み候補ごとのノートの数を返す (count_facets と同じ形式)。
+
+        df の行を全行分の bool 配列 (ビットセット) にし、各候補の番号の配列と
+        組み合わせて bincount で数えるため、DataFrame のコピーや groupby は行わない。
+        """
+        rows = np.zeros(self.size, dtype=bool)
+        rows[df.index.to_numpy()] = True
+        facets = {}
+        if 'commonplace_key' in fields:
+            codes = self._key_codes[rows]
+            counts = np.bincount(codes[codes >= 0], minlength=len(self.key_names))
+            order = np.argsort(-counts, kind='stable')
+            facets['commonplace_key'] = {
+                self.key_names[code]: int(counts[code]) for code in order if counts[code]
+            }
+        if 'tags' in fields:
+            counts = np.bincount(self._top_ids[rows[self._top_rows]], minlength=len(self.top_tag_names))
+            order = np.argsort(-counts, kind='stable')
+            facets['tags'] = {
+                self.top_tag_names[top_id]: int(counts[top_id]) for top_id in order if counts[top_id]
+            }
+        if 'month' in fields:
+            counts = np.bincount(self._month_codes[rows], minlength=len(self.month_values))
+            facets['month'] = {
+                int(self.month_values[code]): int(counts[code])
+                for code in range(len(counts) - 1, -1, -1)
+                if counts[code] and self.month_values[code] > 0
+            }
+        return facets
+
+    def date_rows(self, start, end):
+        """
+        日付が start 以上 end 以下 (YYYYMMDD の整数) の行番号を二分探索で求める。
+
+        Returns:
+            slice or np.ndarray: 行が日付順の場合は連続した範囲 (slice)、それ以外は行番号の配列。
+        """
+        lo = np.searchsorted(self.sorted_dates, start, side='left')
+        hi = np.searchsorted(self.sorted_dates, end, side='right')
+        if self.date_order is None:
+            return slice(lo, hi)
+        return self.date_order[lo:hi]
+
+    def count_date_rows(self, start, end):
+        """日付が start 以上 end 以下 (YYYYMMDD の整数) の行数を返す。"""
+        return int(np.searchsorted(self.sorted_dates, end, side='right')
+                   - np.searchsorted(self.sorted_dates, start, side='left'))
+
+    def count_tag_rows(self, tag_ids):
+        """
+        tag_ids のいずれかのタグを持つ行数の上限を返す (タグごとの行数の合計)。
+        """
+        return int(self.tag_totals[list(tag_ids)].sum()) if len(tag_ids) else 0
+
+    def count_category_rows(self, column, term):
+        """
+        column 列 (STATS_COLUMNS) の値が term を含む (大文字小文字を区別しない) 行数を返す。
+
+        Returns:
+            int or None: 行数。column の統計が無い場合は None。
+        """
+        if column not in self.category_totals:
+            return None
+        values, totals = self.category_totals[column]
+        term = term.upper()
+        return int(sum(total for value, total in zip(values, totals) if term in value))
+
+    def date_mask(self, df, start, end):
+        """df の行のうち、日付が start 以上 end 以下の行の bool マスクを返す。"""
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self.date_rows(start, end)] = True
+        return self.select(df, mask)
+
+    def tags_of(self, row):
+        """行番号 row のノートのタグ名のリストを返す。"""
+        ids = self.tag_ids[self.tag_offsets[row]:self.tag_offsets[row + 1]]
+        return [self.tag_names[tag_id] for tag_id in ids]
+
+    def find_tags(self, kind, name):
+        """
+        parse_tag_pattern の結果 (kind, name) に一致するタグのタグ番号のリストを返す。
+
+        完全一致は辞書、階層 (subtree) は並べ替えたタグ名の二分探索で求める。
+        """
+        if kind == 'exact':
+            return list(self._tag_lookup.get(name, ()))
+        if kind == 'subtree':
+            names = self._sorted_tag_names
+            prefix = name + TAG_HIERARCHY_SEPARATOR
+            lo = bisect.bisect_left(names, prefix)
+            hi = bisect.bisect_left(names, prefix + '\U0010ffff')
+            matched = ([name] if name in self._tag_lookup else []) + names[lo:hi]
+        else:
+            matched = [tag for tag in self._sorted_tag_names if fnmatch.fnmatchcase(tag, name)]
+        return [tag_id for tag in matched for tag_id in self._tag_lookup[tag]]
+
+    def tag_mask(self, tag_ids):
+        """tag_ids のいずれかのタグを持つ行が True の配列 (全行分) を返す。"""
+        mask = np.zeros(self.size, dtype=bool)
+        for tag_id in tag_ids:
+            mask[self.tag_posting_rows[self.tag_posting_offsets[tag_id]:self.tag_posting_offsets[tag_id + 1]]] = True
+        return mask
+
+    def tag_counts(self, df=None):
+        """
+        df の行 (省略時は全行) について、タグごとのノートの数を返す。
+
+        Returns:
+            dict[str, int]: タグ名 -> ノートの数 (ノートの数が多い順。0件のタグは含まない)。
+        """
+        if df is None or len(df) == self.size:
+            totals = self.tag_totals
+        else:
+            rows = np.zeros(self.size, dtype=bool)
+            rows[df.index.to_numpy()] = True
+            totals = np.bincount(self.tag_ids[rows[self._tag_rows]], minlength=len(self.tag_names))
+        order = np.argsort(-totals, kind='stable')
+        return {self.tag_names[tag_id]: int(totals[tag_id]) for tag_id in order if totals[tag_id]}
+
+    def contains(self, df, column, term):
+        """
+        df の column 列が term を含む (大文字小文字を区別しない) 行の bool マスクを返す。
+
+        Returns:
+            pd.Series or None: マスク。column の索引が無い場合は None。
+        """
+        return self._search_upper(df, column, re.compile(re.escape(term.upper())))
+
+    def matches(self, df, column, pattern):
+        """
+        df の column 列が正規表現 pattern に一致する行の bool マスクを返す
+        (pattern は TextBuffer.search と同じく大文字で書く)。
+
+        Returns:
+            pd.Series or None: マスク。column の索引が無い場合は None。
+        """
+        return self._search_upper(df, column, re.compile(pattern))
+
+    def search(self, df, column, regex):
+        """
+        df の column 列の元の値が、コンパイルした正規表現 regex に一致する行の bool マスクを返す
+        (行の値を1つずつ検索する。df の行が多い場合、タイトルは値の種類ごとに1回だけ検索する)。
+
+        Returns:
+            pd.Series or None: マスク。column の索引が無い場合は None。
+        """
+        buffer = self.texts.get(column)
+        if buffer is None:
+            return None
+        rows = df.index.to_numpy()
+        if column == 'title' and len(df) >= self.size * INDEX_MIN_FRACTION:
+            matched = buffer.search_rows(regex, self._title_rows)
+            return pd.Series(matched[self._title_codes[rows]], index=df.index)
+        return pd.Series(buffer.search_rows(regex, rows), index=df.index)
+
+    def _search_upper(self, df, column, regex):
+        """
+        df の column 列 (大文字に変換した値) が regex に一致する行の bool マスクを返す。
+        df の行が多い場合は連続した文字列全体を1回で検索し、少ない場合は行の値を1つずつ検索する。
+        """
+        buffer = self.texts.get(column)
+        if buffer is None:
+            return None
+        if len(df) >= self.size * INDEX_MIN_FRACTION:
+            return self.select(df, buffer.search(regex))
+        return pd.Series(buffer.search_rows(regex, df.index.to_numpy(), upper=True), index=df.index)
+
+    def fuzzy_mask(self, df, column, term):
+        """
+        df の column 列 (タイトルまたはタグ) が term にあいまい一致する行の bool マスクを返す。
+
+        Returns:
+            pd.Series or None: マスク。column の索引が無い場合は None。
+        """
+        fuzzy = self.fuzzy.get(column)
+        if fuzzy is None:
+            return None
+        value_ids = fuzzy.search(term)
+        if column == 'tags':
+            return self.select(df, self.tag_mask(value_ids))
+        matched = np.zeros(len(fuzzy), dtype=bool)
+        matched[value_ids] = True
+        return self.select(df, matched[self._title_codes])
+
+    @staticmethod
+    def select(df, full_mask):
+        """全行分のマスクから、df の行の分を取り出して pd.Series にする。"""
+        return pd.Series(full_mask[df.index.to_numpy()], index=df.index)
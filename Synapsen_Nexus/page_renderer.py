@@ -0,0 +1,160 @@
+import os
+import threading
+from collections import OrderedDict
+
+import perf_trace
+
+# ======================================================================
+# --- PDFページの描画 (プレビュー用) ---
+# ノートのページを PyMuPDF で画像 (PPM) に変換する。
+# 描画結果は (PDFのパス, ページ, 倍率) ごとに LRU キャッシュに保持し、
+# 開いたPDFも少数だけ開いたままにしておくため、
+# 同じ統合PDFのノートを続けて表示する際はPDFを読み直さない。
+# ======================================================================
+
+# 描画結果のキャッシュの上限 (ページ数・合計バイト数)
+PIXMAP_CACHE_SIZE = 64
+PIXMAP_CACHE_BYTES = 64 * 1024 * 1024
+# 開いたままにしておくPDFの数
+DOCUMENT_POOL_SIZE = 4
+# 倍率の刻み (ウィンドウの幅が少し変わっても同じキャッシュを使えるように丸める)
+ZOOM_STEP = 0.05
+
+
+class PageRenderer:
+    """
+    PDFのページを描画し、結果をキャッシュする。
+
+    PDFが更新された (更新日時やサイズが変わった) 場合は、
+    開き直した上でそのPDFのキャッシュを破棄する。
+    PyMuPDF は複数のスレッドから同時に使えないため、描画は1つずつ行う。
+    """
+
+    def __init__(self, max_pixmaps=PIXMAP_CACHE_SIZE, max_bytes=PIXMAP_CACHE_BYTES,
+                 max_documents=DOCUMENT_POOL_SIZE):
+        self.max_pixmaps = max_pixmaps
+        self.max_bytes = max_bytes
+        self.max_documents = max_documents
+        self._pixmaps = OrderedDict()    # (パス, ページ, 倍率) -> PPM (bytes)
+        self._pixmap_bytes = 0
+        self._documents = OrderedDict()  # パス -> fitz.Document
+        self._signatures = {}            # パス -> (更新日時, サイズ)
+        self._lock = threading.Lock()
+
+    def page_count(self, pdf_path):
+        """PDFのページ数を返す。"""
+        with self._lock:
+            self._check_signature(str(pdf_path))
+            return self._get_document(str(pdf_path)).page_count
+
+    def zoom_for_width(self, pdf_path, page_index, width):
+        """
+        ページの幅が width [px] になる倍率を、ZOOM_STEP 単位に丸めて返す。
+        """
+        with self._lock:
+            self._check_signature(str(pdf_path))
+            page_width = self._get_document(str(pdf_path))[page_index].rect.width
+        steps = max(1, round(width / page_width / ZOOM_STEP))
+        return round(steps * ZOOM_STEP, 2)
+
+    def render(self, pdf_path, page_index, zoom):
+        """
+        ページを描画した PPM 画像を返す (tkinter.PhotoImage(data=...) で表示できる)。
+
+        Args:
+            pdf_path (str or Path): PDFのパス。
+            page_index (int): ページ番号 (0始まり)。
+            zoom (float): 倍率 (1.0 で 72dpi)。
+
+        Returns:
+            bytes: PPM 画像。
+
+        Raises:
+            OSError: PDFが存在しない場合。
+            IndexError: ページ番号が範囲外の場合。
+            RuntimeError: PDFを開けない場合 (fitz.FileDataError など)。
+        """
+        pdf_path = str(pdf_path)
+        key = (pdf_path, page_index, zoom)
+        with self._lock:
+            # 更新されたPDFのキャッシュは、ここで破棄される
+            self._check_signature(pdf_path)
+            ppm = self._pixmaps.get(key)
+            if ppm is not None:
+                self._pixmaps.move_to_end(key)
+                perf_trace.count("nexus.page_cache_hit")
+                return ppm
+
+            perf_trace.count("nexus.page_cache_miss")
+            doc = self._get_document(pdf_path)
+            with perf_trace.span("nexus.render_page", page=page_index, zoom=zoom):
+                fitz = perf_trace.import_module("fitz")
+                pix = doc[page_index].get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+                ppm = pix.tobytes("ppm")
+
+            self._pixmaps[key] = ppm
+            self._pixmap_bytes += len(ppm)
+            while self._pixmaps and (len(self._pixmaps) > self.max_pixmaps
+                                     or self._pixmap_bytes > self.max_bytes):
+                _, old = self._pixmaps.popitem(last=False)
+                self._pixmap_bytes -= len(old)
+            return ppm
+
+    def render_thumbnail(self, pdf_path, page_index, width):
+        """
+        幅 width [px] に縮小したページの PNG 画像を返す (サムネイル用)。
+
+        サムネイルは ThumbnailCache がキャッシュするため、
+        ページの描画結果のキャッシュには入れない。
+        """
+        pdf_path = str(pdf_path)
+        with self._lock:
+            self._check_signature(pdf_path)
+            page = self._get_document(pdf_path)[page_index]
+            zoom = width / page.rect.width
+            with perf_trace.span("nexus.render_thumbnail", page=page_index):
+                fitz = perf_trace.import_module("fitz")
+                pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+                return pix.tobytes("png")
+
+    def close(self):
+        """開いているPDFを閉じ、キャッシュを破棄する。"""
+        with self._lock:
+            for doc in self._documents.values():
+                doc.close()
+            self._documents.clear()
+            self._signatures.clear()
+            self._pixmaps.clear()
+            self._pixmap_bytes = 0
+
+    def _check_signature(self, pdf_path):
+        """
+        PDFが前回から更新されていれば、開いているPDFを閉じてキャッシュを破棄する
+        (_lock を取得した状態で呼ぶこと)。
+        """
+        stat = os.stat(pdf_path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if self._signatures.get(pdf_path) == signature:
+            return
+        if pdf_path in self._documents:
+            self._documents.pop(pdf_path).close()
+        for key in [k for k in self._pixmaps if k[0] == pdf_path]:
+            self._pixmap_bytes -= len(self._pixmaps.pop(key))
+        self._signatures[pdf_path] = signature
+
+    def _get_document(self, pdf_path):
+        """開いたPDFを返す (_lock を取得した状態で、_check_signature の後に呼ぶこと)。"""
+        doc = self._documents.get(pdf_path)
+        if doc is not None:
+            self._documents.move_to_end(pdf_path)
+            return doc
+
+        fitz = perf_trace.import_module("fitz")
+        with perf_trace.span("nexus.open_document"):
+            doc = fitz.open(pdf_path)
+        self._documents[pdf_path] = doc
+        while len(self._documents) > self.max_documents:
+            # 描画結果のキャッシュは、PDFを閉じた後も使える
+            _, old_doc = self._documents.popitem(last=False)
+            old_doc.close()
+        return doc
@@ -0,0 +1,256 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+
+import perf_trace
+
+# ======================================================================
+# --- PDFの場所の索引 ---
+# pdf_root_folder (元のPDF) や目次CSVのフォルダ (統合PDF) 以下のPDFを
+# サブフォルダも含めて「ファイル名 → パス」の索引にしておき、
+# PDFを開く際にフォルダを探し回らずに場所を特定する。
+#
+# 索引は cache_dir に保存し、次回の起動時はそれを読み込んでから
+# 変更のあったフォルダ (更新日時が変わったフォルダ) だけを読み直す。
+# ======================================================================
+
+INDEX_VERSION = 1
+# 索引に含めないフォルダ (先頭が "." のフォルダも除く)
+SKIP_DIR_NAMES = {"__pycache__", "cache", "logs"}
+# 索引に無いPDFを探した際に、索引を更新し直す間隔の下限 [秒]
+# (見つからないPDFを探すたびにフォルダ全体を確認し直さないようにする)
+MISS_REFRESH_INTERVAL_SECONDS = 30.0
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_location_index(root, cache_dir=None):
+    """
+    root フォルダの PdfLocationIndex を返す (同じフォルダには同じ索引を使い回す)。
+
+    初めて作成した場合は、バックグラウンドで索引の更新を開始する。
+    """
+    root = Path(root).resolve()
+    with _indexes_lock:
+        index = _indexes.get(root)
+        if index is None:
+            index = PdfLocationIndex(root, cache_dir)
+            index.start()
+            _indexes[root] = index
+    return index
+
+
+def locate_pdf(folder, filename, index=None, refresh=True):
+    """
+    filename のPDFを、folder の直下 → index (サブフォルダを含む) の順に探す。
+
+    Args:
+        folder (str or Path): まず探すフォルダ。
+        filename (str): ファイル名 (パスが含まれていてもファイル名のみを使う)。
+        index (PdfLocationIndex, optional): folder 以下のPDFの索引。
+        refresh (bool): 索引に無い場合に、索引の更新を開始するか (PdfLocationIndex.find を参照)。
+
+    Returns:
+        Path or None: 見つかったPDFのパス。
+    """
+    name = Path(filename).name
+    direct_path = Path(folder) / name
+    if direct_path.is_file():
+        return direct_path
+    if index is not None:
+        return index.find(name, refresh=refresh)
+    return None
+
+
+class PdfLocationIndex:
+    """
+    フォルダ以下 (サブフォルダを含む) のPDFの「ファイル名 → パス」の索引。
+
+    フォルダごとに更新日時とPDF・サブフォルダの一覧を記録しておき、
+    refresh() では更新日時が変わったフォルダだけを読み直す
+    (フォルダの更新日時は、直下のファイルの追加・削除・名前の変更で変わる)。
+
+    Attributes:
+        root (Path): 索引を作成するフォルダ。
+        cache_path (Path or None): 索引の保存先。
+    """
+
+    def __init__(self, root, cache_dir=None):
+        self.root = Path(root)
+        self.cache_path = None
+        if cache_dir:
+            digest = hashlib.sha1(str(self.root).encode("utf-8")).hexdigest()[:12]
+            self.cache_path = Path(cache_dir) / f"pdf_index_{digest}.json"
+
+        self._dirs = {}   # フォルダ (str) -> {"mtime": int, "pdfs": [str], "subdirs": [str]}
+        self._files = {}  # 小文字のファイル名 -> [パス (str)]
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._ready = threading.Event()
+        self._thread = None
+        self._last_miss_refresh = None  # 索引に無かったために更新を開始した時刻 (time.monotonic)
+
+        if self._load_cache():
+            # 保存済みの索引はすぐに使い、更新はバックグラウンドで行う
+            self._ready.set()
+
+    # --- 索引の構築・更新 ---
+
+    def start(self):
+        """バックグラウンドのスレッドで索引を更新する (更新中の場合は何もしない)。"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self.refresh, name="pdf-index", daemon=True
+            )
+            self._thread.start()
+
+    def is_ready(self):
+        """索引が使える状態 (保存済みの索引を読み込んだか、1回以上更新した) かを返す。"""
+        return self._ready.is_set()
+
+    def refresh(self):
+        """
+        索引を更新する。更新日時が変わったフォルダだけを読み直す。
+
+        Returns:
+            bool: 索引が変わった場合は True。
+        """
+        with self._refresh_lock:
+            with perf_trace.span("nexus.pdf_index_refresh", root=str(self.root)) as rec:
+                old_dirs = self._dirs
+                new_dirs = {}
+                rescanned = 0
+                stack = [str(self.root)]
+                while stack:
+                    directory = stack.pop()
+                    try:
+                        mtime = os.stat(directory).st_mtime_ns
+                    except OSError:
+                        continue
+                    entry = old_dirs.get(directory)
+                    if entry is None or entry["mtime"] != mtime:
+                        entry = self._list_dir(directory, mtime)
+                        if entry is None:
+                            continue
+                        rescanned += 1
+                    new_dirs[directory] = entry
+                    stack.extend(os.path.join(directory, name) for name in entry["subdirs"])
+                rec["dirs"] = len(new_dirs)
+                rec["rescanned"] = rescanned
+
+                changed = rescanned > 0 or new_dirs.keys() != old_dirs.keys()
+                if changed:
+                    files = self._build_file_map(new_dirs)
+                    with self._lock:
+                        self._dirs = new_dirs
+                        self._files = files
+                    self._save_cache()
+            self._ready.set()
+            return changed
+
+    @staticmethod
+    def _list_dir(directory, mtime):
+        pdfs = []
+        subdirs = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not entry.name.startswith(".") and entry.name not in SKIP_DIR_NAMES:
+                                subdirs.append(entry.name)
+                        elif entry.name.lower().endswith(".pdf"):
+                            pdfs.append(entry.name)
+                    except OSError:
+                        continue
+        except OSError as e:
+            print(f"フォルダの読み込みに失敗しました ({directory}): {e}")
+            return None
+        return {"mtime": mtime, "pdfs": pdfs, "subdirs": subdirs}
+
+    @staticmethod
+    def _build_file_map(dirs):
+        files = {}
+        for directory, entry in dirs.items():
+            for name in entry["pdfs"]:
+                files.setdefault(name.lower(), []).append(os.path.join(directory, name))
+        return files
+
+    # --- 検索 ---
+
+    def find(self, filename, refresh=True):
+        """
+        ファイル名からPDFのパスを返す。索引の構築・更新は待たない (UIスレッドから呼べる)。
+
+        索引に無い (または索引のパスに存在しない) 場合は None を返し、
+        バックグラウンドで索引の更新を開始する (MISS_REFRESH_INTERVAL_SECONDS に1回まで)。
+        更新が終われば、次に探した際に見つかる。
+
+        Args:
+            filename (str): ファイル名 (パスが含まれていてもファイル名のみを使う)。
+            refresh (bool):
+                索引に無い場合に、索引の更新を開始するか
+                (サムネイルなど、多数のノートをまとめて探す場合は False にする)。
+
+        Returns:
+            Path or None: 見つかったPDFのパス。
+        """
+        path = self._lookup(Path(filename).name.lower())
+        if path is None and refresh:
+            self._refresh_after_miss()
+        return path
+
+    def _refresh_after_miss(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._last_miss_refresh is not None \
+                    and now - self._last_miss_refresh < MISS_REFRESH_INTERVAL_SECONDS:
+                return
+            self._last_miss_refresh = now
+        self.start()
+
+    def _lookup(self, key):
+        with self._lock:
+            candidates = list(self._files.get(key, ()))
+        for candidate in candidates:
+            if os.path.isfile(candidate):
+                return Path(candidate)
+        return None
+
+    # --- 保存・読み込み ---
+
+    def _load_cache(self):
+        if not self.cache_path or not self.cache_path.is_file():
+            return False
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != INDEX_VERSION or data.get("root") != str(self.root):
+                return False
+            self._dirs = data["dirs"]
+            self._files = self._build_file_map(self._dirs)
+            return True
+        except (OSError, ValueError, KeyError) as e:
+            print(f"PDFの索引の読み込みに失敗しました ({self.cache_path}): {e}")
+            return False
+
+    def _save_cache(self):
+        if not self.cache_path:
+            return
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.cache_path.with_suffix(".tmp")
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"version": INDEX_VERSION, "root": str(self.root), "dirs": self._dirs},
+                    f, ensure_ascii=False
+                )
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            print(f"PDFの索引の保存に失敗しました ({self.cache_path}): {e}")
@@ -1,8 +1,181 @@
+import threading
+import tkinter as tk
 import customtkinter as ctk
 # utilsからメモ欄構築関数をインポート
-from utils import (
-    build_memo_display, find_backlinks_df, build_references_display
-)
+from utils import MemoView, ReferenceList, resolve_note_pages
+from note_data import find_backlinks_df
+
+
+class PagePreviewFrame(ctk.CTkFrame):
+    """
+    ノートのページを PageRenderer で描画して表示するフレーム。
+
+    ノートが複数ページの場合は、「◀」「▶」でページを切り替える。
+    描画結果は PageRenderer にキャッシュされるため、
+    一度表示したページは再描画せずに表示できる。
+
+    PDFの場所の特定・ページ数の確認・ページの描画は、UIを止めないよう
+    バックグラウンドのスレッドで行う (PageRenderer はサムネイルの先読みと共有しており、
+    描画中のサムネイルを待つ場合があるため)。
+    """
+    def __init__(self, master, renderer, page_width=400, **kwargs):
+        """
+        Args:
+            master: 親ウィジェット。
+            renderer (PageRenderer): ページの描画に使う (アプリ全体で共有する)。
+            page_width (int): ページを表示する幅 [px]。
+        """
+        super().__init__(master, **kwargs)
+        self.renderer = renderer
+        self.page_width = page_width
+        self.pdf_path = None
+        self.first_page = 0
+        self.page_count = 0
+        self.current = 0
+        self._photo = None  # PhotoImage はどこかで参照を保持しないと表示が消える
+        self._request = 0   # show_note・ページの切り替えごとに増やす (古い結果を捨てるため)
+
+        self.grid_columnconfigure(1, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        self.prev_button = ctk.CTkButton(
+            self, text="◀", width=30, command=lambda: self.turn_page(-1)
+            )
+        self.prev_button.grid(row=0, column=0, padx=5, pady=5)
+        self.page_label = ctk.CTkLabel(self, text="")
+        self.page_label.grid(row=0, column=1, padx=5, pady=5)
+        self.next_button = ctk.CTkButton(
+            self, text="▶", width=30, command=lambda: self.turn_page(1)
+            )
+        self.next_button.grid(row=0, column=2, padx=5, pady=5)
+
+        # CTkLabel は CTkImage (Pillow が必要) 以外の画像では警告を出すため、tk.Label を使う
+        self.image_label = tk.Label(
+            self, borderwidth=0, highlightthickness=0,
+            bg=self._apply_appearance_mode(self.cget("fg_color"))
+            )
+        self.image_label.grid(row=1, column=0, columnspan=3, padx=5, pady=5, sticky="n")
+        self.clear()
+
+    def show_note(self, note_data, parent_app):
+        """
+        ノートのページを表示する (PDFの場所はバックグラウンドで調べ、分かり次第表示する)。
+
+        Args:
+            note_data (pd.Series): 表示するノートのデータ。
+            parent_app (Synapsen_Nexus): PDFの場所の設定・索引を持つメインアプリ。
+        """
+        self._request += 1
+        self.clear("読み込み中…")
+        # parent_app の設定はUIスレッドで読み、スレッドには値だけを渡す
+        self._start_worker(
+            self._resolve, self._request, note_data,
+            parent_app.loaded_csv_path, parent_app.pdf_root_folder,
+            parent_app.pdf_index, parent_app.merged_pdf_index
+        )
+
+    def _start_worker(self, target, *args):
+        threading.Thread(target=target, args=args, name="page-preview", daemon=True).start()
+
+    def _deliver(self, callback):
+        """バックグラウンドのスレッドから、callback をUIスレッドで実行させる。"""
+        try:
+            self.after(0, callback)
+        except (RuntimeError, tk.TclError):
+            pass  # ウィンドウが閉じられた
+
+    def _resolve(self, request, note_data, loaded_csv_path, pdf_root_folder,
+                 pdf_index, merged_pdf_index):
+        """PDFの場所とページ数を調べ、UIスレッドで表示する (バックグラウンドのスレッドで実行)。"""
+        if request != self._request:
+            return  # 既に別のノートが選択された
+        location = resolve_note_pages(
+            note_data, loaded_csv_path, pdf_root_folder,
+            pdf_index=pdf_index, merged_pdf_index=merged_pdf_index
+        )
+        total = None
+        if location is not None:
+            try:
+                total = self.renderer.page_count(location[0])
+            except Exception as e:
+                print(f"PDFを開けませんでした ({location[0]}): {e}")
+        self._deliver(lambda: self._show_location(request, location, total))
+
+    def _show_location(self, request, location, total):
+        if request != self._request or not self.winfo_exists():
+            return  # 別のノートが選択された
+        if location is None:
+            self.clear("PDFが見つかりません")
+            return
+        if total is None:
+            self.clear("PDFを開けません")
+            return
+        pdf_path, first_page, page_count = location
+        if page_count is None:
+            page_count = total - first_page
+        self.pdf_path = pdf_path
+        self.first_page = first_page
+        self.page_count = max(0, min(page_count, total - first_page))
+        self.current = 0
+        self._render_current()
+
+    def turn_page(self, step):
+        """表示中のノート内で、ページを step ページ進める (負の値で戻る)。"""
+        new_page = self.current + step
+        if self.pdf_path is None or not 0 <= new_page < self.page_count:
+            return
+        self.current = new_page
+        self._render_current()
+
+    def clear(self, message=""):
+        """表示を消し、message を表示する。"""
+        self.pdf_path = None
+        self.page_count = 0
+        self._photo = None
+        self.image_label.configure(image="")
+        self.page_label.configure(text=message)
+        self._update_buttons()
+
+    def _render_current(self):
+        """表示中のページの描画をバックグラウンドで開始する (描画が終わり次第表示する)。"""
+        if self.page_count == 0:
+            self.clear("ページがありません")
+            return
+        self._request += 1
+        self.page_label.configure(text=f"{self.current + 1} / {self.page_count} ページ")
+        self._update_buttons()
+        self._start_worker(
+            self._render, self._request, self.pdf_path, self.first_page + self.current
+        )
+
+    def _render(self, request, pdf_path, page_index):
+        """ページを描画し、UIスレッドで表示する (バックグラウンドのスレッドで実行)。"""
+        if request != self._request:
+            return  # 既に別のページ・ノートが選択された
+        try:
+            zoom = self.renderer.zoom_for_width(pdf_path, page_index, self.page_width)
+            ppm = self.renderer.render(pdf_path, page_index, zoom)
+        except Exception as e:
+            print(f"ページの描画に失敗しました ({pdf_path}, {page_index + 1}ページ): {e}")
+            ppm = None
+        self._deliver(lambda: self._show_page(request, ppm))
+
+    def _show_page(self, request, ppm):
+        if request != self._request or not self.winfo_exists():
+            return  # 別のページ・ノートが選択された
+        if ppm is None:
+            self.clear("ページを表示できません")
+            return
+        self._photo = tk.PhotoImage(data=ppm)
+        self.image_label.configure(image=self._photo)
+
+    def _update_buttons(self):
+        self.prev_button.configure(
+            state="normal" if self.pdf_path and self.current > 0 else "disabled"
+            )
+        self.next_button.configure(
+            state="normal" if self.pdf_path and self.current < self.page_count - 1 else "disabled"
+            )
 
 
 class NotePreviewWindow(ctk.CTkToplevel):
@@ -42,11 +215,12 @@ class NotePreviewWindow(ctk.CTkToplevel):
 
         title = self.note_data.get('title', 'N/A')
         self.title(f"プレビュー: {title}")
-        self.geometry("450x600")
+        self.geometry("900x600")
         self.transient(parent_app)  # 常にメインウィンドウより手前に表示
         self.grab_set()  # このウィンドウを閉じるまでメインを操作不可にする
 
         self.grid_columnconfigure(1, weight=1)
+        self.grid_columnconfigure(2, weight=1)  # <--- ページのプレビュー
         self.grid_rowconfigure(5, weight=1)  # <--- メモ欄
         self.grid_rowconfigure(7, weight=1)  # <--- 引用元欄
 
@@ -89,23 +263,26 @@ class NotePreviewWindow(ctk.CTkToplevel):
         ctk.CTkLabel(
             self, text="メモ:", anchor="w"
             ).grid(row=4, column=0, padx=10, pady=5, sticky="nw")
-        self.memo_display_frame = ctk.CTkScrollableFrame(self)
-        self.memo_display_frame.grid(
+        self.memo_view = MemoView(
+            self, self.parent_app.open_preview_window  # リンククリック時の動作
+            )
+        self.memo_view.grid(
             row=5, column=1, padx=10, pady=5, sticky="nsew"
             )
-
-        # メモ欄の動的ビルドメソッドを呼び出す
-        self._build_memo_display()
+        self.memo_view.show_memo(
+            str(self.note_data.get('memo', '')),
+            self.parent_app.df  # リンク先タイトルの検索用
+        )
 
         ctk.CTkLabel(
             self, text="引用元:", anchor="w"
             ).grid(row=6, column=0, padx=10, pady=5, sticky="nw")
 
         # 引用元表示用フレーム
-        self.references_display_frame = ctk.CTkScrollableFrame(
-            self, label_text="このノートを引用"
+        self.reference_list = ReferenceList(
+            self, self.parent_app.open_preview_window  # Callback to main app
             )
-        self.references_display_frame.grid(
+        self.reference_list.grid(
             row=7, column=1, padx=10, pady=5, sticky="nsew"
             )
 
@@ -115,6 +292,13 @@ class NotePreviewWindow(ctk.CTkToplevel):
             )
         pdf_button.grid(row=8, column=0, columnspan=2, padx=10, pady=10)
 
+        # 7. ページのプレビュー (PDFをアプリ内で描画する)
+        self.page_preview = PagePreviewFrame(self, parent_app.page_renderer)
+        self.page_preview.grid(
+            row=0, column=2, rowspan=9, padx=10, pady=10, sticky="nsew"
+            )
+        self.page_preview.show_note(self.note_data, parent_app)
+
         current_key = self.note_data.get('key', '')
 
         # メインアプリのDataFrameと設定を使って検索
@@ -122,11 +306,8 @@ class NotePreviewWindow(ctk.CTkToplevel):
             self.parent_app.df, current_key
         )
 
-        # utilsの新関数を使って引用元UIを構築
-        build_references_display(
-            self.references_display_frame,
+        self.reference_list.show_references(
             backlinks_df,
-            self.parent_app.open_preview_window,  # Callback to main app
             self.parent_app.key_icons,
             self.parent_app.key_colors
         )
@@ -158,22 +339,3 @@ class NotePreviewWindow(ctk.CTkToplevel):
         # メインアプリのopen_pdfメソッドを呼び出す
         self.parent_app.open_pdf(self.note_data)
         self.destroy()  # PDFを開いたらプレビューは閉じる
-
-    def _build_memo_display(self):
-        """
-        プレビューウィンドウのメモ欄に、クリック可能なリンク付きラベルを生成する。
-        utils.build_memo_display を使用する。
-        """
-        memo_text = str(self.note_data.get('memo', ''))
-
-        # プレビューウィンドウの幅に合わせてテキストが折り返すように設定
-        frame_width = 300
-
-        # メインアプリのDataFrameとプレビュー展開メソッドをコールバックとして渡す
-        build_memo_display(
-            self.memo_display_frame,
-            memo_text,
-            self.parent_app.df,  # リンク先タイトルの検索用
-            self.parent_app.open_preview_window,  # リンククリック時の動作
-            frame_width
-        )
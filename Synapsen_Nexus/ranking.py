@@ -0,0 +1,156 @@
+import numpy as np
+
+from note_table import get_note_index, has_column, parse_dates
+from search_parser import (
+    FUZZY_SEARCH_COLUMNS, split_respecting_parens, parse_simple_term, term_column_mask
+)
+
+# ======================================================================
+# --- 検索結果の並び順 (関連度) ---
+# 検索語がどの列に一致したか (タイトル > タグ > メモ)、ノートの新しさ、
+# 引用されている数 (人気度) から点数を付け、点数の高い順に並べる。
+#
+# 上位の件数だけを部分的に選ぶ (np.partition) ため、ヒットが多くても
+# 表示する分だけを並べ替えればよい。残りは「さらに表示」の際に並べる。
+# ======================================================================
+
+# 検索語が一致した列ごとの点数
+FIELD_WEIGHTS = {'title': 3.0, 'tags': 2.0, 'memo': 1.0}
+# 新しさの点数 (最新のノートを RECENCY_WEIGHT とし、RECENCY_HALF_LIFE_DAYS 日ごとに半分にする)
+RECENCY_WEIGHT = 1.0
+RECENCY_HALF_LIFE_DAYS = 365
+# 人気度の点数 (POPULARITY_WEIGHT * log(1 + 引用されている数))
+POPULARITY_WEIGHT = 0.5
+
+
+def positive_terms(query):
+    """
+    クエリから、NOT (-) の付いていない検索語を (列, 検索の種類, 値) のリストで返す
+    (search_parser.parse_simple_term の結果)。
+
+    括弧の中も再帰的に取り出す。点数の計算に使う。
+    """
+    terms = []
+    for or_part in split_respecting_parens(query, ' OR '):
+        for part in split_respecting_parens(or_part, ' AND '):
+            part = part.strip()
+            if part.startswith('-'):
+                continue
+            if part.startswith('(') and part.endswith(')'):
+                terms.extend(positive_terms(part[1:-1]))
+            else:
+                terms.append(parse_simple_term(part))
+    return terms
+
+
+def score_notes(df, query_text):
+    """
+    df の各ノートの点数を計算する。
+
+    Args:
+        df (pd.DataFrame): 検索結果。
+        query_text (str): 検索クエリ。
+
+    Returns:
+        np.ndarray: 各行の点数 (float64)。
+    """
+    index = get_note_index(df)
+    scores = np.zeros(len(df), dtype=np.float64)
+    if not len(df):
+        return scores
+
+    # 1. 検索語が一致した列
+    for column, mode, value in positive_terms(query_text.strip()):
+        if not value:
+            continue
+        if column is not None:
+            fields = [column]
+        elif mode == 'fuzzy':
+            fields = FUZZY_SEARCH_COLUMNS
+        else:
+            fields = list(FIELD_WEIGHTS)
+        for field in fields:
+            if field in FIELD_WEIGHTS and has_column(df, field):
+                mask = term_column_mask(df, field, mode, value, index, scoped=column is not None)
+                scores += FIELD_WEIGHTS[field] * mask.to_numpy()
+
+    # 2. 新しさ (日付が無効なノートは 0 点)
+    if 'date_value' in df.columns:
+        dates = df['date_value'].to_numpy()
+    else:
+        dates = parse_dates(df['date'])[1]
+    valid = ~np.isnat(dates)
+    if valid.any():
+        age_days = (dates[valid].max() - dates[valid]) / np.timedelta64(1, 'D')
+        scores[valid] += RECENCY_WEIGHT * 0.5 ** (age_days / RECENCY_HALF_LIFE_DAYS)
+
+    # 3. 人気度 (索引が無い場合は数えない)
+    if index is not None:
+        backlinks = index.backlink_counts[df.index.to_numpy()]
+        scores += POPULARITY_WEIGHT * np.log1p(backlinks)
+    return scores
+
+
+def rank_results(df, query_text):
+    """
+    df を点数の高い順に取り出せる RankedResults を返す。
+
+    クエリが空の場合 (一覧表示) は、点数を付けずに元の順 (CSVの行順) のままにする。
+    """
+    if not query_text.strip():
+        return RankedResults(df)
+    return RankedResults(df, score_notes(df, query_text))
+
+
+class RankedResults:
+    """
+    点数の高い順に並べた検索結果。
+
+    top(count) は上位 count 件だけを部分的に選んで並べるため、
+    全件を並べ替えるのは「さらに表示」で残りが必要になった場合だけ。
+    同じ点数の場合は日付の新しい順、さらに同じ場合は元の順 (CSVの行順)。
+
+    Attributes:
+        df (pd.DataFrame): 検索結果 (元の順)。
+        scores (np.ndarray or None): 各行の点数。None の場合は元の順のまま。
+    """
+
+    def __init__(self, df, scores=None):
+        self.df = df
+        self.scores = scores
+        self._order = None  # 全件の並び順 (必要になった時に作成する)
+        if scores is None:
+            self._order = np.arange(len(df))
+        elif 'date_int' in df.columns:
+            self._dates = df['date_int'].to_numpy()
+        else:
+            self._dates = parse_dates(df['date'])[0]
+
+    def __len__(self):
+        return len(self.df)
+
+    def top(self, count):
+        """
+        点数の高い順に、上位 count 件のノートの DataFrame を返す。
+        """
+        total = len(self.df)
+        count = max(0, min(count, total))
+        if self._order is not None or count == total:
+            return self.df.iloc[self._full_order()[:count]]
+        if count == 0:
+            return self.df.iloc[0:0]
+
+        # count 番目に高い点数以上の行だけを並べ替える (同じ点数の行も候補に含める)
+        threshold = np.partition(self.scores, total - count)[total - count]
+        candidates = np.flatnonzero(self.scores >= threshold)
+        return self.df.iloc[candidates[self._sort(candidates)][:count]]
+
+    def _sort(self, positions):
+        """positions (行の位置) を並べ替える順序を返す。"""
+        return np.lexsort((positions, -self._dates[positions], -self.scores[positions]))
+
+    def _full_order(self):
+        if self._order is None:
+            positions = np.arange(len(self.df))
+            self._order = positions[self._sort(positions)]
+        return self._order
@@ -1,11 +1,24 @@
+import re
+import calendar
+import datetime
+import functools
+
+import numpy as np
 import pandas as pd
 
+from note_table import (
+    TAG_SEPARATOR, INDEX_MIN_FRACTION, get_note_index, has_column, parse_dates, parse_tag_pattern,
+    tag_matches, text_column
+)
+from fuzzy_match import NgramIndex
+
 
 def split_respecting_parens(query, operator):
     """
     括弧を考慮して、トップレベルの演算子でのみ分割する。
 
     (例: 'A AND (B OR C)' を ' AND ' で分割すると ['A', '(B OR C)'] となる)
+    引用符 ("...") の中と、正規表現 (memo~/.../, re:/.../) の中の括弧・演算子は無視する。
 
     Args:
         query (str): 分割対象の検索クエリ。
@@ -22,7 +35,11 @@ def split_respecting_parens(query, operator):
     i = 0
     while i < len(query):
         char = query[i]
-        if char == '(':
+        literal_end = _literal_end(query, i)
+        if literal_end is not None:
+            current_part += query[i:literal_end]
+            i = literal_end
+        elif char == '(':
             balance += 1
             current_part += char
             i += 1
@@ -43,6 +60,372 @@ def split_respecting_parens(query, operator):
     return [p for p in parts if p]  # 空の文字列を除外
 
 
+def _literal_end(query, start):
+    """
+    query[start:] が引用符または正規表現 (~/ または re:/ の後の /.../) で始まる場合は、
+    その終わりの位置 (閉じる記号の次) を返す。それ以外の場合は None。
+
+    バックスラッシュの直後の記号は閉じる記号とみなさない。閉じていない場合は末尾まで。
+    """
+    if query[start] == QUOTE:
+        closing = QUOTE
+    elif query[start] == '/' and (
+            (start >= 2 and query[start - 1] == FUZZY_PREFIX and
+             (query[start - 2].isalnum() or query[start - 2] == '_'))
+            or query[max(0, start - len(REGEX_PREFIX)):start].lower() == REGEX_PREFIX):
+        closing = '/'
+    else:
+        return None
+    i = start + 1
+    while i < len(query):
+        if query[i] == '\\':
+            i += 2
+        elif query[i] == closing:
+            return i + 1
+        else:
+            i += 1
+    return len(query)
+
+
+# プレフィックス -> 検索対象の列
+SEARCH_FIELDS_MAP = {
+    'title': 'title',
+    'key': 'key',
+    'date': 'date',
+    'tag': 'tags',
+    'tags': 'tags',  # 'tag'でも'tags'でも検索可
+    'memo': 'memo',
+    'cpkey': 'commonplace_key',
+    'indexkey': 'commonplace_key',
+    'ikey': 'commonplace_key'  # IndexKeyとその略称でも検索可
+}
+
+# グローバル検索 (プレフィックスなし) の対象の列
+GLOBAL_SEARCH_COLUMNS = ['title', 'tags', 'key', 'memo', 'commonplace_key', 'date']
+
+# あいまい検索 (~term, title:~term, tag:~term) の印と対象の列
+FUZZY_PREFIX = '~'
+FUZZY_SEARCH_COLUMNS = ['title', 'tags']
+
+# フレーズ ("machine learning")・正規表現 (re:pattern, memo~/pattern/) の記号
+QUOTE = '"'
+REGEX_PREFIX = 're:'
+FIELD_REGEX_PATTERN = re.compile(r'^(\w+)~(/.*)$', re.DOTALL)
+# コンパイル済みの正規表現を保持する数
+REGEX_CACHE_SIZE = 128
+
+
+def split_prefix(term):
+    """
+    検索語をプレフィックスの列と検索値に分ける。
+
+    (例: 'tag:Python' -> ('tags', 'Python'), 'Python' -> (None, 'Python'))
+    未知のプレフィックスや値が空の場合は、検索語全体をグローバル検索の値とする。
+
+    Returns:
+        tuple[str or None, str]: (検索対象の列 (グローバル検索は None), 検索値)。
+    """
+    # プレフィックス (key:など) があるかチェック
+    if ':' in term:
+        parts = term.split(':', 1)
+        prefix = parts[0].lower().strip()
+        value = parts[1].strip()
+
+        if prefix in SEARCH_FIELDS_MAP and value:
+            return SEARCH_FIELDS_MAP[prefix], value
+    return None, term
+
+
+def parse_simple_term(term):
+    """
+    単純な検索語を、検索対象の列・検索の種類・検索値に分ける。
+
+    検索の種類:
+        'text'   部分一致 (例: 'Python', 'title:Python')
+        'phrase' 引用符で囲んだ部分一致。AND・OR・括弧・~ などを文字として扱う
+                 (例: '"machine learning"', 'memo:"A AND B"')
+        'fuzzy'  あいまい検索 (例: '~Pyhton', 'tag:~progrm')
+        'regex'  正規表現 (大文字小文字を区別しない) (例: 're:py(thon|torch)', 'memo~/\\[\\[2024\\d+/')
+
+    Returns:
+        tuple[str or None, str, str]: (検索対象の列 (グローバル検索は None), 検索の種類, 検索値)。
+    """
+    term = term.strip()
+    match = FIELD_REGEX_PATTERN.match(term)
+    if match and match.group(1).lower() in SEARCH_FIELDS_MAP:
+        pattern = _strip_literal(match.group(2), '/', unescape=False)
+        return SEARCH_FIELDS_MAP[match.group(1).lower()], 'regex', pattern
+    if term[:len(REGEX_PREFIX)].lower() == REGEX_PREFIX and term[len(REGEX_PREFIX):].strip():
+        pattern = term[len(REGEX_PREFIX):].strip()
+        if pattern[0] in (QUOTE, '/'):
+            pattern = _strip_literal(pattern, pattern[0], unescape=False)
+        return None, 'regex', pattern
+
+    column, value = split_prefix(term)
+    if value.startswith(QUOTE):
+        return column, 'phrase', _strip_literal(value, QUOTE, unescape=True)
+    is_fuzzy, fuzzy_value = split_fuzzy(value)
+    if is_fuzzy:
+        return column, 'fuzzy', fuzzy_value
+    return column, 'text', value
+
+
+def _strip_literal(value, closing, unescape):
+    """
+    value の先頭の記号と、末尾の閉じる記号 (入力途中で無い場合もある) を取り除く。
+
+    unescape が True の場合は、バックスラッシュで始まる '\\"' を '"' にする。
+    """
+    body = value[1:]
+    if body.endswith(closing) and not body.endswith('\\' + closing):
+        body = body[:-1]
+    if unescape:
+        body = body.replace('\\' + closing, closing)
+    return body
+
+
+def split_fuzzy(value):
+    """
+    検索値があいまい検索 (先頭が ~) かどうかを判定する。
+
+    (例: '~Pyhton' -> (True, 'Pyhton'), 'Python' -> (False, 'Python'))
+    '~' だけの値は、通常の部分一致の検索値とする。
+
+    Returns:
+        tuple[bool, str]: (あいまい検索か, 検索値)。
+    """
+    if value.startswith(FUZZY_PREFIX) and value[len(FUZZY_PREFIX):].strip():
+        return True, value[len(FUZZY_PREFIX):].strip()
+    return False, value
+
+
+# --- 日付の範囲 ---
+# date: の値が次の形式の場合は、部分一致ではなく日付の範囲で検索する。
+#   date:20240101..20240331   date:2024-01..2024-03   date:2024..   date:..2023
+#   date:>=2024-10   date:<20240101   date:2024-10 (区切り文字付きの日付はその期間)
+#   date:last30d (今日を含む過去30日間。d: 日, w: 週, m: 月, y: 年)
+# 区切り文字のない数字だけの値 (date:202410 など) は、従来どおり部分一致で検索する。
+
+DATE_COMPACT_PATTERN = re.compile(r'^(\d{4})(?:(\d{2})(\d{2})?)?$')
+DATE_SEPARATED_PATTERN = re.compile(r'^(\d{4})[-/](\d{1,2})(?:[-/](\d{1,2}))?$')
+DATE_COMPARISON_PATTERN = re.compile(r'^(>=|<=|>|<|=)\s*(.+)$')
+DATE_RELATIVE_PATTERN = re.compile(r'^last(\d+)([dwmy])$', re.IGNORECASE)
+
+
+def _parse_date_period(text):
+    """
+    'YYYY' / 'YYYYMM' / 'YYYYMMDD' / 'YYYY-MM' / 'YYYY-MM-DD' を、その期間の最初と最後の日付にする。
+
+    Returns:
+        tuple[datetime.date, datetime.date] or None: (最初の日, 最後の日)。日付でない場合は None。
+    """
+    text = text.strip()
+    match = DATE_COMPACT_PATTERN.match(text) or DATE_SEPARATED_PATTERN.match(text)
+    if not match:
+        return None
+    year, month, day = (int(group) if group else None for group in match.groups())
+    try:
+        if month is None:
+            return datetime.date(year, 1, 1), datetime.date(year, 12, 31)
+        if day is None:
+            last_day = calendar.monthrange(year, month)[1]
+            return datetime.date(year, month, 1), datetime.date(year, month, last_day)
+        date = datetime.date(year, month, day)
+        return date, date
+    except ValueError:
+        return None
+
+
+def _months_before(date, months):
+    """date の months か月前の日付を返す (月末を超える日は月末にする)。"""
+    month_index = date.year * 12 + date.month - 1 - months
+    year, month = divmod(month_index, 12)
+    month += 1
+    return datetime.date(year, month, min(date.day, calendar.monthrange(year, month)[1]))
+
+
+def _date_int(date):
+    return date.year * 10000 + date.month * 100 + date.day
+
+
+def parse_date_range(value, today=None):
+    """
+    date: の値を日付の範囲 (YYYYMMDD の整数, 両端を含む) に変換する。
+
+    Args:
+        value (str): date: の値 (例: '20240101..20240331', '>=2024-10', 'last30d')。
+        today (datetime.date, optional): 相対的な日付 (last30d など) の基準日 (既定: 今日)。
+
+    Returns:
+        tuple[int, int] or None: (最初の日, 最後の日)。日付の範囲の形式でない場合は None。
+
+    Raises:
+        ValueError: 日付の範囲の形式だが、日付が正しくない場合。
+    """
+    value = value.strip()
+    min_date, max_date = 1, 99991231
+
+    match = DATE_RELATIVE_PATTERN.match(value)
+    if match:
+        today = today or datetime.date.today()
+        count, unit = int(match.group(1)), match.group(2).lower()
+        if count < 1:
+            raise ValueError(f"日付の指定が正しくありません: {value}")
+        if unit in ('d', 'w'):
+            start = today - datetime.timedelta(days=count * (7 if unit == 'w' else 1) - 1)
+        else:
+            start = _months_before(today, count * (12 if unit == 'y' else 1)) + datetime.timedelta(days=1)
+        return _date_int(start), _date_int(today)
+
+    if '..' in value:
+        start_text, end_text = (part.strip() for part in value.split('..', 1))
+        if not start_text and not end_text:
+            raise ValueError(f"日付の指定が正しくありません: {value}")
+        start, end = min_date, max_date
+        if start_text:
+            period = _parse_date_period(start_text)
+            if period is None:
+                raise ValueError(f"日付の指定が正しくありません: {start_text}")
+            start = _date_int(period[0])
+        if end_text:
+            period = _parse_date_period(end_text)
+            if period is None:
+                raise ValueError(f"日付の指定が正しくありません: {end_text}")
+            end = _date_int(period[1])
+        return start, end
+
+    match = DATE_COMPARISON_PATTERN.match(value)
+    if match:
+        operator, date_text = match.groups()
+        period = _parse_date_period(date_text)
+        if period is None:
+            raise ValueError(f"日付の指定が正しくありません: {date_text}")
+        first, last = period
+        return {
+            '>=': (_date_int(first), max_date),
+            '>': (_date_int(last + datetime.timedelta(days=1)), max_date),
+            '<=': (min_date, _date_int(last)),
+            '<': (min_date, _date_int(first - datetime.timedelta(days=1))),
+            '=': (_date_int(first), _date_int(last)),
+        }[operator]
+
+    if DATE_SEPARATED_PATTERN.match(value):
+        period = _parse_date_period(value)
+        if period is None:
+            raise ValueError(f"日付の指定が正しくありません: {value}")
+        return _date_int(period[0]), _date_int(period[1])
+    return None
+
+
+def date_range_mask(df, date_range, index=None):
+    """
+    日付が date_range (YYYYMMDD の整数の組, 両端を含む) に入る行の boolマスクを返す。
+
+    index (NoteIndex) があれば、日付順の索引を二分探索して求める。
+    """
+    start, end = date_range
+    if index is not None:
+        return index.date_mask(df, start, end)
+    if 'date_int' in df.columns:
+        date_ints = df['date_int']
+    else:
+        date_ints = pd.Series(parse_dates(df['date'])[0], index=df.index)
+    return (date_ints >= start) & (date_ints <= end)
+
+
+def tag_mask(df, value, index=None):
+    """
+    tag: の値 (parse_tag_pattern の形式) に一致するタグを持つ行の boolマスクを返す。
+
+    index (NoteIndex) があれば、タグごとのノートの一覧 (ポスティングリスト) から求める。
+    """
+    kind, name = parse_tag_pattern(value)
+    if index is not None:
+        return index.select(df, index.tag_mask(index.find_tags(kind, name)))
+
+    def matches(tags):
+        return any(tag_matches(kind, name, tag) for tag in tags.split(TAG_SEPARATOR) if tag)
+
+    column = df['tags']
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        # タグの組み合わせ (カテゴリ) ごとに1回だけ判定する
+        matched = np.array([matches(str(tags)) for tags in column.cat.categories], dtype=bool)
+        return pd.Series(matched[column.cat.codes.to_numpy()], index=df.index)
+    return column.astype(str).map(matches).astype(bool)
+
+
+@functools.lru_cache(maxsize=REGEX_CACHE_SIZE)
+def compile_pattern(pattern):
+    """
+    正規表現をコンパイルする (大文字小文字を区別しない)。同じ正規表現はコンパイルし直さない。
+
+    Raises:
+        ValueError: 正規表現が正しくない場合。
+    """
+    try:
+        return re.compile(pattern, re.IGNORECASE)
+    except re.error as e:
+        raise ValueError(f"正規表現が正しくありません: {pattern} ({e})") from e
+
+
+def regex_mask(df, column, pattern):
+    """
+    column 列が正規表現 pattern に一致する (大文字小文字を区別しない) 行の boolマスクを返す。
+
+    行ごとに判定するため、df は他の検索語で絞り込んでから渡すとよい
+    (parse_and_expression では、同じ AND 条件の他の検索語の後に評価する)。
+    カテゴリ型の列は、値の種類ごとに1回だけ判定する。
+    メモ・タイトル (索引に移した列) は、索引から行の値を取り出しながら判定する。
+    """
+    regex = compile_pattern(pattern)
+    index = get_note_index(df)
+    if index is not None:
+        mask = index.search(df, column, regex)
+        if mask is not None:
+            return mask
+    search = regex.search
+
+    def matches(values):
+        return np.fromiter(
+            (isinstance(value, str) and search(value) is not None for value in values),
+            dtype=bool, count=len(values)
+        )
+
+    values = df[column]
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        matched = matches([str(value) for value in values.cat.categories])
+        return pd.Series(matched[values.cat.codes.to_numpy()], index=df.index)
+    return pd.Series(matches(values.tolist()), index=df.index)
+
+
+def fuzzy_mask(df, column, term, index=None):
+    """
+    column 列 (タイトルまたはタグ) が term にあいまい一致する行の boolマスクを返す。
+
+    index (NoteIndex) があれば、読み込み時に作成した 2-gram の索引を使う。
+    無ければ、df の値 (タグはタグ名) の種類ごとに索引を作成して検索する。
+    """
+    if index is not None:
+        mask = index.fuzzy_mask(df, column, term)
+        if mask is not None:
+            return mask
+
+    if column == 'tags':
+        combinations = pd.unique(df['tags'].astype(str))
+        names = sorted({tag for tags in combinations for tag in tags.split(TAG_SEPARATOR) if tag})
+        matched_names = {names[value_id] for value_id in NgramIndex(names).search(term)}
+        matched = {
+            tags for tags in combinations
+            if any(tag in matched_names for tag in tags.split(TAG_SEPARATOR))
+        }
+        return df['tags'].astype(str).isin(matched)
+
+    codes, values = pd.factorize(text_column(df, column).astype(str))
+    matched = np.zeros(len(values), dtype=bool)
+    matched[NgramIndex(values).search(term)] = True
+    return pd.Series(matched[codes], index=df.index)
+
+
 def evaluate_simple_term(df, term):
     """
     プレフィックス検索、またはグローバル検索を実行する。
@@ -52,68 +435,75 @@ def evaluate_simple_term(df, term):
 
     Args:
         df (pd.DataFrame): 検索対象のDataFrame。
-        term (str): 単純な検索語 (例: 'Python', 'title:Python')。
+        term (str): 単純な検索語 (例: 'Python', 'title:Python', '"A B"', 're:py.*', '~Pyhton')。
 
     Returns:
         pd.Series: 検索条件に一致した行がTrueとなるboolマスク。
     """
-    search_fields_map = {
-            'title': 'title',
-            'key': 'key',
-            'date': 'date',
-            'tag': 'tags',
-            'tags': 'tags',  # 'tag'でも'tags'でも検索可
-            'memo': 'memo',
-            'cpkey': 'commonplace_key',
-            'indexkey': 'commonplace_key',
-            'ikey': 'commonplace_key'  # IndexKeyとその略称でも検索可
-    }
-
-    target_column = None
-    final_search_term = term
-
-    # プレフィックス (key:など) があるかチェック
-    if ':' in term:
-        parts = term.split(':', 1)
-        prefix = parts[0].lower().strip()
-        value = parts[1].strip()
-
-        if prefix in search_fields_map and value:
-            target_column = search_fields_map[prefix]
-            final_search_term = value
+    target_column, mode, value = parse_simple_term(term)
 
-    if not final_search_term:
+    if not value:
         # 検索語が空なら、何もヒットしないマスクを返す
-        return pd.Series([False] * len(df), index=df.index)
+        return pd.Series(False, index=df.index)
 
-    term_condition = pd.Series([False] * len(df), index=df.index)
+    term_condition = pd.Series(False, index=df.index)
+    index = get_note_index(df)
 
     if target_column:
         # --- プレフィックス検索: 指定された列のみ検索 ---
-        if target_column in df.columns:
-            # .str.contains() を使用して部分一致検索
-            term_condition = df[target_column].str.contains(
-                final_search_term, case=False, na=False, regex=False
-            )
+        columns = [target_column]
+    elif mode == 'fuzzy':
+        columns = FUZZY_SEARCH_COLUMNS
     else:
         # --- グローバル検索: 主要な列を検索 ---
-        term_condition = (
-            df['title'].str.contains(
-                final_search_term, case=False, na=False, regex=False) |
-            df['tags'].str.contains(
-                final_search_term, case=False, na=False, regex=False) |
-            df['key'].str.contains(
-                final_search_term, case=False, na=False, regex=False) |
-            df['memo'].str.contains(
-                final_search_term, case=False, na=False, regex=False) |
-            df['commonplace_key'].str.contains(
-                final_search_term, case=False, na=False, regex=False) |
-            df['date'].str.contains(
-                final_search_term, case=False, na=False, regex=False)
-        )
+        columns = GLOBAL_SEARCH_COLUMNS
+    if mode == 'fuzzy' and any(column not in FUZZY_SEARCH_COLUMNS for column in columns):
+        raise ValueError(f"あいまい検索 (~) の対象はタイトルとタグのみです: {term}")
+
+    for column in columns:
+        if has_column(df, column):
+            term_condition = term_condition | term_column_mask(
+                df, column, mode, value, index, scoped=target_column is not None
+            )
     return term_condition
 
 
+def term_column_mask(df, column, mode, value, index=None, scoped=True):
+    """
+    1つの列について、検索語 (parse_simple_term の結果) に一致する行の boolマスクを返す。
+
+    scoped が True (プレフィックス検索) の場合、タグはタグ単位で一致させ、
+    日付は範囲の指定 (date:2024-01..2024-03 など) を解釈する。
+    """
+    if mode == 'regex':
+        return regex_mask(df, column, value)
+    if mode == 'fuzzy':
+        # --- あいまい検索: タイトル・タグのみ (~Pyhton, title:~Pyhton, tag:~Pyhton) ---
+        return fuzzy_mask(df, column, value, index)
+    if scoped and column == 'date' and mode == 'text':
+        # --- 日付の範囲 (date:2024-01..2024-03 など) ---
+        date_range = parse_date_range(value)
+        if date_range is not None:
+            return date_range_mask(df, date_range, index)
+    if scoped and column == 'tags':
+        # --- タグ: タグ単位の一致 (tag:Program, tag:Program/*, tag:*py*) ---
+        return tag_mask(df, value, index)
+    return column_contains(df, column, value, index)
+
+
+def column_contains(df, column, term, index=None):
+    """
+    column 列が term を部分一致で含む (大文字小文字を区別しない) 行の boolマスクを返す。
+
+    index (NoteIndex) に column の索引があればそれを使い、無ければ .str.contains() で検索する。
+    """
+    if index is not None:
+        mask = index.contains(df, column, term)
+        if mask is not None:
+            return mask
+    return text_column(df, column).str.contains(term, case=False, na=False, regex=False)
+
+
 def parse_term(df, query):
     """
     括弧、NOT(ハイフン)、または単純な検索語を処理する。
@@ -148,6 +538,10 @@ def parse_and_expression(df, query):
 
     AND は OR よりも優先順位が高い。
     (例: 'A AND B AND C')
+    検索語は plan_and_terms の順 (一致する行が少ないと見込まれる順) に評価し、
+    一致した行が十分に減った後の検索語と、正規表現の検索語は、
+    それまでの条件に一致した行だけを対象に評価する。
+    一致する行が無くなった時点で、残りの検索語は評価しない。
 
     Args:
         df (pd.DataFrame): 検索対象のDataFrame。
@@ -157,13 +551,125 @@ def parse_and_expression(df, query):
         pd.Series: クエリに一致した行がTrueとなるboolマスク。
     """
     and_parts = split_respecting_parens(query, ' AND ')
+    if len(and_parts) == 1:
+        return parse_term(df, and_parts[0])
+
+    # AND は「積」なので、Trueのマスクで初期化し、一致した行だけを次の検索語の対象にする
+    candidates = df
+    mask = pd.Series(True, index=df.index)
+    count = len(df)
+    for part in plan_and_terms(df, and_parts):
+        if count < len(candidates) and (
+                count <= len(candidates) * SUBSET_MAX_FRACTION or is_regex_term(part)):
+            candidates = candidates[mask]
+            mask = pd.Series(True, index=candidates.index)
+        mask &= parse_term(candidates, part)
+        count = int(mask.sum())
+        if count == 0:
+            return pd.Series(False, index=df.index)
+    if candidates is df:
+        return mask
+    return pd.Series(df.index.isin(candidates.index[mask.to_numpy()]), index=df.index)
+
+
+def is_regex_term(term):
+    """term が正規表現の検索語 (NOT 付きを含む。括弧は含まない) かを返す。"""
+    term = term.strip()
+    if term.startswith('-'):
+        term = term[1:].strip()
+    if term.startswith('(') and term.endswith(')'):
+        return False
+    return parse_simple_term(term)[1] == 'regex'
+
+
+# ======================================================================
+# --- 検索語の評価順 (クエリプランナー) ---
+# 索引の統計 (タグ・日付・IndexKey ごとの件数) から各検索語に一致する行の割合を見積もり、
+# AND は割合の小さい検索語から、OR は大きい式から評価する。後の検索語ほど対象の行が減る。
+# 見積もりの際にすべての検索語を解釈するため、途中で評価を打ち切った場合も
+# 正しくない日付・正規表現はエラーになる。
+# ======================================================================
+
+# 統計から見積もれない検索語 (タイトル・メモの部分一致など) の一致する行の割合
+UNKNOWN_SELECTIVITY = 0.5
+# 評価の対象の行がこの割合以下に減った場合に、その行だけの DataFrame にして次の検索語を評価する
+# (DataFrame の作成にも時間がかかり、索引を使う検索は行がこれより多いと速くならないため)
+SUBSET_MAX_FRACTION = INDEX_MIN_FRACTION
+
+
+def plan_and_terms(df, and_parts):
+    """
+    AND で結合された検索語を、評価する順に並べ替えて返す。
+
+    一致する行の割合の見積もり (estimate_term) が小さい順。
+    正規表現の検索語は行ごとに判定するため、割合によらず最後にする。
+    見積もりが同じ場合は、クエリに書かれた順。
+    """
+    keys = [(is_regex_term(part), estimate_term(df, part)) for part in and_parts]
+    order = sorted(range(len(and_parts)), key=lambda position: keys[position])
+    return [and_parts[position] for position in order]
+
+
+def estimate_selectivity(df, query):
+    """
+    クエリ (OR・AND・括弧を含む) に一致する行の割合 (0〜1) を見積もる。
+
+    AND の各検索語は独立とみなして掛け合わせ、OR は足し合わせる (1 を上限とする)。
 
-    # AND は「積」なので、Trueのマスクで初期化
-    mask = pd.Series([True] * len(df), index=df.index)
+    Raises:
+        ValueError: 日付の範囲・正規表現が正しくない場合。
+    """
+    total = 0.0
+    for or_part in split_respecting_parens(query, ' OR '):
+        selectivity = 1.0
+        for part in split_respecting_parens(or_part, ' AND '):
+            selectivity *= estimate_term(df, part)
+        total += selectivity
+    return min(1.0, total)
+
+
+def estimate_term(df, term):
+    """括弧・NOT (-) の付いた検索語を含め、1つの検索語に一致する行の割合を見積もる。"""
+    term = term.strip()
+    is_not = term.startswith('-')
+    if is_not:
+        term = term[1:].strip()
+    if term.startswith('(') and term.endswith(')'):
+        selectivity = estimate_selectivity(df, term[1:-1])
+    else:
+        selectivity = _estimate_simple_term(df, term)
+    return 1.0 - selectivity if is_not else selectivity
 
-    for part in and_parts:
-        mask &= parse_term(df, part)
-    return mask
+
+def _estimate_simple_term(df, term):
+    """
+    単純な検索語に一致する行の割合を、索引 (NoteIndex) の統計から見積もる。
+
+    タグ・日付の範囲・IndexKey と日付の部分一致は件数から求め、
+    それ以外 (および索引が無い場合) は UNKNOWN_SELECTIVITY とする。
+    """
+    column, mode, value = parse_simple_term(term)
+    if not value:
+        return 0.0
+    # 評価の前に解釈しておき、正しくない指定はここでエラーにする
+    if mode == 'regex':
+        compile_pattern(value)
+    date_range = parse_date_range(value) if column == 'date' and mode == 'text' else None
+
+    index = get_note_index(df)
+    if index is None or not index.size or mode not in ('text', 'phrase'):
+        return UNKNOWN_SELECTIVITY
+    if column == 'tags':
+        rows = index.count_tag_rows(index.find_tags(*parse_tag_pattern(value)))
+    elif date_range is not None:
+        rows = index.count_date_rows(*date_range)
+    elif column is not None:
+        rows = index.count_category_rows(column, value)
+    else:
+        rows = None
+    if rows is None:
+        return UNKNOWN_SELECTIVITY
+    return min(1.0, rows / index.size)
 
 
 def parse_or_expression(df, query):
@@ -171,6 +677,8 @@ def parse_or_expression(df, query):
     OR 演算子で式を結合する (最上位の演算)。
 
     (例: '(A AND B) OR C')
+    一致する行が多いと見込まれる式から評価し、一致した行が十分に増えた後の式は、
+    それまでの式に一致しなかった行だけを対象に評価する。
 
     Args:
         df (pd.DataFrame): 検索対象のDataFrame。
@@ -180,11 +688,180 @@ def parse_or_expression(df, query):
         pd.Series: クエリに一致した行がTrueとなるboolマスク。
     """
     or_parts = split_respecting_parens(query, ' OR ')
+    if len(or_parts) == 1:
+        return parse_and_expression(df, or_parts[0])
 
-    # OR は「和」なので、Falseのマスクで初期化
-    mask = pd.Series([False] * len(df), index=df.index)
+    estimates = [estimate_selectivity(df, part) for part in or_parts]
+    order = sorted(range(len(or_parts)), key=lambda position: -estimates[position])
 
-    for part in or_parts:
+    # OR は「和」なので、Falseのマスクで初期化し、まだ一致していない行だけを次の式の対象にする
+    remaining = df
+    mask = pd.Series(False, index=df.index)
+    matched_rows = []  # 対象から除いた、一致した行のインデックス
+    for position in order:
         # 各パーツを AND 式として評価 (ANDが優先されるため)
-        mask |= parse_and_expression(df, part)
-    return mask
+        mask |= parse_and_expression(remaining, or_parts[position])
+        count = int(mask.sum())
+        if count == len(remaining):
+            return pd.Series(True, index=df.index)
+        if len(remaining) - count <= len(remaining) * SUBSET_MAX_FRACTION:
+            matched_rows.append(remaining.index[mask.to_numpy()])
+            remaining = remaining[~mask]
+            mask = pd.Series(False, index=remaining.index)
+    if remaining is df:
+        return mask
+    matched_rows.append(remaining.index[mask.to_numpy()])
+    return pd.Series(df.index.isin(np.concatenate(matched_rows)), index=df.index)
+
+
+def search_notes(df, query_text, selected_keys=None):
+    """
+    IndexKey フィルターと検索クエリを適用し、該当するノートのDataFrameを返す。
+
+    GUI (Synapsen_Nexus_main.perform_search) と
+    CLI / ライブラリ (nexus_query.NexusQuery) で同じ検索結果になるよう、
+    検索の手順はこの関数にまとめる。
+
+    Args:
+        df (pd.DataFrame): 検索対象のDataFrame。
+        query_text (str): 検索クエリ (空の場合は IndexKey フィルターのみ適用)。
+        selected_keys (list[str], optional):
+            絞り込む IndexKey のリスト。空または None の場合は絞り込まない。
+
+    Returns:
+        pd.DataFrame: 条件に一致したノートのDataFrame。
+
+    Raises:
+        Exception: 検索クエリの評価に失敗した場合。
+    """
+    # 1. IndexKey フィルターを適用
+    filtered_df = filter_by_keys(df, selected_keys)
+
+    # 2. 検索クエリを適用
+    query_text = query_text.strip()
+    if query_text:
+        final_mask = parse_or_expression(filtered_df, query_text)
+        filtered_df = filtered_df[final_mask]
+
+    return filtered_df
+
+
+def filter_by_keys(df, selected_keys):
+    """
+    IndexKey が selected_keys のいずれかであるノートに絞り込む。
+
+    selected_keys が空または None の場合は、df をそのまま返す。
+    """
+    if not selected_keys:
+        return df
+    return df[df['commonplace_key'].isin(selected_keys)]
+
+
+# ======================================================================
+# --- 絞り込み検索 ---
+# 入力中のクエリが前回のクエリを絞り込んだもの (例: 'A' -> 'A AND B', 'Pyth' -> 'Python')
+# であれば、前回の検索結果だけを対象に評価する。
+# ======================================================================
+
+def term_narrows(old_term, new_term):
+    """
+    検索語 new_term の結果が、必ず old_term の結果に含まれるかを返す。
+
+    同じ検索語か、同じ列を対象とする (NOT・括弧のない) 部分一致 (フレーズを含む) の検索語で、
+    old_term の値が new_term の値に含まれる場合に True を返す
+    (日付の範囲・タグ・あいまい検索・正規表現の検索語は、同じ検索語の場合のみ True)。
+    """
+    old_term, new_term = old_term.strip(), new_term.strip()
+    if old_term == new_term:
+        return True
+    if any(t.startswith(('-', '(')) for t in (old_term, new_term)):
+        return False
+    old_column, old_mode, old_value = parse_simple_term(old_term)
+    new_column, new_mode, new_value = parse_simple_term(new_term)
+    if any(mode not in ('text', 'phrase') for mode in (old_mode, new_mode)):
+        return False  # あいまい検索は許す編集距離が検索語の長さで変わり、正規表現は包含関係が分からない
+    if 'date' in (old_column, new_column) and any(
+            _is_date_range(value) for value in (old_value, new_value)):
+        return False  # 日付の範囲は部分一致とは包含関係が異なる
+    if 'tags' in (old_column, new_column):
+        return False  # タグはタグ単位の一致のため、部分一致の包含関係は成り立たない
+    # str.contains(case=False) は upper() で比較するため、それに合わせる
+    return old_column == new_column and old_value.upper() in new_value.upper()
+
+
+def _is_date_range(value):
+    try:
+        return parse_date_range(value) is not None
+    except ValueError:
+        return True
+
+
+def is_refinement(old_query, new_query):
+    """
+    new_query の検索結果が、必ず old_query の検索結果に含まれるかを返す。
+
+    どちらもトップレベルに OR を含まず、old_query の各 AND 条件について、
+    それを絞り込んだ条件が new_query に含まれる場合に True を返す。
+    """
+    old_query, new_query = old_query.strip(), new_query.strip()
+    if not old_query:
+        return True  # 前回は全件
+    if not new_query:
+        return False
+    if len(split_respecting_parens(old_query, ' OR ')) != 1 \
+            or len(split_respecting_parens(new_query, ' OR ')) != 1:
+        return False
+    new_parts = split_respecting_parens(new_query, ' AND ')
+    return all(
+        any(term_narrows(old_part, new_part) for new_part in new_parts)
+        for old_part in split_respecting_parens(old_query, ' AND ')
+    )
+
+
+class IncrementalSearch:
+    """
+    前回の検索結果を覚えておき、絞り込みの検索では前回の結果だけを評価する。
+
+    IndexKey フィルターは、クエリに一致したノート (last_matches) に最後に適用する。
+    そのため IndexKey の選択だけを変えた場合も前回の結果を絞り込むだけで済み、
+    IndexKey ごとの件数 (絞り込み候補) も last_matches から求められる。
+    DataFrame が差し替えられた場合 (CSVの再読み込みなど) は全件を評価する。
+
+    Attributes:
+        last_matches (pd.DataFrame or None): 前回の検索でクエリに一致したノート (IndexKey で絞り込む前)。
+        last_was_refinement (bool): 前回の検索が、その前の結果を絞り込んだものか。
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """前回の検索結果を破棄する。"""
+        self._last = None  # (DataFrame, クエリ)
+        self.last_matches = None
+        self.last_was_refinement = False
+
+    def search(self, df, query_text, selected_keys=None):
+        """
+        search_notes と同じ結果を返す。
+
+        Args:
+            df (pd.DataFrame): 検索対象のDataFrame。
+            query_text (str): 検索クエリ。
+            selected_keys (list[str], optional): 絞り込む IndexKey のリスト。
+
+        Returns:
+            pd.DataFrame: 条件に一致したノートのDataFrame。
+        """
+        query_text = query_text.strip()
+
+        base_df = df
+        self.last_was_refinement = False
+        if self._last is not None:
+            last_df, last_query = self._last
+            if last_df is df and is_refinement(last_query, query_text):
+                base_df = self.last_matches
+                self.last_was_refinement = True
+
+        self.last_matches = search_notes(base_df, query_text)
+        self._last = (df, query_text)
+        return filter_by_keys(self.last_matches, selected_keys)
@@ -0,0 +1,208 @@
+import os
+import hashlib
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import perf_trace
+
+# ======================================================================
+# --- 検索結果のサムネイル ---
+# ノートの最初のページを縮小した PNG 画像を、
+# バックグラウンドのスレッドで先読みしてメモリとディスクにキャッシュする。
+#
+# キャッシュのキーは (PDFのパス, 更新日時, サイズ, ページ, 幅) なので、
+# PDFが更新されると自動的に作り直される。
+# ======================================================================
+
+THUMBNAIL_DIR_NAME = "thumbnails"
+
+
+class ThumbnailCache:
+    """
+    サムネイルの先読みとキャッシュ (メモリ: 件数の上限付き LRU / ディスク: 容量の上限付き)。
+
+    Attributes:
+        renderer (PageRenderer): ページの描画に使う。
+        width (int): サムネイルの幅 [px]。
+    """
+
+    def __init__(self, renderer, cache_dir=None, width=48, memory_cache_size=500,
+                 disk_cache_mb=100, workers=2):
+        """
+        Args:
+            renderer (PageRenderer): ページの描画に使う。
+            cache_dir (Path, optional): キャッシュの保存先 (省略時はディスクに保存しない)。
+            width (int): サムネイルの幅 [px]。
+            memory_cache_size (int): メモリに保持するサムネイルの数。
+            disk_cache_mb (int): ディスクに保存するサムネイルの合計容量 [MB]。
+            workers (int): 先読みに使うスレッドの数。
+        """
+        self.renderer = renderer
+        self.width = width
+        self.memory_cache_size = memory_cache_size
+        self.disk_cache_bytes = disk_cache_mb * 1024 * 1024
+        self.disk_dir = Path(cache_dir) / THUMBNAIL_DIR_NAME if cache_dir else None
+
+        self._memory = OrderedDict()  # キャッシュのキー -> PNG (bytes)
+        self._latest = OrderedDict()  # 呼び出し側のトークン -> 最後に読み込んだキャッシュのキー (LRU)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._disk_bytes = 0
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="thumbnail"
+        )
+        if self.disk_dir:
+            self._executor.submit(self._prune_disk)
+
+    def peek(self, token):
+        """
+        token のサムネイルがメモリにあれば返す (PDFの確認をしないため、UIスレッドから呼べる)。
+
+        Returns:
+            bytes or None: PNG 画像。
+        """
+        with self._lock:
+            key = self._latest.get(token)
+            if key is None:
+                return None
+            self._latest.move_to_end(token)
+            return self._memory.get(key)
+
+    def prefetch(self, items, resolve, on_ready):
+        """
+        items のサムネイルをバックグラウンドで読み込む。
+
+        前回の prefetch で未処理のものは取り消す (スクロールで表示範囲が変わった場合など)。
+
+        Args:
+            items (list[tuple]): (トークン, ノートのデータ) のリスト。先頭から順に読み込む。
+            resolve (callable):
+                ノートのデータから (PDFのパス, ページ番号 (0始まり), ...) を返す関数。
+                PDFが見つからない場合は None を返す。
+            on_ready (callable):
+                on_ready(トークン, PNG 画像) の形で、読み込んだスレッドから呼び出される。
+        """
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        for token, note_data in items:
+            self._executor.submit(self._load, generation, token, note_data, resolve, on_ready)
+
+    def shutdown(self):
+        """未処理の先読みを取り消し、スレッドを終了する。"""
+        with self._lock:
+            self._generation += 1
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _load(self, generation, token, note_data, resolve, on_ready):
+        if generation != self._generation:
+            return  # 取り消された
+        try:
+            location = resolve(note_data)
+            if location is None:
+                return
+            pdf_path, page_index = location[0], location[1]
+            key = self._cache_key(pdf_path, page_index)
+            png = self._get(key, pdf_path, page_index)
+        except Exception as e:
+            print(f"サムネイルの作成に失敗しました ({token}): {e}")
+            return
+        with self._lock:
+            self._latest[token] = key
+            self._latest.move_to_end(token)
+            # メモリに残るサムネイルより多くのトークンは覚えておいても使えない
+            while len(self._latest) > self.memory_cache_size:
+                self._latest.popitem(last=False)
+        on_ready(token, png)
+
+    def get(self, pdf_path, page_index):
+        """
+        サムネイルを メモリ → ディスク → 描画 の順に取得して返す。
+
+        Returns:
+            bytes: PNG 画像。
+        """
+        return self._get(self._cache_key(pdf_path, page_index), pdf_path, page_index)
+
+    def _get(self, key, pdf_path, page_index):
+        with self._lock:
+            png = self._memory.get(key)
+            if png is not None:
+                self._memory.move_to_end(key)
+                perf_trace.count("nexus.thumbnail_memory_hit")
+                return png
+
+        png = self._read_disk(key)
+        if png is None:
+            perf_trace.count("nexus.thumbnail_render")
+            png = self.renderer.render_thumbnail(pdf_path, page_index, self.width)
+            self._write_disk(key, png)
+        else:
+            perf_trace.count("nexus.thumbnail_disk_hit")
+
+        with self._lock:
+            self._memory[key] = png
+            while len(self._memory) > self.memory_cache_size:
+                self._memory.popitem(last=False)
+        return png
+
+    def _cache_key(self, pdf_path, page_index):
+        stat = os.stat(pdf_path)
+        fingerprint = f"{Path(pdf_path).resolve()}|{stat.st_mtime_ns}|{stat.st_size}|{page_index}|{self.width}"
+        return hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()
+
+    # --- ディスクのキャッシュ ---
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self.disk_dir / f"{key}.png"
+        try:
+            png = path.read_bytes()
+            os.utime(path)  # 最近使ったものとして、削除の対象から外す
+            return png
+        except OSError:
+            return None
+
+    def _write_disk(self, key, png):
+        if not self.disk_dir:
+            return
+        path = self.disk_dir / f"{key}.png"
+        try:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            temp_path.write_bytes(png)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"サムネイルの保存に失敗しました ({path}): {e}")
+            return
+        with self._lock:
+            self._disk_bytes += len(png)
+            over_limit = self._disk_bytes > self.disk_cache_bytes
+        if over_limit:
+            self._prune_disk()
+
+    def _prune_disk(self):
+        """ディスクのキャッシュが上限を超えていれば、古いものから削除する。"""
+        try:
+            entries = []
+            for path in self.disk_dir.glob("*.png"):
+                stat = path.stat()
+                entries.append((stat.st_mtime, stat.st_size, path))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        # 削除を繰り返さないよう、上限の 8 割まで減らす
+        target = self.disk_cache_bytes * 0.8 if total > self.disk_cache_bytes else total
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_bytes = total
@@ -1,345 +1,182 @@
-import os
-import sys
 import customtkinter as ctk
-import pandas as pd
-import configparser
 import webbrowser
 import re
-import re
 from pathlib import Path
 from tkinter import messagebox
 
+from pdf_locator import locate_pdf
 
-def load_app_config(base_path):
-    """
-    config.ini ファイルを読み込み、設定値の辞書を返す。
-
-    Args:
-        base_path (Path): アプリケーションの基準パス (main.pyまたは実行ファイルの位置)。
-
-    Returns:
-        dict: 読み込まれた設定値の辞書。
-               (キー:
-                'pdf_root_folder',
-                'key_icons',
-                'key_colors',
-
-                'commonplace_keys_options',
-                'predefined_tags',
-                'default_csv_path')
-
-    Raises:
-        FileNotFoundError: config.ini が見つからない場合。
-        Exception: その他の設定読み込みエラー。
-    """
-    # .exe実行かスクリプト実行かで config.ini の場所を切り替える
-    if getattr(sys, 'frozen', False):
-        # .exe実行の場合（config.ini は .exe と同じフォルダ）
-        config_path = base_path / 'config.ini'
-    else:
-        # スクリプト実行の場合（config.ini は .py の1つ上のフォルダ）
-        config_path = base_path.parent / 'config.ini'
-
-    config_path = config_path.resolve()  # 絶対パスに正規化
-    print(f"[DEBUG] Loading config from: {config_path}")
 
-    if not config_path.is_file():
-        raise FileNotFoundError(f"config.iniが見つかりません: {config_path}")
+LINK_PATTERN = re.compile(r"\[\[(.*?)\]\]")
+LINK_COLOR = "#63B8FF"
 
-    try:
-        parser = configparser.ConfigParser(interpolation=None)
-        parser.read(config_path, encoding='utf-8')
-
-        config_data = {}
-
-        # [Paths]
-        pdf_root_path_str = parser.get('Paths', 'pdf_root_folder', fallback='')
-        if pdf_root_path_str:
-            # 環境変数を展開（%LOCALAPPDATA% など）
-            pdf_root_path = Path(os.path.expandvars(pdf_root_path_str))
-            if not pdf_root_path.is_absolute():
-                # config.iniからの相対パスは、config.ini自身からの相対とみなす
-                pdf_root_path = config_path.parent / pdf_root_path
-            config_data['pdf_root_folder'] = pdf_root_path.resolve()
-        else:
-            config_data['pdf_root_folder'] = None
-
-        # [KeyIcons]
-        if parser.has_section('KeyIcons'):
-            config_data['key_icons'] = {
-                k.lower(): v for k, v in parser.items('KeyIcons')
-            }
-        else:
-            config_data['key_icons'] = {}
-
-        # [KeyColors]
-        if parser.has_section('KeyColors'):
-            config_data['key_colors'] = {
-                k.lower(): v for k, v in parser.items('KeyColors')
-            }
-        else:
-            config_data['key_colors'] = {}
-
-        # [CommonplaceKeys]
-        if parser.has_section('CommonplaceKeys'):
-            keys_str = parser.get('CommonplaceKeys', 'options', fallback='')
-            config_data['commonplace_keys_options'] = [
-                key.strip() for key in keys_str.split(',') if key.strip()
-            ]
-        else:
-            config_data['commonplace_keys_options'] = []
-
-        # タグリストの読み込み ([Paths] 'tags_data_path')
-        config_data['predefined_tags'] = []
-        tags_path_from_config = parser.get(
-            'Paths', 'tags_data_path', fallback=''
-            )
-        if tags_path_from_config:
-            # 環境変数を展開
-            tags_data_path = Path(os.path.expandvars(tags_path_from_config))
-            if not tags_data_path.is_absolute():
-                # config.iniからの相対パスは、config.ini自身からの相対とみなす
-                tags_data_path = config_path.parent / tags_data_path
 
-            try:
-                if tags_data_path.is_file():
-                    with open(tags_data_path, "r", encoding="utf-8") as f:
-                        config_data['predefined_tags'] = \
-                            sorted([line.strip() for line in f if line.strip() and not line.startswith('#')])
-            except Exception as e:
-                print(f"tags.txtの読み込み中にエラー: {e}")
-
-        # デフォルトCSVパスの読み込み ([Paths] 'default_csv_path')
-        default_csv_path_str = parser.get(
-            'Paths', 'default_csv_path', fallback=''
-            )
-        if default_csv_path_str:
-            # 環境変数を展開
-            csv_path = Path(os.path.expandvars(default_csv_path_str))
-            if not csv_path.is_absolute():
-                # config.iniからの相対パスは、config.ini自身からの相対とみなす
-                csv_path = config_path.parent / csv_path
-            config_data['default_csv_path'] = csv_path.resolve()
-        else:
-            config_data['default_csv_path'] = None
-
-        return config_data
-
-    except Exception as e:
-        # エラーをラップして再度発生させ、呼び出し元 (main.py) で処理する
-        raise Exception(f"config.iniの読み込みに失敗しました: {e}")
-
-
-def load_csv_data_file(filepath):
+class MemoView(ctk.CTkTextbox):
     """
-    指定されたパスから目次CSVファイルを読み込み、DataFrameを返す。
-    必須列は文字列型(str)に変換する。
+    メモを表示する読み取り専用のテキスト欄。
 
-    Args:
-        filepath (str or Path): 読み込むCSVファイルのパス。
-
-    Returns:
-        pd.DataFrame: 読み込まれたデータ。
-
-    Raises:
-        Exception: CSVファイルの読み込みまたは処理に失敗した場合。
+    [[key]] リンクはクリック可能な範囲 (タグ "link") として1つのテキストに埋め込むため、
+    ノートを切り替えてもウィジェットを作り直さずに済む。
     """
-    try:
-        df = pd.read_csv(filepath, encoding='utf-8-sig').fillna('')
-        df.columns = df.columns.str.strip()
-
-        # 検索対象となる主要な列を文字列型(str)として明示的に変換
-        # これにより、数値キーなどが検索できなくなる問題を回避する
-        for col in ['tags', 'key', 'memo', 'title', 'commonplace_key', 'date']:
-            if col in df.columns:
-                df[col] = df[col].astype(str)
-            else:
-                # 必須列がない場合は空の列を追加
-                df[col] = ''
-
-        return df
-    except Exception as e:
-        # エラーをラップして呼び出し元 (main.py) で処理する
-        raise Exception(f"CSVファイルの読み込みに失敗しました:\n{filepath}\n\n{e}")
-
-
-def build_memo_display(parent_frame, memo_text, df, open_preview_callback, frame_width=450):
+    def __init__(self, master, open_preview_callback, **kwargs):
+        """
+        Args:
+            master: 親ウィジェット。
+            open_preview_callback (callable):
+                リンククリック時に呼び出すコールバック関数。
+                (例: lambda key: app.open_preview_window(key))
+        """
+        super().__init__(master, wrap="word", **kwargs)
+        self.open_preview_callback = open_preview_callback
+        self._link_keys = {}  # リンクの開始位置 ("行.列") -> リンク先の key
+
+        self.tag_config("link", foreground=LINK_COLOR, underline=True)
+        self.tag_bind("link", "<Button-1>", self._on_link_click)
+        self.tag_bind("link", "<Enter>", lambda e: self._textbox.configure(cursor="hand2"))
+        self.tag_bind("link", "<Leave>", lambda e: self._textbox.configure(cursor=""))
+        self.configure(state="disabled")
+
+    def show_memo(self, memo_text, df):
+        """
+        メモテキストを表示する。
+
+        Args:
+            memo_text (str): 表示するメモテキスト。
+            df (pd.DataFrame): ノート全体のDataFrame (リンク先のタイトル検索用)。
+        """
+        self.configure(state="normal")
+        self.delete("1.0", "end")
+        self._link_keys.clear()
+
+        last_index = 0
+        for match in LINK_PATTERN.finditer(memo_text):
+            # 1. リンクより前のテキスト部分
+            self.insert("end", memo_text[last_index:match.start()])
+
+            # 2. リンク部分
+            full_match_content = match.group(1).strip()
+            # 'key' または 'key: title' の 'key' の部分を取得
+            link_key = full_match_content.split(':')[0].strip()
+
+            display_text = f"[[{link_key} (ノート不明)]]"
+            if df is not None and not df.empty:
+                # key列でリンク先ノートを検索
+                linked_note_row = df[df['key'] == link_key]
+                if not linked_note_row.empty:
+                    from note_table import get_note
+                    note_title = get_note(df, linked_note_row.index[0]).get('title', '（タイトルなし）')
+                    display_text = f"[[{link_key}: {note_title}]]"
+
+            self._link_keys[self.index("end-1c")] = link_key
+            self.insert("end", display_text, "link")
+            last_index = match.end()
+
+        # 3. 最後のリンク以降のテキスト部分
+        self.insert("end", memo_text[last_index:])
+        self.configure(state="disabled")
+
+    def clear(self):
+        """表示を空にする。"""
+        self.show_memo("", None)
+
+    def _on_link_click(self, event):
+        index = self._textbox.index(f"@{event.x},{event.y}")
+        link_range = self.tag_prevrange("link", f"{index}+1c")
+        if link_range:
+            link_key = self._link_keys.get(str(link_range[0]))
+            if link_key:
+                self.open_preview_callback(link_key)
+
+
+class ReferenceList(ctk.CTkScrollableFrame):
     """
-    メモテキストを解析し、[[key]]リンクをクリック可能なラベルとして
-    指定された親フレーム内に動的に構築する。
+    引用元ノートのクリック可能なリスト。
 
-    Args:
-        parent_frame (ctk.CTkFrame or ctk.CTkScrollableFrame):
-            ラベルを配置する親ウィジェット。
-        memo_text (str): 解析対象のメモテキスト。
-        df (pd.DataFrame): ノート全体のDataFrame (リンク先のタイトル検索用)。
-        open_preview_callback (callable):
-            リンククリック時に呼び出すコールバック関数。
-            (例: lambda key: app.open_preview_window(key))
-        frame_width (int, optional):
-            テキストを折り返すための基準幅。デフォルトは450。
+    行 (アイコンとタイトルのラベル) は使い回し、件数が増えた場合にのみ追加で作成する。
     """
-    # 既存のウィジェットをクリア
-    for widget in parent_frame.winfo_children():
-        widget.destroy()
-
-    pattern = re.compile(r"\[\[(.*?)\]\]")
-    last_index = 0
-
-    # ラベルを配置するための内部コンテナ
-    # (parent_frame が ScrollableFrame の場合、その中身として機能する)
-    content_frame = ctk.CTkFrame(parent_frame, fg_color="transparent")
-    content_frame.pack(fill="both", expand=True)
-
-    for match in pattern.finditer(memo_text):
-        # 1. リンクより前のテキスト部分
-        if non_link_text := memo_text[last_index:match.start()]:
-            label = ctk.CTkLabel(
-                content_frame, text=non_link_text,
-                wraplength=frame_width, justify="left", anchor="w"
-                )
-            label.pack(fill="x", padx=2, pady=0)
-
-        # 2. リンク部分
-        full_match_content = match.group(1).strip()
-        # 'key' または 'key: title' の 'key' の部分を取得
-        link_key = full_match_content.split(':')[0].strip()
-
-        display_text = f"[[{link_key} (ノート不明)]]"
-        if df is not None and not df.empty:
-            # key列でリンク先ノートを検索
-            linked_note_row = df[df['key'] == link_key]
-            if not linked_note_row.empty:
-                note_title = linked_note_row.iloc[0].get('title', '（タイトルなし）')
-                display_text = f"[[{link_key}: {note_title}]]"
-
-        link_label = ctk.CTkLabel(
-            content_frame, text=display_text, text_color="#63B8FF",
-            cursor="hand2", wraplength=frame_width, justify="left", anchor="w"
+    def __init__(self, master, open_preview_callback, label_text="このノートを引用", **kwargs):
+        """
+        Args:
+            master: 親ウィジェット。
+            open_preview_callback (callable):
+                リンククリック時に呼び出すコールバック関数。
+                (例: lambda key: app.open_preview_window(key))
+            label_text (str): 引用元を表示する前の見出し。
+        """
+        super().__init__(master, label_text=label_text, **kwargs)
+        self.open_preview_callback = open_preview_callback
+        self.default_label_text = label_text
+        self._rows = []  # [(item_frame, icon_label, text_label)]
+        self._keys = []  # 各行に表示中のノートの key
+        self._visible_count = 0
+
+    def show_references(self, backlinks_df, key_icons, key_colors):
+        """
+        引用元DataFrameの内容を表示する。
+
+        Args:
+            backlinks_df (pd.DataFrame): 引用元ノートのDataFrame。
+            key_icons (dict): IndexKeyのアイコン辞書。
+            key_colors (dict): IndexKeyの色辞書。
+        """
+        self.configure(label_text=f"このノートを引用 ({len(backlinks_df)}件)")
+
+        self._keys = []
+        for position, (_, row) in enumerate(backlinks_df.iterrows()):
+            if position == len(self._rows):
+                self._rows.append(self._create_row(position))
+            item_frame, icon_label, text_label = self._rows[position]
+
+            cp_key = str(row.get("commonplace_key", "")).lower()
+            icon_label.configure(
+                text=key_icons.get(cp_key, '•'), text_color=key_colors.get(cp_key, 'gray')
             )
-        link_label.pack(fill="x", padx=2, pady=0)
-        # リンクにクリックイベントをバインド
-        link_label.bind(
-            "<Button-1>", lambda e, k=link_key: open_preview_callback(k)
-            )
-
-        last_index = match.end()
-
-    # 3. 最後のリンク以降のテキスト部分
-    if remaining_text := memo_text[last_index:]:
-        label = ctk.CTkLabel(
-            content_frame, text=remaining_text,
-            wraplength=frame_width, justify="left", anchor="w"
-            )
-        label.pack(fill="x", padx=2, pady=0)
-
-
-def find_backlinks_df(df, current_key):
-    """
-    DataFrame全体を検索し、指定されたkeyにリンクしている
-    ノート（引用元）のDataFrameを返す。
-
-    Args:
-        df (pd.DataFrame): 検索対象のDataFrame。
-        current_key (str): 検索対象のノートのキー。
-
-    Returns:
-        pd.DataFrame: 引用元ノートを含むDataFrame。
-    """
-    if df is None or 'memo' not in df.columns or not current_key:
-        return pd.DataFrame()
-
-    # [[key]] または [[key:title...]] にマッチする正規表現
-    # ( \[\[ で [[ をエスケープ, r'[:\]]' で : または ] が続くものにマッチ )
-    pattern = r'\[\[' + re.escape(current_key) + r'[:\]]'
-
-    try:
-        backlink_mask = df['memo'].str.contains(
-            pattern, case=False, na=False, regex=True
-        )
-        # 自分自身へのリンクは除外
-        if 'key' in df.columns:
-            self_mask = df['key'] == current_key
-            backlink_mask = backlink_mask & ~self_mask
-
-        return df[backlink_mask].sort_values(by='date', ascending=False)
-    except Exception as e:
-        print(f"Backlink search error: {e}")
-        return pd.DataFrame()
-
-
-def build_references_display(
-    parent_frame,
-    backlinks_df,
-    open_preview_callback,
-    key_icons,
-    key_colors
-):
-    """
-    引用元DataFrameに基づき、クリック可能な引用元リストUIを
-    指定された親フレーム内に動的に構築する。
-
-    Args:
-        parent_frame (ctk.CTkFrame or ctk.CTkScrollableFrame):
-            ラベルを配置する親ウィジェット。
-        backlinks_df (pd.DataFrame): 引用元ノートのDataFrame。
-        open_preview_callback (callable):
-            リンククリック時に呼び出すコールバック関数。
-            (例: lambda key: app.open_preview_window(key))
-        key_icons (dict): IndexKeyのアイコン辞書。
-        key_colors (dict): IndexKeyの色辞書。
-    """
-    # 既存のウィジェットをクリア
-    for widget in parent_frame.winfo_children():
-        widget.destroy()
-
-    if backlinks_df.empty:
-        parent_frame.configure(label_text="このノートを引用 (0件)")
-        return
-
-    parent_frame.configure(
-        label_text=f"このノートを引用 ({len(backlinks_df)}件)"
-    )
-
-    # (parent_frame が ScrollableFrame の場合、その中身として機能する)
-    content_frame = ctk.CTkFrame(parent_frame, fg_color="transparent")
-    content_frame.pack(fill="both", expand=True)
-
-    for index, row in backlinks_df.iterrows():
-        item_frame = ctk.CTkFrame(content_frame, fg_color="transparent")
-        item_frame.pack(fill="x", padx=5, pady=2)
-
-        cp_key = str(row.get("commonplace_key", "")).lower()
-        icon = key_icons.get(cp_key, '•')
-        color = key_colors.get(cp_key, 'gray')
-
-        icon_label = ctk.CTkLabel(
-            item_frame, text=icon, text_color=color,
-            font=("", 16), width=20
-        )
+            text_label.configure(text=f"[{row.get('date')}] {row.get('title', 'N/A')}")
+            self._keys.append(row.get('key'))
+            if position >= self._visible_count:
+                item_frame.pack(fill="x", padx=5, pady=2)
+
+        self._hide_rows_from(len(backlinks_df))
+
+    def clear(self):
+        """表示を空にし、見出しを元に戻す。"""
+        self._keys = []
+        self._hide_rows_from(0)
+        self.configure(label_text=self.default_label_text)
+
+    def _hide_rows_from(self, count):
+        for item_frame, _, _ in self._rows[count:self._visible_count]:
+            item_frame.pack_forget()
+        self._visible_count = count
+
+    def _create_row(self, position):
+        item_frame = ctk.CTkFrame(self, fg_color="transparent")
+        icon_label = ctk.CTkLabel(item_frame, text="", font=("", 16), width=20)
         icon_label.pack(side="left")
-
-        display_text = f"[{row.get('date')}] {row.get('title', 'N/A')}"
-        text_label = ctk.CTkLabel(
-            item_frame, text=display_text, anchor="w", cursor="hand2"
-        )
+        text_label = ctk.CTkLabel(item_frame, text="", anchor="w", cursor="hand2")
         text_label.pack(side="left", fill="x", expand=True)
 
         # --- Event Binding ---
-        key = row.get('key')
-        if key:
-            # メインアプリのプレビュー機能(open_preview_window)を
-            # 呼び出すようにバインドする
-            command = lambda e, k=key: open_preview_callback(k)
-            item_frame.bind("<Button-1>", command)
-            icon_label.bind("<Button-1>", command)
-            text_label.bind("<Button-1>", command)
+        # 行に表示中のノートを、メインアプリのプレビュー機能で開く
+        command = lambda e, i=position: self._on_row_click(i)
+        item_frame.bind("<Button-1>", command)
+        icon_label.bind("<Button-1>", command)
+        text_label.bind("<Button-1>", command)
+        return item_frame, icon_label, text_label
+
+    def _on_row_click(self, position):
+        if position < len(self._keys) and self._keys[position]:
+            self.open_preview_callback(self._keys[position])
 
 
-def open_pdf_viewer(row_data, loaded_csv_path, pdf_root_folder):
+def open_pdf_viewer(row_data, loaded_csv_path, pdf_root_folder,
+                    pdf_index=None, merged_pdf_index=None):
     """
     ノートデータに基づき、統合PDFまたは元のPDFを開く。
 
+    PDFが指定のフォルダの直下に無い場合は、索引 (pdf_locator.PdfLocationIndex)
+    を使ってサブフォルダから探す。
+
     Args:
         row_data (pd.Series):
             PDFを開く対象のノートデータ（DataFrameの1行）。
@@ -347,7 +184,14 @@ def open_pdf_viewer(row_data, loaded_csv_path, pdf_root_folder):
             現在読み込まれている目次CSVのパス (統合PDFの基準パスとして使用)。
         pdf_root_folder (str or Path):
             config.iniで指定された元のPDFのルートフォルダパス。
+        pdf_index (PdfLocationIndex, optional):
+            pdf_root_folder 以下のPDFの索引。
+        merged_pdf_index (PdfLocationIndex, optional):
+            loaded_csv_path のフォルダ以下のPDFの索引。
     """
+    # pandas は起動を速くするため、使用時に読み込む (CSV読み込み後は読み込み済み)
+    import pandas as pd
+
     merged_pdf_filename = row_data.get('merged_pdf_filename')
     start_page = row_data.get('merged_start_page')
 
@@ -358,11 +202,15 @@ def open_pdf_viewer(row_data, loaded_csv_path, pdf_root_folder):
             messagebox.showerror("エラー", "CSVファイルが読み込まれていないため、PDFの場所を特定できません。")
             return
 
-        # 統合PDFはCSVファイルと同じディレクトリにあると想定
-        pdf_path = Path(loaded_csv_path).parent / merged_pdf_filename
+        # 統合PDFはCSVファイルと同じディレクトリ (またはそのサブフォルダ) にあると想定
+        csv_dir = Path(loaded_csv_path).parent
+        pdf_path = locate_pdf(csv_dir, merged_pdf_filename, merged_pdf_index)
 
-        if not pdf_path.is_file():
-            messagebox.showerror("ファイルエラー", f"統合PDFファイルが見つかりません: {pdf_path}")
+        if pdf_path is None:
+            _show_pdf_not_found(
+                f"統合PDFファイルが見つかりません: {csv_dir / merged_pdf_filename}",
+                merged_pdf_index
+            )
             return
         try:
             page_number = int(start_page)
@@ -376,16 +224,76 @@ def open_pdf_viewer(row_data, loaded_csv_path, pdf_root_folder):
 
     # 2. 統合PDFがない場合、元のPDF (original_pdf) を試みる
     else:
-        _open_original_pdf(row_data, pdf_root_folder)
+        _open_original_pdf(row_data, pdf_root_folder, pdf_index)
+
+
+def resolve_note_pages(row_data, loaded_csv_path, pdf_root_folder,
+                       pdf_index=None, merged_pdf_index=None, refresh=True):
+    """
+    ノートのページがどのPDFの何ページ目にあるかを返す (アプリ内のプレビュー用)。
 
+    open_pdf_viewer と同じく統合PDF → 元のPDFの順に探すが、
+    統合PDFが見つからない場合も元のPDFを探し、エラーは表示しない。
 
-def _open_original_pdf(row_data, pdf_root_folder):
+    Args:
+        refresh (bool): PDFが索引に無い場合に、索引の更新を開始するか (locate_pdf を参照)。
+
+    Returns:
+        tuple[Path, int, int] or None:
+            (PDFのパス, 最初のページ番号 (0始まり), ページ数)。
+            ページ数が不明な場合は None (PDFの最後のページまで)。
+            PDFが見つからない場合は None。
+    """
+    import pandas as pd
+
+    try:
+        page_count = int(float(row_data.get('pages')))
+    except (TypeError, ValueError):
+        page_count = None
+
+    merged_pdf_filename = row_data.get('merged_pdf_filename')
+    start_page = row_data.get('merged_start_page')
+    if loaded_csv_path and merged_pdf_filename and not pd.isna(merged_pdf_filename) \
+            and not pd.isna(start_page) and start_page != '':
+        pdf_path = locate_pdf(Path(loaded_csv_path).parent, merged_pdf_filename,
+                              merged_pdf_index, refresh=refresh)
+        if pdf_path is not None:
+            try:
+                return pdf_path, int(start_page) - 1, page_count
+            except (ValueError, TypeError):
+                pass
+
+    filename = row_data.get('filepath')
+    if pdf_root_folder and filename and not pd.isna(filename) and Path(pdf_root_folder).is_dir():
+        pdf_path = locate_pdf(pdf_root_folder, filename, pdf_index, refresh=refresh)
+        if pdf_path is not None:
+            return pdf_path, 0, page_count
+    return None
+
+
+def _show_pdf_not_found(message, pdf_index=None):
+    """
+    PDFが見つからなかったことを表示する（open_pdf_viewerの内部ヘルパー）。
+
+    索引の作成中 (起動直後など) は、エラーではなく時間をおいて試すよう案内する。
+    """
+    if pdf_index is not None and not pdf_index.is_ready():
+        messagebox.showinfo(
+            "索引を作成中",
+            "PDFの場所の索引を作成中です。しばらくしてからもう一度お試しください。"
+        )
+        return
+    messagebox.showerror("ファイルエラー", message)
+
+
+def _open_original_pdf(row_data, pdf_root_folder, pdf_index=None):
     """
     元のPDFファイルを開く（open_pdf_viewerの内部ヘルパー）。
 
     Args:
         row_data (pd.Series): 対象のノートデータ。
         pdf_root_folder (str or Path): 元のPDFのルートフォルダパス。
+        pdf_index (PdfLocationIndex, optional): pdf_root_folder 以下のPDFの索引。
     """
     if not pdf_root_folder or not Path(pdf_root_folder).is_dir():
         messagebox.showwarning(
@@ -400,11 +308,14 @@ def _open_original_pdf(row_data, pdf_root_folder):
         messagebox.showerror("データエラー", "元のファイルパス (filepath列) がデータに含まれていません。")
         return
 
-    # 'filepath' 列のファイル名だけを抽出し、configの'pdf_root_folder'と結合する
-    pdf_path = Path(pdf_root_folder) / Path(filename).name
+    # 'filepath' 列のファイル名だけを抽出し、configの'pdf_root_folder'以下から探す
+    pdf_path = locate_pdf(pdf_root_folder, filename, pdf_index)
 
-    if not pdf_path.is_file():
-        messagebox.showerror("ファイルエラー", f"元のPDFファイルが見つかりません: {pdf_path}")
+    if pdf_path is None:
+        _show_pdf_not_found(
+            f"元のPDFファイルが見つかりません: {Path(pdf_root_folder) / Path(filename).name}",
+            pdf_index
+        )
         return
     try:
         webbrowser.open(pdf_path.as_uri())
@@ -0,0 +1,123 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import multiprocessing
+from pathlib import Path
+
+from pdf_utils import process_pdf
+from folder_watcher import FolderWatcher
+from utils import load_app_config
+import perf_trace
+
+
+def run_once(args, config_data):
+    """入力元フォルダのPDFを一括で正規化する (GUIの「処理を開始する」と同等)。"""
+    source_path = Path(args.source)
+    dest_path = Path(args.dest)
+    pdf_files = list(source_path.glob("*.pdf"))
+    if not pdf_files:
+        print("処理対象のPDFファイルが見つかりませんでした。")
+        return 0
+
+    temp_dir = dest_path / "temp_flatten"
+    temp_dir.mkdir(parents=True, exist_ok=True)
+    error_count = 0
+    try:
+        for i, pdf_file in enumerate(pdf_files):
+            print(f"処理中 ({i+1}/{len(pdf_files)}): {pdf_file.name}")
+            try:
+                with perf_trace.span("normalisierer.process_pdf", file=pdf_file.name):
+                    process_pdf(
+                        str(pdf_file),
+                        str(dest_path / pdf_file.name),
+                        str(temp_dir),
+                        config_data['font_path'],
+                        config_data['paper_width'],
+                        config_data['paper_height'],
+                        config_data['image_options']
+                    )
+            except Exception as e:
+                error_count += 1
+                print(f"エラー: {pdf_file.name} - {e}", file=sys.stderr)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    print(f"{len(pdf_files) - error_count}/{len(pdf_files)}個のPDFファイルの処理が完了しました。")
+    return 1 if error_count else 0
+
+
+def watch(args, config_data):
+    """入力元フォルダを監視し、追加・更新されたPDFを正規化し続ける (Ctrl+C で停止)。"""
+    watcher = FolderWatcher(
+        args.source,
+        args.dest,
+        config_data['font_path'],
+        config_data['paper_width'],
+        config_data['paper_height'],
+        poll_interval=args.interval or config_data['poll_interval'],
+        stable_seconds=args.stable or config_data['stable_seconds'],
+        max_workers=args.workers or config_data['max_workers'],
+        image_options=config_data['image_options']
+    )
+    watcher.start()
+    try:
+        while watcher.is_running():
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.stop()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Synapsen Normalisierer (コマンドライン版)"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="フォルダ内のPDFを一括で正規化する")
+    watch_parser = subparsers.add_parser(
+        "watch", help="フォルダを監視し、追加・更新されたPDFを自動で正規化する"
+    )
+    for sub in (run_parser, watch_parser):
+        sub.add_argument("source", help="入力元フォルダ")
+        sub.add_argument("dest", help="出力先フォルダ")
+    watch_parser.add_argument(
+        "--interval", type=float, help="フォルダを確認する間隔 [秒] (config.ini [Watch] を上書き)"
+    )
+    watch_parser.add_argument(
+        "--stable", type=float, help="書き込み完了とみなす待ち時間 [秒] (config.ini [Watch] を上書き)"
+    )
+    watch_parser.add_argument(
+        "--workers", type=int, help="同時に処理するファイル数 (config.ini [Watch] を上書き)"
+    )
+    args = parser.parse_args(argv)
+
+    if Path(args.source).resolve() == Path(args.dest).resolve():
+        parser.error("入力元と出力先は異なるフォルダを指定してください。")
+
+    if getattr(sys, 'frozen', False):
+        base_path = os.path.dirname(sys.executable)
+    else:
+        base_path = os.path.dirname(os.path.abspath(__file__))
+    config_data = load_app_config(base_path)
+    perf_trace.configure("normalisierer_cli", **config_data['diagnostics'])
+
+    if not Path(config_data['font_path']).is_file():
+        print(
+            f"エラー: config.iniで有効なフォントパスが指定されていません。'{config_data['font_path']}'",
+            file=sys.stderr
+        )
+        return 1
+
+    if args.command == "run":
+        return run_once(args, config_data)
+    return watch(args, config_data)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -1,18 +1,17 @@
+import perf_trace  # 起動時間の計測のため、最初にインポートする
 import os
 import sys
 import shutil
-import configparser
+import multiprocessing
 from tkinter import filedialog, messagebox
 from pathlib import Path
 import customtkinter as ctk
 
-# PDF処理関数を別ファイルからインポート
-from pdf_utils import high_fidelity_flatten, normalize_pdf_to_papersize
+# PDF処理関数 (pdf_utils, folder_watcher) は PyMuPDF・pypdf を読み込むため、
+# 起動を速くするため使用時に読み込み、ウィンドウの表示後にバックグラウンドで読み込んでおく
+from utils import A4_WIDTH, A4_HEIGHT, load_app_config
 
-A4_WIDTH = 595.276
-A4_HEIGHT = 841.89
-A5_WIDTH = 419.528
-A5_HEIGHT = 595.276
+WARM_IMPORTS = ["fitz", "pypdf", "pdf_utils", "folder_watcher"]
 
 
 class Synapsen_Normalisierer(ctk.CTk):
@@ -25,6 +24,8 @@ class Synapsen_Normalisierer(ctk.CTk):
                          フラット化時に使用するフォントファイルのパス。
         label (ctk.CTkLabel): アプリケーションのステータスを表示するラベル。
         run_button (ctk.CTkButton): 処理開始をトリガーするボタン。
+        watch_button (ctk.CTkButton): 監視モードを開始・停止するボタン。
+        watcher (FolderWatcher): 動作中の監視モード (停止中は None)。
     """
 
     def __init__(self):
@@ -35,11 +36,14 @@ class Synapsen_Normalisierer(ctk.CTk):
         super().__init__()
         self.icon_path = self.get_icon_path()
         self.title("Synapsen Normalisierer")
-        self.geometry("500x250")
+        self.geometry("500x300")
 
         self.font_path = None
         self.paper_width = A4_WIDTH  # デフォルト
         self.paper_height = A4_HEIGHT  # デフォルト
+        self.image_options = None
+        self.watch_settings = {}
+        self.watcher = None
         self._load_config()
 
         # --- ウィジェットの配置 ---
@@ -54,7 +58,21 @@ class Synapsen_Normalisierer(ctk.CTk):
             text="処理を開始する",
             command=self.run_process
         )
-        self.run_button.pack(pady=20, padx=20, ipady=10)
+        self.run_button.pack(pady=(20, 10), padx=20, ipady=10)
+
+        self.watch_button = ctk.CTkButton(
+            self,
+            text="監視モードを開始する",
+            command=self.toggle_watch_mode
+        )
+        self.watch_button.pack(pady=(0, 20), padx=20)
+
+        # ウィンドウを閉じる際は監視モードを停止する
+        self.protocol("WM_DELETE_WINDOW", self.on_closing)
+        self.perf_overlay = perf_trace.attach_overlay(self)  # F12で処理時間を表示
+
+        perf_trace.warm_imports(WARM_IMPORTS)
+        perf_trace.report_startup(self)
 
         # フォントパスの検証
         if not self.font_path or not Path(self.font_path).is_file():
@@ -65,6 +83,7 @@ class Synapsen_Normalisierer(ctk.CTk):
                 text_color="orange"
             )
             self.run_button.configure(state="disabled")
+            self.watch_button.configure(state="disabled")
 
     def get_icon_path(self):
         """
@@ -90,51 +109,47 @@ class Synapsen_Normalisierer(ctk.CTk):
 
     def _load_config(self) -> None:
         """
-        config.iniファイルからフォントパスと用紙サイズを読み込みます。
-        ( ... docstring ... )
+        config.iniファイルからフォントパス・用紙サイズ・監視モードの設定を読み込みます。
+        utils.load_app_config を使用します。
         """
-        # 0. config.ini のパスを決定
         if getattr(sys, 'frozen', False):
-            # ( ... config_path 決定ロジック ... )
             base_path = os.path.dirname(sys.executable)
         else:
             base_path = os.path.dirname(os.path.abspath(__file__))
 
-        if getattr(sys, 'frozen', False):
-            config_path = os.path.join(base_path, 'config.ini')
-        else:
-            config_path = os.path.join(
-                os.path.abspath(os.path.join(base_path, '..')), 'config.ini'
-            )
-        print(f"[DEBUG] Loading config from: {config_path}")
+        config_data = load_app_config(base_path)
+        perf_trace.configure("normalisierer", **config_data['diagnostics'])
+        self.font_path = config_data['font_path']
+        self.paper_width = config_data['paper_width']
+        self.paper_height = config_data['paper_height']
+        self.image_options = config_data['image_options']
+        self.watch_settings = {
+            'poll_interval': config_data['poll_interval'],
+            'stable_seconds': config_data['stable_seconds'],
+            'max_workers': config_data['max_workers'],
+        }
+
+    def _ask_folders(self):
+        """
+        入力元・出力先フォルダをユーザーに選択させる。
 
-        config_dir = os.path.dirname(config_path)
-        config = configparser.ConfigParser(interpolation=None)
-        config.read(config_path, encoding='utf-8')
+        Returns:
+            tuple[Path, Path] | None:
+                (入力元, 出力先) のタプル。キャンセル・不正な選択の場合は None。
+        """
+        source_folder = filedialog.askdirectory(title="入力元フォルダを選択してください")
+        if not source_folder:
+            return None
 
-        # 1. フォントパスの読み込み
-        font_path_from_config = config.get('Paths', 'font_path', fallback='')
-        expanded_path = os.path.expandvars(font_path_from_config)  # 環境変数を展開
+        dest_folder = filedialog.askdirectory(title="出力先フォルダを選択してください")
+        if not dest_folder:
+            return None
 
-        if os.path.isabs(expanded_path):
-            self.font_path = expanded_path
-        else:
-            self.font_path = os.path.join(config_dir, expanded_path)
-
-        # 用紙サイズの読み込み
-        paper_size_str = config.get(
-            'LaTeX', 'paper_size', fallback='A4').upper()
-        if paper_size_str == 'A5':
-            self.paper_width = A5_WIDTH
-            self.paper_height = A5_HEIGHT
-            print(f"[DEBUG] Paper size set to A5 ({
-                self.paper_width}x{self.paper_height})")
-        else:
-            # デフォルトはA4
-            self.paper_width = A4_WIDTH
-            self.paper_height = A4_HEIGHT
-            print(f"[DEBUG] Paper size set to A4 ({
-                self.paper_width}x{self.paper_height})")
+        if source_folder == dest_folder:
+            messagebox.showerror("エラー", "入力元と出力先は異なるフォルダを選択してください。")
+            return None
+
+        return Path(source_folder), Path(dest_folder)
 
     def run_process(self):
         """
@@ -144,20 +159,13 @@ class Synapsen_Normalisierer(ctk.CTk):
         一時フォルダを作成し、対象のPDFファイル群に対して
         「フラット化」と「正規化」を順次実行します。
         """
-        source_folder = filedialog.askdirectory(title="入力元フォルダを選択してください")
-        if not source_folder:
+        folders = self._ask_folders()
+        if not folders:
             return
 
-        dest_folder = filedialog.askdirectory(title="出力先フォルダを選択してください")
-        if not dest_folder:
-            return
+        from pdf_utils import process_pdf
 
-        if source_folder == dest_folder:
-            messagebox.showerror("エラー", "入力元と出力先は異なるフォルダを選択してください。")
-            return
-
-        source_path = Path(source_folder)
-        dest_path = Path(dest_folder)
+        source_path, dest_path = folders
         temp_dir = None  # finallyブロックで参照できるよう、外で定義
 
         try:
@@ -179,23 +187,17 @@ class Synapsen_Normalisierer(ctk.CTk):
                     )
                 self.update_idletasks()  # GUIの表示を強制更新
 
-                temp_flattened_pdf = temp_dir / pdf_file.name
-                final_output_pdf = dest_path / pdf_file.name
-
-                # 1. フォームをフラット化（一時フォルダに出力）
-                high_fidelity_flatten(
-                    str(pdf_file),
-                    str(temp_flattened_pdf),
-                    self.font_path
-                )
-
-                # 2. 指定サイズに正規化（最終出力先に出力）
-                normalize_pdf_to_papersize(
-                    str(temp_flattened_pdf),
-                    str(final_output_pdf),
-                    self.paper_width,
-                    self.paper_height
-                )
+                # フラット化・正規化（一時フォルダ）→ 画像の再圧縮（最終出力先）
+                with perf_trace.span("normalisierer.process_pdf", file=pdf_file.name):
+                    process_pdf(
+                        str(pdf_file),
+                        str(dest_path / pdf_file.name),
+                        str(temp_dir),
+                        self.font_path,
+                        self.paper_width,
+                        self.paper_height,
+                        self.image_options
+                    )
 
             messagebox.showinfo("完了", f"{total_files}個のPDFファイルの処理が完了しました。")
             self.label.configure(text="処理が完了しました。")
@@ -212,8 +214,61 @@ class Synapsen_Normalisierer(ctk.CTk):
                 except Exception as e:
                     print(f"警告: 一時フォルダの削除に失敗しました: {e}")
 
+    def toggle_watch_mode(self):
+        """
+        「監視モード」ボタン押下時の処理。
+
+        停止中であれば入力・出力フォルダを選択させて FolderWatcher を起動し、
+        入力元に追加・更新されたPDFを書き込み完了後に自動で正規化します。
+        動作中であれば監視を停止します。
+        """
+        if self.watcher:
+            self.watch_button.configure(state="disabled")
+            self.update_idletasks()
+            self.watcher.stop()
+            self.watcher = None
+            self.watch_button.configure(text="監視モードを開始する", state="normal")
+            self.run_button.configure(state="normal")
+            return
+
+        folders = self._ask_folders()
+        if not folders:
+            return
+
+        from folder_watcher import FolderWatcher
+
+        source_path, dest_path = folders
+        self.watcher = FolderWatcher(
+            source_path,
+            dest_path,
+            self.font_path,
+            self.paper_width,
+            self.paper_height,
+            image_options=self.image_options,
+            status_callback=self._on_watch_status,
+            **self.watch_settings
+        )
+        self.watcher.start()
+        self.watch_button.configure(text="監視モードを停止する")
+        self.run_button.configure(state="disabled")
+
+    def _on_watch_status(self, message):
+        """監視スレッドからの状態メッセージを、メインスレッドでラベルに反映する。"""
+        self.after(0, lambda: self.label.configure(text=message))
+
+    def on_closing(self):
+        """ウィンドウを閉じる前に、動作中の監視モードを停止する。"""
+        if self.watcher:
+            # 破棄後のウィンドウに状態を通知しないよう、コールバックを外してから停止
+            self.watcher.status_callback = None
+            self.watcher.stop()
+            self.watcher = None
+        self.destroy()
+
 
 if __name__ == "__main__":
+    # 監視モードのワーカープロセスを .exe 実行時にも起動できるようにする
+    multiprocessing.freeze_support()
     ctk.set_appearance_mode("System")
     app = Synapsen_Normalisierer()
 # 1. 実行ファイル(.exe)かスクリプト(.py)かによって基準パスを取得
@@ -0,0 +1,220 @@
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from pdf_utils import process_pdf
+
+
+class FolderWatcher:
+    """
+    入力元フォルダを定期的に確認 (stat ポーリング) し、
+    新規・更新されたPDFを自動で正規化する監視モード。
+
+    ファイルサイズと更新日時が stable_seconds の間変化しなければ
+    書き込み完了とみなし、ワーカープロセスのプールで
+    pdf_utils.process_pdf を実行します。
+    (PyMuPDF はスレッドセーフではないため、スレッドではなくプロセスを使用します)
+
+    Attributes:
+        source_path (Path): 監視する入力元フォルダ。
+        dest_path (Path): 正規化済みPDFの出力先フォルダ。
+        temp_dir (Path): フラット化の中間ファイルを置く一時フォルダ。
+    """
+
+    def __init__(
+        self,
+        source_folder,
+        dest_folder,
+        font_path,
+        paper_width,
+        paper_height,
+        poll_interval=5.0,
+        stable_seconds=3.0,
+        max_workers=2,
+        image_options=None,
+        status_callback=None
+    ):
+        """
+        Args:
+            source_folder (str or Path): 監視する入力元フォルダ。
+            dest_folder (str or Path): 出力先フォルダ。
+            font_path (str): フラット化で使用するフォントファイルのパス。
+            paper_width (float): ターゲットの用紙幅 (ポイント単位)。
+            paper_height (float): ターゲットの用紙高 (ポイント単位)。
+            poll_interval (float, optional): フォルダを確認する間隔 [秒]。
+            stable_seconds (float, optional):
+                書き込み完了とみなすまでにサイズが変化しない時間 [秒]。
+            max_workers (int, optional): 同時に処理するファイル数の上限。
+            image_options (dict, optional):
+                画像の再圧縮設定 (pdf_utils.process_pdf を参照)。None で無効。
+            status_callback (callable, optional):
+                状態メッセージ (str) を受け取るコールバック関数。
+                監視スレッドから呼び出される点に注意。
+        """
+        self.source_path = Path(source_folder)
+        self.dest_path = Path(dest_folder)
+        self.temp_dir = self.dest_path / "temp_flatten"
+        self.font_path = font_path
+        self.paper_width = paper_width
+        self.paper_height = paper_height
+        self.poll_interval = poll_interval
+        self.stable_seconds = stable_seconds
+        self.max_workers = max_workers
+        self.image_options = image_options
+        self.status_callback = status_callback
+
+        # 書き込み中の可能性があるファイル: path -> (size, mtime_ns, 最初に観測した時刻)
+        self._candidates = {}
+        # 処理済み (または処理失敗) のファイル: path -> (size, mtime_ns)
+        self._processed = {}
+        # 処理中のファイル: path -> (Future, (size, mtime_ns))
+        self._in_flight = {}
+
+        self._executor = None
+        self._thread = None
+        self._stop_event = threading.Event()
+        self.processed_count = 0
+        self.error_count = 0
+
+    # --- 公開メソッド ---
+
+    def start(self):
+        """監視スレッドとワーカープロセスのプールを起動する。"""
+        if self._thread and self._thread.is_alive():
+            return
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
+        self._stop_event.clear()
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._notify(f"監視を開始しました: {self.source_path}")
+
+    def stop(self):
+        """
+        監視を停止する。
+
+        処理中のファイルは完了まで待ち、最後に一時フォルダを削除する。
+        """
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._collect_finished()
+
+        if self.temp_dir.exists():
+            try:
+                shutil.rmtree(self.temp_dir)
+            except Exception as e:
+                print(f"警告: 一時フォルダの削除に失敗しました: {e}")
+        self._notify(
+            f"監視を停止しました (処理: {self.processed_count}件, エラー: {self.error_count}件)"
+        )
+
+    def is_running(self):
+        """監視スレッドが動作中かどうかを返す。"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def poll_once(self):
+        """
+        入力元フォルダを1回確認し、書き込みが完了したPDFをプールに投入する。
+
+        監視スレッドから poll_interval ごとに呼び出される。
+        """
+        self._collect_finished()
+        now = time.monotonic()
+        seen = set()
+
+        for pdf_file in self.source_path.glob("*.pdf"):
+            try:
+                stat = pdf_file.stat()
+            except OSError:
+                # 確認中に削除・移動されたファイル
+                continue
+            seen.add(pdf_file)
+            signature = (stat.st_size, stat.st_mtime_ns)
+
+            if pdf_file in self._in_flight or self._processed.get(pdf_file) == signature:
+                continue
+
+            if pdf_file not in self._processed and self._is_up_to_date(pdf_file, stat):
+                # 前回の監視や一括処理で出力済みのファイルは再処理しない
+                self._processed[pdf_file] = signature
+                continue
+
+            candidate = self._candidates.get(pdf_file)
+            if candidate is None or candidate[:2] != signature:
+                # 新規、または前回の確認からサイズ・更新日時が変化した
+                self._candidates[pdf_file] = (*signature, now)
+                continue
+
+            if stat.st_size > 0 and now - candidate[2] >= self.stable_seconds:
+                del self._candidates[pdf_file]
+                self._submit(pdf_file, signature)
+
+        # 入力元から消えたファイルの状態を破棄する
+        for state in (self._candidates, self._processed):
+            for path in [p for p in state if p not in seen]:
+                del state[path]
+
+    # --- 内部メソッド ---
+
+    def _run(self):
+        """監視スレッドのメインループ。"""
+        while not self._stop_event.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                self._notify(f"監視中にエラーが発生しました: {e}")
+            self._stop_event.wait(self.poll_interval)
+
+    def _is_up_to_date(self, pdf_file, stat):
+        """出力先に入力元より新しい同名PDFが既に存在するかを返す。"""
+        output_pdf = self.dest_path / pdf_file.name
+        try:
+            return output_pdf.stat().st_mtime_ns >= stat.st_mtime_ns
+        except OSError:
+            return False
+
+    def _submit(self, pdf_file, signature):
+        """1つのPDFの処理をワーカープロセスのプールに投入する。"""
+        future = self._executor.submit(
+            process_pdf,
+            str(pdf_file),
+            str(self.dest_path / pdf_file.name),
+            str(self.temp_dir),
+            self.font_path,
+            self.paper_width,
+            self.paper_height,
+            self.image_options
+        )
+        self._in_flight[pdf_file] = (future, signature)
+        self._notify(f"処理中 ({len(self._in_flight)}件): {pdf_file.name}")
+
+    def _collect_finished(self):
+        """完了したワーカーの結果を回収し、処理済みとして記録する。"""
+        for pdf_file, (future, signature) in list(self._in_flight.items()):
+            if not future.done():
+                continue
+            del self._in_flight[pdf_file]
+            # 失敗した場合も、ファイルが更新されるまでは再試行しない
+            self._processed[pdf_file] = signature
+
+            error = future.exception()
+            if error:
+                self.error_count += 1
+                self._notify(f"エラー: {pdf_file.name} - {error}")
+            else:
+                self.processed_count += 1
+                self._notify(f"正規化しました: {pdf_file.name}")
+
+    def _notify(self, message):
+        """状態メッセージをコールバック (未指定の場合は標準出力) に通知する。"""
+        if self.status_callback:
+            self.status_callback(message)
+        else:
+            print(message)
@@ -1,7 +1,13 @@
+import shutil
+import zlib
+import hashlib
 import fitz  # PyMuPDF
 from pypdf import PdfReader, PdfWriter, Transformation
+from pypdf.generic import IndirectObject, NameObject
 from pathlib import Path
 
+import perf_trace
+
 # ==============================================================================
 # 定数定義
 # ==============================================================================
@@ -15,6 +21,22 @@ TOP_MARGIN: float = MARGIN + HEAD_SEP
 BOTTOM_MARGIN: float = MARGIN
 LEFT_MARGIN: float = 0
 RIGHT_MARGIN: float = 0
+
+# 正規化済みとみなす許容誤差
+SIZE_TOLERANCE_PT: float = 0.5  # 用紙サイズ・平行移動量 [pt]
+SCALE_TOLERANCE: float = 1e-3   # 拡大率
+
+# 正規化済みPDFに付与するメタデータのキー (値は "幅x高さ")
+NORMALIZED_MARKER_KEY: str = "/SynapsenNormalized"
+# DotLegalPad テンプレートの背景 XObject に付いているマーカー
+# (PDF_Templates/DotLegalPad/DotLegalPad_Builder.py の TEMPLATE_MARKER_KEY)
+TEMPLATE_MARKER_KEY: str = "/SynapsenTemplate"
+
+# 画像の再圧縮: 目標DPIをこの倍率以上超える画像のみ縮小する
+DPI_THRESHOLD_RATIO: float = 1.5
+# 線画 (白黒2値化) とみなす中間調ピクセルの割合の上限と、中間調の範囲
+LINE_ART_MIDTONE_RATIO: float = 0.02
+LINE_ART_MIDTONE_RANGE: tuple = (64, 191)
 # ==============================================================================
 
 
@@ -72,6 +94,83 @@ def high_fidelity_flatten(input_path: str, output_path: str, font_path: str):
     doc.close()
 
 
+def has_form_widgets(input_path: str) -> bool:
+    """
+    PDFにフォームウィジェットが1つでも含まれているかを返します。
+
+    ウィジェットが無いPDFは high_fidelity_flatten を実行しても
+    内容が変わらないため、呼び出し側はフラット化を省略できます。
+
+    Args:
+        input_path (str): 確認するPDFファイルのパス。
+
+    Returns:
+        bool: いずれかのページにウィジェットがあれば True。
+    """
+    with fitz.open(input_path) as doc:
+        return any(page.first_widget for page in doc)
+
+
+def _normalized_marker(paper_width: float, paper_height: float) -> str:
+    """正規化済みPDFのメタデータに記録する値を返します。"""
+    return f"{paper_width:.3f}x{paper_height:.3f}"
+
+
+def is_normalized(input_path: str, paper_width: float, paper_height: float) -> bool:
+    """PDFが既に指定の用紙サイズで正規化済み (NORMALIZED_MARKER_KEY を持つ) かを返します。"""
+    metadata = PdfReader(input_path).metadata or {}
+    return metadata.get(NORMALIZED_MARKER_KEY) == _normalized_marker(paper_width, paper_height)
+
+
+def _compute_transform(content_page, drawable_width: float, drawable_height: float):
+    """
+    ページを描画可能領域の中央に収めるための (拡大率, tx, ty) を計算します。
+
+    Returns:
+        tuple[float, float, float] | None:
+            (scale, tx, ty)。ページサイズが不正 (幅・高さが0) の場合は None。
+    """
+    original_width = float(content_page.mediabox.width)
+    original_height = float(content_page.mediabox.height)
+
+    if original_width == 0 or original_height == 0:
+        return None
+
+    # 描画可能領域 (drawable_width, drawable_height) を使用
+    scale = min(
+        drawable_width / original_width,
+        drawable_height / original_height
+    )
+
+    # 描画可能領域内で中央に配置
+    tx = LEFT_MARGIN + (drawable_width - original_width * scale) / 2
+    ty = BOTTOM_MARGIN + (drawable_height - original_height * scale) / 2
+    return scale, tx, ty
+
+
+def _is_page_compliant(content_page, transform_values, paper_width: float, paper_height: float) -> bool:
+    """
+    ページが既に指定の用紙サイズで、変換が恒等 (拡大率1・移動なし) になるかを返します。
+
+    該当するページは白紙ページへの merge_transformed_page を行わず、
+    そのまま (参照として) 出力に追加できます。
+    """
+    if transform_values is None:
+        return False
+    scale, tx, ty = transform_values
+    box = content_page.mediabox
+    return (
+        abs(scale - 1) <= SCALE_TOLERANCE
+        and abs(tx) <= SIZE_TOLERANCE_PT
+        and abs(ty) <= SIZE_TOLERANCE_PT
+        and abs(float(box.left)) <= SIZE_TOLERANCE_PT
+        and abs(float(box.bottom)) <= SIZE_TOLERANCE_PT
+        and abs(float(box.width) - paper_width) <= SIZE_TOLERANCE_PT
+        and abs(float(box.height) - paper_height) <= SIZE_TOLERANCE_PT
+        and not content_page.get("/Rotate", 0)
+    )
+
+
 def normalize_pdf_to_papersize(input_path: str, output_path: str, paper_width: float, paper_height: float):
     """
     PDFの全ページを、指定された用紙サイズの中央にリサイズ・配置します。
@@ -79,6 +178,10 @@ def normalize_pdf_to_papersize(input_path: str, output_path: str, paper_width: f
     マージン領域を考慮し、コンテンツがその領域内に収まるように
     アスペクト比を維持してスケーリングおよび中央配置を行います。
 
+    既に同じ用紙サイズで正規化済みのPDF (NORMALIZED_MARKER_KEY を持つもの) や、
+    全ページが変換不要なPDFはそのままコピーし、
+    変換不要なページは白紙ページへの合成を行わずにそのまま出力します。
+
     Args:
         input_path (str): 入力PDFファイル（通常はフラット化済み）のパス。
         output_path (str): 正規化された出力PDFファイルのパス。
@@ -86,38 +189,292 @@ def normalize_pdf_to_papersize(input_path: str, output_path: str, paper_width: f
         paper_height (float): ターゲットの用紙高 (ポイント単位)。
     """
     reader = PdfReader(input_path)
-    writer = PdfWriter()
+    marker = _normalized_marker(paper_width, paper_height)
 
     # 渡された用紙サイズから描画可能領域を計算
     drawable_width: float = paper_width - LEFT_MARGIN - RIGHT_MARGIN
     drawable_height: float = paper_height - TOP_MARGIN - BOTTOM_MARGIN
 
-    for content_page in reader.pages:
+    transforms = [
+        _compute_transform(content_page, drawable_width, drawable_height)
+        for content_page in reader.pages
+    ]
+    compliant = [
+        _is_page_compliant(content_page, values, paper_width, paper_height)
+        for content_page, values in zip(reader.pages, transforms)
+    ]
+
+    # 正規化済み、または全ページが変換不要な場合はファイルをそのままコピー
+    metadata = reader.metadata or {}
+    if metadata.get(NORMALIZED_MARKER_KEY) == marker or (compliant and all(compliant)):
+        if Path(input_path).resolve() != Path(output_path).resolve():
+            shutil.copyfile(input_path, output_path)
+        return
+
+    writer = PdfWriter()
+
+    for content_page, values, is_compliant in zip(reader.pages, transforms, compliant):
+        if is_compliant:
+            # 変換不要なページはそのまま追加する
+            writer.add_page(content_page)
+            continue
+
         # 指定された用紙サイズの白紙ページを作成
         template_page = writer.add_blank_page(
             width=paper_width, height=paper_height)
 
-        original_width = float(content_page.mediabox.width)
-        original_height = float(content_page.mediabox.height)
-
-        if original_width == 0 or original_height == 0:
+        if values is None:
             print(f"Skipping empty or invalid page in {input_path}")
             continue
 
-        # 描画可能領域 (drawable_width, drawable_height) を使用
-        scale = min(
-            drawable_width / original_width,
-            drawable_height / original_height
-        )
-
-        # 描画可能領域内で中央に配置
-        tx = LEFT_MARGIN + (drawable_width - original_width * scale) / 2
-        ty = BOTTOM_MARGIN + (drawable_height - original_height * scale) / 2
-
+        scale, tx, ty = values
         transform =\
             Transformation().scale(sx=scale, sy=scale).translate(tx=tx, ty=ty)
 
         template_page.merge_transformed_page(content_page, transform)
 
+    share_template_backgrounds(writer)
+
+    # 再実行時に正規化済みであることを判別できるよう、メタデータに記録
+    writer.add_metadata({NORMALIZED_MARKER_KEY: marker})
+
     with open(output_path, "wb") as f:
         writer.write(f)
+
+
+def share_template_backgrounds(writer) -> int:
+    """
+    DotLegalPad テンプレートの背景 (TEMPLATE_MARKER_KEY を持つ Form XObject) のうち、
+    内容が同じものを1つのオブジェクトにまとめます。
+
+    別々のPDFから読み込んだページは、同じ背景をそれぞれ別のオブジェクトとして
+    持つため、そのまま書き出すと背景がページ (ノート) の数だけ重複します。
+
+    Args:
+        writer (PdfWriter): ページを追加済みの PdfWriter。
+
+    Returns:
+        int: 参照を置き換えた (重複していた) 背景の数。
+    """
+    shared = {}
+    visited = set()
+    replaced = 0
+
+    def visit(resources):
+        nonlocal replaced
+        xobjects = resources.get_object().get("/XObject") if resources else None
+        if not xobjects:
+            return
+        xobjects = xobjects.get_object()
+        for name in list(xobjects.keys()):
+            ref = xobjects.raw_get(name)
+            if not isinstance(ref, IndirectObject):
+                continue
+            xobject = ref.get_object()
+            marker = xobject.get(TEMPLATE_MARKER_KEY)
+            if marker is not None:
+                key = (
+                    str(marker), str(xobject.get("/BBox")),
+                    hashlib.sha1(xobject.get_data()).hexdigest()
+                )
+                first = shared.setdefault(key, ref)
+                if first.idnum != ref.idnum:
+                    xobjects[NameObject(name)] = first
+                    replaced += 1
+            elif ref.idnum not in visited and xobject.get("/Subtype") == "/Form":
+                # show_pdf_page で貼り付けた背景は、ラッパーの XObject の中にある
+                visited.add(ref.idnum)
+                visit(xobject.get("/Resources"))
+
+    for page in writer.pages:
+        visit(page.get("/Resources"))
+    if replaced:
+        # 参照されなくなった重複を書き出さないよう削除する
+        writer.compress_identical_objects(remove_identicals=False, remove_orphans=True)
+    return replaced
+
+
+_NON_MIDTONE_BYTES = bytes(
+    v for v in range(256)
+    if not LINE_ART_MIDTONE_RANGE[0] <= v <= LINE_ART_MIDTONE_RANGE[1]
+)
+# 線画の判定を行わないカラーの色空間
+_COLOR_SPACES = {"DeviceRGB", "DeviceCMYK", "CalRGB", "Lab", "Indexed"}
+# 8bitグレー値を、1bit (0=黒, 1=白) の '0'/'1' 文字に変換するテーブル
+_BILEVEL_TABLE = bytes(ord('1') if v >= 128 else ord('0') for v in range(256))
+
+
+def _is_line_art(samples: bytes) -> bool:
+    """8bitグレー画像のピクセル列が、ほぼ白と黒だけで構成されているかを返します。"""
+    midtones = len(samples.translate(None, _NON_MIDTONE_BYTES))
+    return midtones <= len(samples) * LINE_ART_MIDTONE_RATIO
+
+
+def _pack_bilevel(samples: bytes, width: int, height: int) -> bytes:
+    """8bitグレーのピクセル列を、行ごとにバイト境界で揃えた1bitデータに変換します。"""
+    padding = b'0' * (-width % 8)
+    row_bytes = (width + 7) // 8
+    packed = bytearray()
+    for y in range(height):
+        bits = samples[y * width:(y + 1) * width].translate(_BILEVEL_TABLE) + padding
+        packed += int(bits, 2).to_bytes(row_bytes, 'big')
+    return bytes(packed)
+
+
+def _convert_line_art_to_bilevel(doc) -> int:
+    """
+    ドキュメント内の8bitグレー画像のうち、線画とみなせるものを
+    白黒2値 (1bit, FlateDecode) に置き換えます。
+
+    同一内容の画像ストリームは一度だけ変換し、結果を使い回します。
+
+    Returns:
+        int: 置き換えた画像の数。
+    """
+    converted = {}  # ストリームのハッシュ -> 変換後のデータ (線画でなければ None)
+    seen_xrefs = set()
+    count = 0
+
+    for page in doc:
+        for xref, smask, width, height, bpc, colorspace, *_ in page.get_images(full=True):
+            if xref in seen_xrefs:
+                continue
+            seen_xrefs.add(xref)
+
+            # マスク付き・カラー・既に2値の画像は対象外
+            if smask or bpc != 8 or colorspace in _COLOR_SPACES:
+                continue
+            if doc.xref_get_key(xref, "ImageMask")[1] == "true" or \
+                    doc.xref_get_key(xref, "Decode")[0] != "null":
+                continue
+
+            digest = hashlib.sha1(doc.xref_stream_raw(xref)).hexdigest()
+            if digest not in converted:
+                pix = fitz.Pixmap(doc, xref)
+                if pix.n != 1 or pix.alpha or not _is_line_art(pix.samples):
+                    converted[digest] = None
+                else:
+                    converted[digest] = zlib.compress(
+                        _pack_bilevel(pix.samples, pix.width, pix.height)
+                    )
+
+            data = converted[digest]
+            if data is None:
+                continue
+            doc.update_stream(xref, data, compress=False)
+            doc.xref_set_key(xref, "Filter", "/FlateDecode")
+            doc.xref_set_key(xref, "BitsPerComponent", "1")
+            doc.xref_set_key(xref, "ColorSpace", "/DeviceGray")
+            if doc.xref_get_key(xref, "DecodeParms")[0] != "null":
+                doc.xref_set_key(xref, "DecodeParms", "null")
+            count += 1
+
+    return count
+
+
+def _image_rewriter_options(target_dpi: int, jpeg_quality: int):
+    """
+    カラー・グレー画像を縮小・JPEG で再圧縮する Document.rewrite_images の設定を返します。
+
+    rewrite_images の既定 (FZ_SUBSAMPLE_AVERAGE) は 1/2, 1/4, ... にしか縮小しないため
+    (例: 299dpi -> 150dpi は縮小されない)、target_dpi ちょうどに縮小できる
+    FZ_SUBSAMPLE_BICUBIC を使います。2値画像は対象外です。
+    """
+    opts = fitz.mupdf.PdfImageRewriterOptions()
+    for kind in ("color_lossless", "color_lossy", "gray_lossless", "gray_lossy"):
+        setattr(opts, f"{kind}_image_recompress_method", fitz.mupdf.FZ_RECOMPRESS_JPEG)
+        setattr(opts, f"{kind}_image_recompress_quality", str(jpeg_quality))
+        setattr(opts, f"{kind}_image_subsample_method", fitz.mupdf.FZ_SUBSAMPLE_BICUBIC)
+        setattr(opts, f"{kind}_image_subsample_threshold", int(target_dpi * DPI_THRESHOLD_RATIO))
+        setattr(opts, f"{kind}_image_subsample_to", target_dpi)
+    return opts
+
+
+def compress_images(input_path: str, output_path: str, target_dpi: int, jpeg_quality: int, bilevel_line_art: bool = True):
+    """
+    PDFに埋め込まれたラスタ画像を縮小・再圧縮し、ファイルサイズを削減します。
+
+    1. (bilevel_line_art 有効時) 線画とみなせるグレー画像を白黒2値に変換
+    2. 表示解像度が target_dpi を大きく超える画像を target_dpi に縮小し、
+       カラー・グレー画像を指定品質の JPEG で再圧縮 (Document.rewrite_images)
+    3. garbage=4 で保存し、同一内容の画像ストリームを1つに統合
+
+    表示解像度はページ上の表示サイズから求めるため、
+    正規化 (用紙サイズへの縮小) を行った後のPDFに対して実行してください。
+    メタデータ (NORMALIZED_MARKER_KEY を含む) はそのまま保持されます。
+
+    Args:
+        input_path (str): 入力PDFファイルのパス。
+        output_path (str): 出力PDFファイルのパス。
+        target_dpi (int): 縮小後の目標解像度 [dpi]。
+        jpeg_quality (int): JPEG の品質 (0-100)。
+        bilevel_line_art (bool, optional): 線画を白黒2値に変換するか。
+    """
+    doc = fitz.open(input_path)
+
+    if bilevel_line_art:
+        _convert_line_art_to_bilevel(doc)
+
+    # 2値画像はそのまま残し、カラー・グレー画像のみ縮小・再圧縮する
+    doc.rewrite_images(options=_image_rewriter_options(target_dpi, jpeg_quality))
+
+    # PDFを保存 (同一オブジェクトの統合、圧縮を有効化)
+    doc.save(output_path, garbage=4, deflate=True)
+    doc.close()
+
+
+def process_pdf(input_path: str, output_path: str, temp_dir: str, font_path: str, paper_width: float, paper_height: float, image_options: dict = None):
+    """
+    1つのPDFに対して「フラット化」「正規化」「画像の再圧縮」を順に実行します。
+    フォームウィジェットを持たないPDFはフラット化を省略します。
+
+    画像の再圧縮は、最終的な用紙サイズでの表示解像度で判定するため正規化の後に行い、
+    入力が既に正規化済み (このツールの出力) の場合は、再度の劣化を避けるため省略します。
+
+    一括処理 (run_process) と監視モード (FolderWatcher) の両方から使用され、
+    監視モードではワーカープロセス内で実行されます
+    (ワーカープロセスでは perf_trace が設定されないため、各段階の計測は行われません)。
+
+    Args:
+        input_path (str): 入力PDFファイルのパス。
+        output_path (str): 正規化された出力PDFファイルのパス。
+        temp_dir (str): 中間ファイルを置く一時フォルダのパス。
+        font_path (str): フラット化で埋め込むフォントファイルのパス。
+        paper_width (float): ターゲットの用紙幅 (ポイント単位)。
+        paper_height (float): ターゲットの用紙高 (ポイント単位)。
+        image_options (dict, optional):
+            画像の再圧縮設定 (キー: 'target_dpi', 'jpeg_quality', 'bilevel_line_art')。
+            None の場合、画像の再圧縮は行いません。
+    """
+    temp_flattened_pdf = Path(temp_dir) / Path(input_path).name
+    temp_normalized_pdf = Path(temp_dir) / f"normalized_{Path(input_path).name}"
+    current_pdf = input_path
+    compress = bool(image_options) and not is_normalized(input_path, paper_width, paper_height)
+
+    try:
+        # 1. フォームをフラット化（ウィジェットがある場合のみ）
+        if has_form_widgets(current_pdf):
+            with perf_trace.span("normalisierer.flatten"):
+                high_fidelity_flatten(current_pdf, str(temp_flattened_pdf), font_path)
+            current_pdf = str(temp_flattened_pdf)
+
+        # 2. 指定サイズに正規化（画像を再圧縮しない場合は最終出力先に出力）
+        normalized_pdf = str(temp_normalized_pdf) if compress else output_path
+        with perf_trace.span("normalisierer.normalize"):
+            normalize_pdf_to_papersize(
+                current_pdf, normalized_pdf, paper_width, paper_height
+            )
+
+        # 3. 画像の縮小・再圧縮（有効で、入力が正規化済みでない場合のみ）
+        if compress:
+            with perf_trace.span("normalisierer.compress_images"):
+                compress_images(
+                    normalized_pdf,
+                    output_path,
+                    image_options['target_dpi'],
+                    image_options['jpeg_quality'],
+                    image_options['bilevel_line_art']
+                )
+    finally:
+        temp_flattened_pdf.unlink(missing_ok=True)
+        temp_normalized_pdf.unlink(missing_ok=True)
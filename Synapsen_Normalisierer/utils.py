@@ -0,0 +1,123 @@
+import os
+import sys
+import configparser
+
+import perf_trace
+
+A4_WIDTH = 595.276
+A4_HEIGHT = 841.89
+A5_WIDTH = 419.528
+A5_HEIGHT = 595.276
+
+# 監視モードのデフォルト値
+DEFAULT_POLL_INTERVAL = 5.0   # [秒] 入力元フォルダを確認する間隔
+DEFAULT_STABLE_SECONDS = 3.0  # [秒] サイズが変化しなければ書き込み完了とみなす時間
+DEFAULT_MAX_WORKERS = 2       # 同時に正規化するファイル数の上限
+
+# 画像の再圧縮のデフォルト値
+DEFAULT_IMAGE_TARGET_DPI = 150  # [dpi] 縮小後の目標解像度
+DEFAULT_JPEG_QUALITY = 75       # JPEG の品質 (0-100)
+
+
+def get_config_path(base_path):
+    """
+    実行環境(.exe or .py)に応じて、config.ini のパスを返す。
+
+    Args:
+        base_path (str): 実行ファイル (.exe) またはスクリプト (.py) のあるフォルダ。
+
+    Returns:
+        str: config.ini の絶対パス。
+    """
+    if getattr(sys, 'frozen', False):
+        # .exe実行の場合（config.ini は .exe と同じフォルダ）
+        return os.path.join(base_path, 'config.ini')
+    # スクリプト実行の場合（config.ini は .py の1つ上のフォルダ）
+    return os.path.join(
+        os.path.abspath(os.path.join(base_path, '..')), 'config.ini'
+    )
+
+
+def load_app_config(base_path):
+    """
+    config.ini を読み込み、Normalisierer が使用する設定値の辞書を返す。
+
+    GUI (Synapsen_Normalisierer_main.py) と
+    CLI (Synapsen_Normalisierer_cli.py) の両方から使用される。
+
+    Args:
+        base_path (str): 実行ファイル (.exe) またはスクリプト (.py) のあるフォルダ。
+
+    Returns:
+        dict: 読み込まれた設定値の辞書。
+               (キー:
+                'font_path',
+                'paper_width',
+                'paper_height',
+                'poll_interval',
+                'stable_seconds',
+                'max_workers',
+                'image_options',
+                'diagnostics')
+    """
+    config_path = get_config_path(base_path)
+    print(f"[DEBUG] Loading config from: {config_path}")
+
+    config_dir = os.path.dirname(config_path)
+    config = configparser.ConfigParser(interpolation=None)
+    config.read(config_path, encoding='utf-8')
+
+    config_data = {}
+
+    # 1. フォントパスの読み込み
+    font_path_from_config = config.get('Paths', 'font_path', fallback='')
+    expanded_path = os.path.expandvars(font_path_from_config)  # 環境変数を展開
+
+    if os.path.isabs(expanded_path):
+        config_data['font_path'] = expanded_path
+    else:
+        config_data['font_path'] = os.path.join(config_dir, expanded_path)
+
+    # 2. 用紙サイズの読み込み
+    paper_size_str = config.get('LaTeX', 'paper_size', fallback='A4').upper()
+    if paper_size_str == 'A5':
+        config_data['paper_width'] = A5_WIDTH
+        config_data['paper_height'] = A5_HEIGHT
+    else:
+        # デフォルトはA4
+        config_data['paper_width'] = A4_WIDTH
+        config_data['paper_height'] = A4_HEIGHT
+    print(f"[DEBUG] Paper size set to {'A5' if paper_size_str == 'A5' else 'A4'} "
+          f"({config_data['paper_width']}x{config_data['paper_height']})")
+
+    # 3. 監視モードの設定
+    config_data['poll_interval'] = config.getfloat(
+        'Watch', 'poll_interval', fallback=DEFAULT_POLL_INTERVAL
+    )
+    config_data['stable_seconds'] = config.getfloat(
+        'Watch', 'stable_seconds', fallback=DEFAULT_STABLE_SECONDS
+    )
+    config_data['max_workers'] = max(1, config.getint(
+        'Watch', 'max_workers', fallback=DEFAULT_MAX_WORKERS
+    ))
+
+    # 4. 画像の再圧縮の設定 (無効の場合は None)
+    if config.getboolean('ImageCompression', 'enabled', fallback=False):
+        config_data['image_options'] = {
+            'target_dpi': config.getint(
+                'ImageCompression', 'target_dpi', fallback=DEFAULT_IMAGE_TARGET_DPI
+            ),
+            'jpeg_quality': config.getint(
+                'ImageCompression', 'jpeg_quality', fallback=DEFAULT_JPEG_QUALITY
+            ),
+            'bilevel_line_art': config.getboolean(
+                'ImageCompression', 'bilevel_line_art', fallback=True
+            ),
+        }
+    else:
+        config_data['image_options'] = None
+
+    # 5. 処理時間の計測
+    config_data['diagnostics'] = perf_trace.load_diagnostics_config(config, config_dir)
+
+    return config_data
@@ -0,0 +1,217 @@
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "Synapsen_Nexus"))
+
+from note_data import load_csv_data_file  # noqa: E402
+from search_parser import parse_or_expression  # noqa: E402
+
+from generate_corpus import generate_notes, write_master_csv  # noqa: E402
+
+# ======================================================================
+# --- search_parser のクエリ遅延マイクロベンチマーク ---
+# 代表的なクエリを生成した DataFrame に対して繰り返し評価し、
+# p50/p95 の遅延とメモリ割り当て量を計測する。
+# --baseline を指定すると、前回の結果より遅くなったクエリがあれば終了コード 1 を返す。
+# ======================================================================
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_REPEAT = 30
+DEFAULT_THRESHOLD = 1.25     # p50 が基準の何倍を超えたら回帰とみなすか
+DEFAULT_MIN_DELTA_MS = 0.5   # これ未満の悪化は計測誤差とみなす [ms]
+
+# (名前, クエリ)
+QUERY_CATALOG = [
+    ("bare", "Python"),
+    ("bare_cjk", "会議"),
+    ("bare_cjk_long", "ツェッテルカステン"),
+    ("prefix_tag", "tag:Program"),
+    ("prefix_tag_subtree", "tag:Program/*"),
+    ("prefix_date_month", "date:202203"),
+    ("prefix_date_day", "date:20220315"),
+    ("date_range", "date:2022-03..2022-06"),
+    ("date_open_range", "date:>=2023-07"),
+    ("prefix_ikey", "ikey:タスク"),
+    ("fuzzy", "~Pyhton"),
+    ("phrase", '"Python_検索"'),
+    ("regex", "re:py(thon|torch)"),
+    ("regex_and", "tag:Program AND memo~/\\[\\[2022\\d+\\]\\]/"),
+    ("prefix_memo_link", "memo:[[2022"),
+    ("not", "-tag:ToDo"),
+    ("and_not", "tag:Program AND -ToDo"),
+    ("and_many", "tag:Program AND ikey:タスク AND date:2023 AND -tag:ToDo AND メモ AND -memo:TODO"),
+    ("and_selective_last", "メモ AND key:0 AND ikey:タスク AND date:2023-03"),
+    ("or_many", "Python OR LaTeX OR PDF OR 設計 OR 議事録 OR 旅行 OR 週報 OR 実験"),
+    ("mixed", "ikey:タスク AND (アイデア OR 思考)"),
+    ("parens_deep", "((((tag:Program OR tag:Book) AND -ToDo) OR (ikey:アイデア AND 研究)) AND (date:2022 OR date:2023))"),
+    ("no_hit", "tag:存在しないタグ"),
+]
+
+
+def build_dataframe(size, seed=0):
+    """
+    合成ノートのマスターCSVを書き出し、Nexus と同じ load_csv_data_file で読み込む。
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        csv_path = Path(temp_dir) / "master.csv"
+        write_master_csv(generate_notes(size, seed), csv_path)
+        return load_csv_data_file(csv_path)
+
+
+def _percentile(sorted_values, ratio):
+    """ソート済みのリストから、最近傍法でパーセンタイル値を返す。"""
+    index = min(len(sorted_values) - 1, max(0, round(ratio * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure_query(df, query, repeat):
+    """
+    1つのクエリを repeat 回評価し、遅延 [ms] とメモリ割り当て量を返す。
+
+    メモリは tracemalloc の計測による遅延の影響を避けるため、
+    時間計測とは別に1回だけ評価して計測する。
+    """
+    parse_or_expression(df, query)  # ウォームアップ
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        mask = parse_or_expression(df, query)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+
+    tracemalloc.start()
+    parse_or_expression(df, query)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "p50_ms": _percentile(timings, 0.50),
+        "p95_ms": _percentile(timings, 0.95),
+        "min_ms": timings[0],
+        "peak_alloc_kb": peak / 1024,
+        "hits": int(mask.sum()),
+    }
+
+
+def run(sizes, repeat, seed=0):
+    """全サイズ × 全クエリを計測し、結果のリストを返す。"""
+    results = []
+    for size in sizes:
+        df = build_dataframe(size, seed)
+        print(f"N={size}", file=sys.stderr)
+        for name, query in QUERY_CATALOG:
+            stats = measure_query(df, query, repeat)
+            results.append({"name": name, "query": query, "size": size, **stats})
+            print(
+                f"  {name:<18} p50 {stats['p50_ms']:8.2f} ms  p95 {stats['p95_ms']:8.2f} ms  "
+                f"peak {stats['peak_alloc_kb']:9.1f} KB  hits {stats['hits']}",
+                file=sys.stderr
+            )
+    return results
+
+
+def find_regressions(results, baseline_results, threshold, min_delta_ms):
+    """
+    基準より p50 が threshold 倍を超えて (かつ min_delta_ms 以上) 遅くなったクエリを返す。
+
+    Returns:
+        list[tuple[dict, dict]]: (現在の結果, 基準の結果) のリスト。
+    """
+    baseline = {(e["name"], e["size"]): e for e in baseline_results}
+    regressions = []
+    for entry in results:
+        base = baseline.get((entry["name"], entry["size"]))
+        if not base:
+            continue
+        if (entry["p50_ms"] > base["p50_ms"] * threshold
+                and entry["p50_ms"] - base["p50_ms"] >= min_delta_ms):
+            regressions.append((entry, base))
+    return regressions
+
+
+def find_hit_mismatches(results, baseline_results):
+    """
+    基準とヒット件数が異なるクエリを返す (高速化で検索結果が変わっていないかの確認)。
+
+    Returns:
+        list[tuple[dict, dict]]: (現在の結果, 基準の結果) のリスト。
+    """
+    baseline = {(e["name"], e["size"]): e for e in baseline_results}
+    return [
+        (entry, baseline[(entry["name"], entry["size"])])
+        for entry in results
+        if (entry["name"], entry["size"]) in baseline
+        and entry["hits"] != baseline[(entry["name"], entry["size"])]["hits"]
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="search_parser のクエリ遅延を計測し、基準からの回帰を検出する"
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+        help=f"DataFrame の行数 (既定: {' '.join(map(str, DEFAULT_SIZES))})"
+    )
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help=f"各クエリの評価回数 (既定: {DEFAULT_REPEAT})")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="結果JSONの保存先 (次回の --baseline に使用)")
+    parser.add_argument("--baseline", help="比較する基準の結果JSON")
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD,
+        help=f"p50 が基準の何倍を超えたら失敗とするか (既定: {DEFAULT_THRESHOLD})"
+    )
+    parser.add_argument(
+        "--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS,
+        help=f"失敗とみなす最小の悪化幅 [ms] (既定: {DEFAULT_MIN_DELTA_MS})"
+    )
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.repeat, args.seed)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"sizes": args.sizes, "repeat": args.repeat, "results": results},
+                      f, ensure_ascii=False, indent=2)
+        print(f"結果を {args.output} に保存しました。", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline_results = json.load(f)["results"]
+        exit_code = 0
+        mismatches = find_hit_mismatches(results, baseline_results)
+        if mismatches:
+            print("\n検索結果の件数が基準と異なります:", file=sys.stderr)
+            for entry, base in mismatches:
+                print(
+                    f"  {entry['name']} (N={entry['size']}): {base['hits']}件 -> {entry['hits']}件",
+                    file=sys.stderr
+                )
+            exit_code = 1
+
+        regressions = find_regressions(results, baseline_results, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\n回帰を検出しました (閾値 x{args.threshold}):", file=sys.stderr)
+            for entry, base in regressions:
+                print(
+                    f"  {entry['name']} (N={entry['size']}): "
+                    f"{base['p50_ms']:.2f} ms -> {entry['p50_ms']:.2f} ms "
+                    f"(x{entry['p50_ms'] / base['p50_ms']:.2f})",
+                    file=sys.stderr
+                )
+            return 1
+        if exit_code == 0:
+            print(f"\n回帰はありませんでした (閾値 x{args.threshold})。", file=sys.stderr)
+        return exit_code
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
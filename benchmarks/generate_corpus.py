@@ -0,0 +1,254 @@
+import csv
+import sys
+import random
+import argparse
+from pathlib import Path
+from datetime import datetime, timedelta
+
+import fitz  # PyMuPDF
+
+# ======================================================================
+# --- ベンチマーク用の合成ノートコーパス生成 ---
+# Normalisierer の入力 (DotLegalPad テンプレートに Index Key を選んだPDF) と、
+# Ersteller が出力するマスターCSV (Nexus が読み込む形式) を合成する。
+# ======================================================================
+
+# DotLegalPad テンプレート (Generate_DotLegalPad_Form_Template.py) と同じページ寸法
+PAGE_SIZES = {
+    "A4": (1650, 2200, 200),  # (幅, 高さ, DPI)
+    "A5": (1404, 1872, 226),
+}
+# Index Key のコンボボックスの位置 (config.ini [Extraction] key_rect と同じ)
+FORM_RECT = (26, 13, 401, 73)
+FIELD_NAME = "category_choice"
+
+COMMONPLACE_KEYS = [
+    'タスク', 'アイデア', '思考・考察',
+    'コミュニケーション', '学習・情報収集', '日常・その他'
+]
+# 階層タグ ('_' 区切り) を含むタグの候補
+TAGS = [
+    "Program", "Program_Python", "Program_Python_pandas", "Program_LaTeX",
+    "Program_Rust", "ToDo", "Meeting", "Meeting_週次", "Book", "Book_技術書",
+    "Idea", "研究", "研究_論文", "日記", "買い物", "Travel", "Travel_国内",
+]
+TITLE_WORDS = [
+    "会議メモ", "読書ノート", "設計", "アイデア", "振り返り", "検索", "索引",
+    "Python", "LaTeX", "PDF", "ツェッテルカステン", "週報", "実験", "草稿",
+    "Synapsen", "メモ", "計画", "議事録", "旅行", "買い物リスト",
+]
+MEMO_WORDS = [
+    "要確認", "次回までに", "参考", "TODO", "関連", "検討中", "重要",
+    "pandas", "正規表現", "パフォーマンス", "引用", "background", "メモ",
+]
+
+MERGED_CSV_HEADER = [
+    "date", "time", "title", "pages", "tags",
+    "key", "memo", "commonplace_key",
+    "merged_pdf_filename", "merged_start_page", "filepath"
+]
+
+SIDE_NOTE_RATIO = 0.15   # サイドノート (..._Note.pdf) の割合
+LINK_RATIO = 0.3         # メモに [[key]] リンクを含むノートの割合
+
+
+def generate_notes(n_notes, seed=0, start=datetime(2022, 1, 1, 8, 0, 0)):
+    """
+    ノート情報 (マスターCSVの1行に相当する辞書) のリストを生成する。
+
+    同じ seed からは常に同じコーパスが生成される。
+
+    Args:
+        n_notes (int): 生成するノート数。
+        seed (int): 乱数のシード。
+        start (datetime): 最初のノートの日時。
+
+    Returns:
+        list[dict]: 日付順のノート情報のリスト。
+    """
+    rng = random.Random(seed)
+    notes = []
+    current = start
+    merged_page = {}
+
+    while len(notes) < n_notes:
+        current += timedelta(minutes=rng.randint(5, 240), seconds=rng.randint(0, 59))
+        title = "_".join(rng.sample(TITLE_WORDS, rng.randint(1, 3)))
+        entries = [(title, rng.choice(COMMONPLACE_KEYS))]
+        if rng.random() < SIDE_NOTE_RATIO:
+            # サイドノートは親ノートの直後に作成され、Index Key は親から継承される
+            entries.append((f"{title}_Note", entries[0][1]))
+
+        for offset, (note_title, cp_key) in enumerate(entries):
+            if len(notes) >= n_notes:
+                break
+            note_time = current + timedelta(seconds=offset)
+            date_str = note_time.strftime("%Y%m%d")
+            time_str = note_time.strftime("%H%M%S")
+
+            memo_parts = rng.sample(MEMO_WORDS, rng.randint(0, 4))
+            if notes and rng.random() < LINK_RATIO:
+                for _ in range(rng.randint(1, 3)):
+                    target = rng.choice(notes)
+                    if rng.random() < 0.5:
+                        memo_parts.append(f"[[{target['key']}]]")
+                    else:
+                        memo_parts.append(f"[[{target['key']}: {target['title']}]]")
+
+            merged_pdf_filename = f"統合ノート_{note_time.year}_{note_time.month:02d}.pdf"
+            pages = rng.randint(1, 3)
+            start_page = merged_page.get(merged_pdf_filename, 3)
+            merged_page[merged_pdf_filename] = start_page + pages
+
+            notes.append({
+                "date": date_str,
+                "time": time_str,
+                "title": note_title,
+                "pages": pages,
+                "tags": sorted(rng.sample(TAGS, rng.randint(0, 3))),
+                "key": date_str + time_str,
+                "memo": " ".join(memo_parts),
+                "commonplace_key": cp_key,
+                "merged_pdf_filename": merged_pdf_filename,
+                "merged_start_page": start_page,
+                "filepath": f"{date_str}_{time_str}_{note_title}.pdf",
+            })
+    return notes
+
+
+def write_master_csv(notes, csv_path):
+    """Ersteller の append_to_master_csv と同じ形式でマスターCSVを書き出す。"""
+    with open(csv_path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=MERGED_CSV_HEADER, extrasaction='ignore')
+        writer.writeheader()
+        for note in notes:
+            note_to_write = note.copy()
+            note_to_write["tags"] = ";".join(note_to_write["tags"])
+            writer.writerow(note_to_write)
+
+
+_background_cache = {}
+
+
+def _get_background(page_size):
+    """
+    DotLegalPad テンプレート風の背景 (左の縦線・1cm の横罫線・5mm のドット方眼) を
+    1ページだけ描画したPDFを返す (用紙サイズごとにキャッシュする)。
+    """
+    if page_size in _background_cache:
+        return _background_cache[page_size]
+
+    width, height, dpi = PAGE_SIZES[page_size]
+    cm = dpi / 2.54
+    doc = fitz.open()
+    page = doc.new_page(width=width, height=height)
+    shape = page.new_shape()
+    shape.draw_line((4 * cm, 0), (4 * cm, height))
+    shape.finish(color=(1, 0.7, 0.7), width=1)
+    y = 1 * cm
+    while y < height - 0.5 * cm:
+        shape.draw_line((0, y), (width, y))
+        y += 1 * cm
+    shape.finish(color=(0.85, 0.85, 0.85), width=0.5)
+    x = 0
+    while x < width:
+        y = 1 * cm
+        while y < height - 0.5 * cm:
+            shape.draw_circle((x, y), 1.5)
+            y += 0.5 * cm
+        x += 0.5 * cm
+    shape.finish(color=(0.85, 0.85, 0.85), fill=(0.85, 0.85, 0.85))
+    shape.commit()
+
+    _background_cache[page_size] = doc
+    return doc
+
+
+def write_note_pdf(note, pdf_path, page_size="A4"):
+    """
+    DotLegalPad テンプレート風のノートPDFを1つ書き出す。
+
+    1ページ目には Index Key のコンボボックス (category_choice) があり、
+    ノートの commonplace_key が選択された状態になっている
+    (Normalisierer でフラット化する前の状態)。
+    """
+    width, height, dpi = PAGE_SIZES[page_size]
+    cm = dpi / 2.54
+    background = _get_background(page_size)
+    doc = fitz.open()
+    for page_no in range(note["pages"]):
+        page = doc.new_page(width=width, height=height)
+        page.show_pdf_page(page.rect, background, 0)
+
+        # 手書きの代わりの本文
+        page.insert_text((5 * cm, 3 * cm), note["key"], fontsize=40)
+
+        if page_no == 0:
+            widget = fitz.Widget()
+            widget.rect = fitz.Rect(*FORM_RECT)
+            widget.field_type = fitz.PDF_WIDGET_TYPE_COMBOBOX
+            widget.field_flags = fitz.PDF_CH_FIELD_IS_COMBO
+            widget.field_name = FIELD_NAME
+            widget.choice_values = COMMONPLACE_KEYS
+            widget.text_fontsize = 28
+            widget.field_value = note["commonplace_key"]
+            page.add_widget(widget)
+
+    doc.subset_fonts()  # Index Key の描画に埋め込まれる CJK フォントを縮小する
+    doc.save(pdf_path, garbage=3, deflate=True)
+    doc.close()
+
+
+def generate_corpus(out_dir, n_notes, pdf_count=None, seed=0, page_size="A4"):
+    """
+    合成コーパスを out_dir に生成する。
+
+    out_dir/master.csv にすべてのノートを、out_dir/notes/ に先頭 pdf_count 件の
+    ノートPDFを書き出す (PDFの生成は遅いため、大規模なコーパスでは一部のみ生成する)。
+
+    Args:
+        out_dir (str or Path): 出力先フォルダ。
+        n_notes (int): ノート数。
+        pdf_count (int, optional): 生成するPDFの数 (省略時は n_notes 件すべて)。
+        seed (int): 乱数のシード。
+        page_size (str): "A4" または "A5"。
+
+    Returns:
+        tuple[list[dict], Path, list[Path]]:
+            (ノート情報のリスト, マスターCSVのパス, 生成したPDFのパスのリスト)
+    """
+    out_dir = Path(out_dir)
+    notes_dir = out_dir / "notes"
+    notes_dir.mkdir(parents=True, exist_ok=True)
+
+    notes = generate_notes(n_notes, seed)
+    csv_path = out_dir / "master.csv"
+    write_master_csv(notes, csv_path)
+
+    pdf_paths = []
+    for note in notes[:n_notes if pdf_count is None else pdf_count]:
+        pdf_path = notes_dir / note["filepath"]
+        if not pdf_path.is_file():
+            write_note_pdf(note, pdf_path, page_size)
+        pdf_paths.append(pdf_path)
+    return notes, csv_path, pdf_paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ベンチマーク用の合成ノートコーパスを生成する")
+    parser.add_argument("out_dir", help="出力先フォルダ")
+    parser.add_argument("-n", "--notes", type=int, default=1000, help="ノート数 (既定: 1000)")
+    parser.add_argument("--pdfs", type=int, help="生成するPDFの数 (既定: ノート数と同じ)")
+    parser.add_argument("--seed", type=int, default=0, help="乱数のシード (既定: 0)")
+    parser.add_argument("--page-size", choices=sorted(PAGE_SIZES), default="A4")
+    args = parser.parse_args(argv)
+
+    notes, csv_path, pdf_paths = generate_corpus(
+        args.out_dir, args.notes, args.pdfs, args.seed, args.page_size
+    )
+    print(f"{len(notes)}件のノートを {csv_path} に、{len(pdf_paths)}件のPDFを {csv_path.parent / 'notes'} に生成しました。")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
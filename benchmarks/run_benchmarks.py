@@ -0,0 +1,293 @@
+import io
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+from datetime import datetime
+
+# 各アプリのモジュールは同じフォルダ内の import を前提としているため、
+# それぞれのフォルダを検索パスに追加する
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+for app_dir in ("Synapsen_Normalisierer", "Synapsen_Ersteller", "Synapsen_Nexus"):
+    sys.path.insert(0, str(PROJECT_ROOT / app_dir))
+
+from pypdf import PdfReader, PdfWriter  # noqa: E402
+
+import pdf_utils  # noqa: E402  (Normalisierer)
+import pdf_processor  # noqa: E402  (Ersteller)
+import latex_generator  # noqa: E402  (Ersteller)
+import PDFMargeHelper as Helper  # noqa: E402  (Ersteller)
+from pdf_builder import assemble_merged_pages  # noqa: E402  (Ersteller)
+from note_data import load_csv_data_file, find_backlinks_df  # noqa: E402  (Nexus)
+from search_parser import parse_or_expression  # noqa: E402  (Nexus)
+
+from generate_corpus import generate_corpus, FORM_RECT  # noqa: E402
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_PDF_SAMPLE = 100
+DEFAULT_REPEAT = 5
+BACKLINK_SAMPLE = 20
+
+# Nexus の検索バーで使われる代表的なクエリ
+QUERIES = [
+    "Python",
+    "tag:Program AND -ToDo",
+    "ikey:タスク AND (アイデア OR 思考)",
+    "date:202403",
+    "memo:[[2022",
+    "(tag:Book OR tag:研究) AND -memo:TODO",
+]
+
+LATEX_CONFIG = {
+    'latex_font': 'Yu Gothic',
+    'latex_author': 'Benchmark',
+    'key_icons': {},
+    'key_colors': {},
+}
+
+
+def _progress(message):
+    print(message, file=sys.stderr)
+
+
+def _measure(func, repeat):
+    """func を repeat 回実行し、各回の所要時間 [秒] のリストと最後の戻り値を返す。"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return timings, result
+
+
+def _record(results, stage, corpus_size, items, timings, **extra):
+    """1つの計測結果を results に追加し、概要を表示する。"""
+    median = statistics.median(timings)
+    entry = {
+        "stage": stage,
+        "corpus_size": corpus_size,
+        "items": items,
+        "repeat": len(timings),
+        "median_s": median,
+        "min_s": min(timings),
+        "per_item_ms": median * 1000 / items if items else None,
+        **extra,
+    }
+    results.append(entry)
+    label = f"{stage} [{extra['query']}]" if 'query' in extra else stage
+    _progress(f"  {label}: {median * 1000:.1f} ms (n={items})")
+    return entry
+
+
+# ==============================================================================
+# PDF処理 (Normalisierer / Ersteller)
+# ==============================================================================
+def bench_pdf_pipeline(results, pdf_paths, work_dir, font_path, paper_width, paper_height):
+    """
+    フラット化 → 正規化 → get_note_info の順に、サンプルPDFを1回ずつ処理して計測する。
+
+    Returns:
+        list[Path]: get_note_info で読み込んだPDF (正規化済み、またはフラット化前) のパス。
+    """
+    n = len(pdf_paths)
+    flat_dir = work_dir / "flattened"
+    norm_dir = work_dir / "normalized"
+    for d in (flat_dir, norm_dir):
+        shutil.rmtree(d, ignore_errors=True)
+        d.mkdir(parents=True)
+
+    scan_paths = pdf_paths
+    if font_path and Path(font_path).is_file():
+        timings, _ = _measure(lambda: [
+            pdf_utils.high_fidelity_flatten(str(p), str(flat_dir / p.name), font_path)
+            for p in pdf_paths
+        ], 1)
+        _record(results, "normalisierer.high_fidelity_flatten", n, n, timings)
+
+        timings, _ = _measure(lambda: [
+            pdf_utils.normalize_pdf_to_papersize(
+                str(flat_dir / p.name), str(norm_dir / p.name), paper_width, paper_height
+            )
+            for p in pdf_paths
+        ], 1)
+        _record(results, "normalisierer.normalize_pdf_to_papersize", n, n, timings)
+        scan_paths = [norm_dir / p.name for p in pdf_paths]
+    else:
+        _progress("  フォントが指定されていないため、フラット化・正規化の計測をスキップします (--font)。")
+
+    timings, _ = _measure(lambda: [
+        pdf_processor.get_note_info(p, FORM_RECT) for p in scan_paths
+    ], 1)
+    _record(results, "ersteller.get_note_info", n, n, timings)
+    return scan_paths
+
+
+def bench_merge_assembly(results, notes, scan_paths, paper_width, paper_height, repeat):
+    """
+    LuaLaTeX を使わずに同じページ数の空白の設計図PDFを用意し、
+    ノートページの合成 (assemble_merged_pages) と書き出しを計測する。
+    """
+    sample_notes = []
+    for note, path in zip(notes, scan_paths):
+        sample_notes.append({**note, "filepath": str(path)})
+    total_pages = sum(note["pages"] for note in sample_notes)
+
+    prefix_pages, index_pages = 2, 1
+
+    def run():
+        draft_writer = PdfWriter()
+        for _ in range(prefix_pages + total_pages + index_pages):
+            draft_writer.add_blank_page(paper_width, paper_height)
+        buffer = io.BytesIO()
+        draft_writer.write(buffer)
+        draft_reader = PdfReader(buffer)
+
+        final_writer, _ = assemble_merged_pages(
+            draft_reader, [note.copy() for note in sample_notes],
+            prefix_pages, prefix_pages + total_pages,
+            paper_width, paper_height, "benchmark.pdf"
+        )
+        final_writer.write(io.BytesIO())
+
+    timings, _ = _measure(run, repeat)
+    _record(results, "ersteller.assemble_merged_pages", len(sample_notes), len(sample_notes), timings)
+
+
+# ==============================================================================
+# CSV・検索 (Ersteller / Nexus)
+# ==============================================================================
+def bench_corpus(results, notes, csv_path, scan_paths, repeat):
+    """コーパス全体 (N件) を対象とする処理を計測する。"""
+    n = len(notes)
+
+    # create_latex_source はPDFが存在するノートのみ出力するため、
+    # 全ノートのファイルパスをサンプルPDFに割り当てる
+    latex_notes = [
+        {**note, "filepath": str(scan_paths[i % len(scan_paths)])}
+        for i, note in enumerate(notes)
+    ]
+    timings, _ = _measure(lambda: latex_generator.create_latex_source(
+        latex_notes, LATEX_CONFIG, "Benchmark", "A4"
+    ), repeat)
+    _record(results, "ersteller.create_latex_source", n, n, timings)
+
+    timings, df = _measure(lambda: load_csv_data_file(csv_path), repeat)
+    _record(results, "nexus.load_csv_data_file", n, n, timings)
+
+    for query in QUERIES:
+        timings, mask = _measure(lambda: parse_or_expression(df, query), repeat)
+        _record(results, "nexus.parse_or_expression", n, n, timings,
+                query=query, hits=int(mask.sum()))
+
+    step = max(1, n // BACKLINK_SAMPLE)
+    keys = [notes[i]["key"] for i in range(0, n, step)][:BACKLINK_SAMPLE]
+    timings, _ = _measure(lambda: [find_backlinks_df(df, key) for key in keys], repeat)
+    _record(results, "nexus.find_backlinks_df", n, len(keys), timings)
+
+
+# ==============================================================================
+# 結果の比較
+# ==============================================================================
+def _result_key(entry):
+    return (entry["stage"], entry["corpus_size"], entry.get("query"))
+
+
+def compare_with_baseline(results, baseline_path):
+    """前回の結果JSONと比較し、ステージごとの速度比を表示する。"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {_result_key(e): e for e in json.load(f)["results"]}
+
+    _progress(f"\n--- {baseline_path} との比較 (現在 / 基準) ---")
+    for entry in results:
+        base = baseline.get(_result_key(entry))
+        if not base or not base["median_s"]:
+            continue
+        ratio = entry["median_s"] / base["median_s"]
+        label = f"{entry['stage']} [{entry['query']}]" if entry.get("query") else entry["stage"]
+        _progress(f"  {label} (N={entry['corpus_size']}): x{ratio:.2f}")
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="合成コーパスで Normalisierer / Ersteller / Nexus の処理時間を計測する"
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+        help=f"ノート数 (既定: {' '.join(map(str, DEFAULT_SIZES))})"
+    )
+    parser.add_argument(
+        "--pdf-sample", type=int, default=DEFAULT_PDF_SAMPLE,
+        help=f"PDF処理を計測するノート数 (既定: {DEFAULT_PDF_SAMPLE})"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=DEFAULT_REPEAT,
+        help=f"CSV・検索処理の繰り返し回数 (既定: {DEFAULT_REPEAT})"
+    )
+    parser.add_argument("--font", help="フラット化に使用するフォントファイル (省略時はスキップ)")
+    parser.add_argument("--work-dir", default="benchmark_corpus", help="コーパスの生成先 (再利用される)")
+    parser.add_argument("-o", "--output", default="benchmark_results.json", help="結果JSONの保存先")
+    parser.add_argument("--baseline", help="比較する前回の結果JSON")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    work_dir = Path(args.work_dir)
+    paper_width, paper_height = Helper.A4_WIDTH, Helper.A4_HEIGHT
+    results = []
+
+    # PDF処理はノート数に依存しないため、最初のサンプルだけで1度計測する
+    _progress(f"コーパスを生成中 (PDF {args.pdf_sample}件)...")
+    sample_notes, _, pdf_paths = generate_corpus(
+        work_dir / "pdf_sample", args.pdf_sample, seed=args.seed
+    )
+    _progress("PDF処理を計測中...")
+    scan_paths = bench_pdf_pipeline(
+        results, pdf_paths, work_dir / "pdf_sample", args.font, paper_width, paper_height
+    )
+    bench_merge_assembly(results, sample_notes, scan_paths, paper_width, paper_height, args.repeat)
+
+    for size in args.sizes:
+        _progress(f"コーパスを生成中 (N={size})...")
+        notes, csv_path, _ = generate_corpus(work_dir / f"n{size}", size, pdf_count=0, seed=args.seed)
+        _progress(f"N={size} を計測中...")
+        bench_corpus(results, notes, csv_path, scan_paths, args.repeat)
+
+    output = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": args.sizes,
+            "pdf_sample": args.pdf_sample,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+    _progress(f"結果を {args.output} に保存しました。")
+
+    if args.baseline:
+        compare_with_baseline(results, args.baseline)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())